@@ -0,0 +1,194 @@
+# File: archer_cache.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Cache Archer schema metadata (applications, levels, field definitions,
+values lists) across action runs.
+"""
+
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import archer_consts as consts
+
+
+class SchemaCache:
+    """Per-asset LRU cache of Archer metadata responses, persisted as JSON.
+    Safe to share between threads.
+
+    path, a string: file to load from and save to; None keeps the cache in
+        memory for this run only
+    ttl, a number: seconds an entry stays valid; 0 disables persistence
+    max_entries, an int: least recently used entries are dropped beyond this
+    kind_ttls, a dict: per-kind upper bounds on `ttl` (see
+        consts.SCHEMA_CACHE_KIND_TTLS)
+    """
+
+    FILE_VERSION = 3
+
+    def __init__(
+        self,
+        path=None,
+        ttl=consts.DEFAULT_SCHEMA_CACHE_TTL,
+        max_entries=consts.DEFAULT_SCHEMA_CACHE_MAX_ENTRIES,
+        kind_ttls=None,
+    ):
+        self.path = path if ttl else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.kind_ttls = consts.SCHEMA_CACHE_KIND_TTLS if kind_ttls is None else kind_ttls
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._refreshed = False
+        self.load()
+
+    @staticmethod
+    def _key(kind, args):
+        return "|".join([kind, *(str(a) for a in args)])
+
+    def ttl_for(self, kind):
+        """Returns how many seconds entries of the given kind stay valid."""
+        ttl = self.ttl or consts.DEFAULT_SCHEMA_CACHE_TTL
+        return min(ttl, self.kind_ttls.get(kind, ttl))
+
+    def get(self, kind, args):
+        """Returns (found, value) for the given kind of metadata and lookup
+        arguments, counting the hit or miss.
+        """
+        key = self._key(kind, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, entry[1]
+                del self._entries[key]
+                self._dirty = True
+            self.misses += 1
+            return False, None
+
+    def set(self, kind, args, value, ttl=None):
+        """Caches `value`, for `ttl` seconds if given (capped like any entry
+        of this kind), otherwise for the kind's usual TTL.
+        """
+        key = self._key(kind, args)
+        ttl = self.ttl_for(kind) if ttl is None else min(ttl, self.ttl_for(kind))
+        with self._lock:
+            self._entries[key] = [time.time() + ttl, value]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def invalidate(self, kind=None, *args):
+        """Drops cached entries: everything, every entry of `kind`, or the
+        single entry for `kind` and `args`.
+        """
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+            elif args:
+                self._entries.pop(self._key(kind, args), None)
+            else:
+                prefix = kind + "|"
+                for key in [k for k in self._entries if k == kind or k.startswith(prefix)]:
+                    del self._entries[key]
+            self._dirty = True
+
+    def invalidate_once(self):
+        """Drops the cache after a lookup missed against cached metadata.
+        Returns False (and does nothing) if the cache was already refreshed
+        this run or nothing was served from it, i.e. a retry can't help.
+        """
+        with self._lock:
+            if self._refreshed or not self.hits:
+                return False
+            self._refreshed = True
+            self.invalidate()
+            return True
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self):
+        return {"schema_cache_hits": self.hits, "schema_cache_misses": self.misses}
+
+    def load(self):
+        if not self.path or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != self.FILE_VERSION:
+            return
+        now = time.time()
+        entries = [(k, v) for k, v in data.get("entries", []) if isinstance(v, list) and len(v) == 2 and v[0] > now]
+        with self._lock:
+            self._entries = OrderedDict(entries[-self.max_entries :])
+
+    def save(self):
+        """Writes the cache to disk if it changed, replacing the file
+        atomically so concurrent actions never read a partial file.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            # Least recently used first, so load() keeps the same order
+            entries = list(self._entries.items())
+            self._dirty = False
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".archer_schema_")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": self.FILE_VERSION, "entries": entries}, f)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            self._dirty = True
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def cached_schema(kind):
+    """Decorator for `ArcherAPISession` methods that fetch schema metadata:
+    results are kept in the session's `schema_cache` under `kind`.  None
+    (lookup failed) is never cached.
+    """
+
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(self, *args):
+            found, value = self.schema_cache.get(kind, args)
+            if found:
+                return value
+            value = f(self, *args)
+            if value is not None:
+                self.schema_cache.set(kind, args, value)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -19,6 +19,7 @@ import fcntl
 import json
 import os
 import sys
+import tempfile
 
 import encryption_helper
 import phantom.app as phantom
@@ -27,10 +28,19 @@ from phantom.action_result import ActionResult
 from phantom.base_connector import BaseConnector
 
 # Imports local to this App
+import archer_cache
 import archer_consts as consts
+import archer_export
+import archer_records
+import archer_search
 import archer_utils
 
 
+def _counts_since(before, after):
+    """Returns {counter: increase} between two snapshots of counters."""
+    return {k: v - before.get(k, 0) for k, v in after.items()}
+
+
 class ArcherConnector(BaseConnector):
     """A subclass of `phantom.base_connector.BaseConnector`, which implements
     on_poll and *_ticket to manipulate records/events in RSA Archer GRC.
@@ -48,6 +58,11 @@ class ArcherConnector(BaseConnector):
         self.latest_time = 0
         self.proxy = None
         self.sessionToken = None
+        self._timeout = consts.DEFAULT_REQUEST_TIMEOUT
+        self._max_connections = consts.DEFAULT_POOL_MAXSIZE
+        self._schema_cache_ttl = consts.DEFAULT_SCHEMA_CACHE_TTL
+        self._search_workers = consts.DEFAULT_SEARCH_WORKERS
+        self._parse_processes = consts.DEFAULT_PARSE_PROCESSES
         if isinstance(self.get_app_config(), dict):
             self.latest_time = self.get_app_config().get("past_days", 0)
         if os.path.isfile(self.file_):
@@ -71,6 +86,31 @@ class ArcherConnector(BaseConnector):
         self.sessionToken = self._state.get(consts.ARCHER_SESSION_TOKEN)
         if self.sessionToken:
             self.sessionToken = self.decrypt_state(self.sessionToken, consts.ARCHER_SESSION_TOKEN)
+
+        config = self.get_config()
+        ret_val, self._timeout = self._validate_integer(self, config.get("timeout", consts.DEFAULT_REQUEST_TIMEOUT), "timeout", allow_zero=True)
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+        ret_val, self._max_connections = self._validate_integer(
+            self, config.get("max_connections", consts.DEFAULT_POOL_MAXSIZE), "max_connections"
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+        ret_val, self._schema_cache_ttl = self._validate_integer(
+            self, config.get("schema_cache_ttl", consts.DEFAULT_SCHEMA_CACHE_TTL), "schema_cache_ttl", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+        ret_val, self._search_workers = self._validate_integer(
+            self, config.get("search_workers", consts.DEFAULT_SEARCH_WORKERS), "search_workers"
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+        ret_val, self._parse_processes = self._validate_integer(
+            self, config.get("parse_processes", consts.DEFAULT_PARSE_PROCESSES), "parse_processes", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
         try:
             self.proxy = self._get_proxy()
         except Exception as e:
@@ -79,6 +119,13 @@ class ArcherConnector(BaseConnector):
         return phantom.APP_SUCCESS
 
     def finalize(self):
+        if self.proxy:
+            self.proxy.close()
+            try:
+                self.proxy.schema_cache.save()
+            except Exception as e:
+                err = self._get_error_message_from_exception(e)
+                self.debug_print(f"Failed to save the Archer schema cache: {err}")
         self._state[consts.ARCHER_SESSION_TOKEN] = self.sessionToken
         if self.sessionToken:
             self._state[consts.ARCHER_SESSION_TOKEN] = self.encrypt_state(self.sessionToken, consts.ARCHER_SESSION_TOKEN)
@@ -175,23 +222,59 @@ class ArcherConnector(BaseConnector):
         max_ingested_id = max_content_id
         restarted_from_first_page = False
         self.proxy.excluded_fields = [x.lower().strip() for x in config.get("exclude_fields", "").split(",")]
+        # Only the mapped fields and the tracking ID are used, so only ask Archer for those
+        poll_fields = self.proxy.select_fields(application, [tracking_id_field, *cef_mapping], ignore_missing=True)
+        # With a numeric tracking field, Archer only returns the records past the
+        # last one seen (the watermark), so every search starts at page 1
+        tracking_plan = None if self.is_poll_now() else self.proxy.plan_field_search(application, tracking_id_field, 0)
+        use_watermark = tracking_plan is not None and tracking_plan.filter_type == "numeric"
+        watermark = state.get("tracking_watermark") if use_watermark else None
+        total_records = None
         while completed_records < max_records:
-            records = self.proxy.find_records(application, tracking_id_field, None, self.POLLING_PAGE_SIZE, sort=sort_type, page=last_page)
-            nrecs = len(records)
-            if not records:
-                if last_page > 1 and not restarted_from_first_page:
-                    self.send_progress(f"Archer page {last_page} is empty; restarting ingestion scan from page 1")
-                    last_page = 1
-                    restarted_from_first_page = True
-                    continue
-                break
-            self.send_progress(f"Processing {nrecs} records, page {last_page}...")
+            page_watermark = watermark
+            if use_watermark:
+                records = self.proxy.iter_records(
+                    application,
+                    tracking_id_field,
+                    watermark,
+                    self.POLLING_PAGE_SIZE,
+                    sort=sort_type,
+                    page_size=self.POLLING_PAGE_SIZE,
+                    fields=poll_fields,
+                    plan=tracking_plan.with_value(watermark, "GreaterThan" if watermark is not None else None),
+                )
+            elif total_records is not None and (last_page - 1) * self.POLLING_PAGE_SIZE >= total_records:
+                # Archer's count of records shows this page is empty; don't fetch it
+                records = archer_search.SearchResults()
+            else:
+                records = self.proxy.iter_records(
+                    application,
+                    tracking_id_field,
+                    None,
+                    self.POLLING_PAGE_SIZE,
+                    sort=sort_type,
+                    page=last_page,
+                    page_size=self.POLLING_PAGE_SIZE,
+                    fields=poll_fields,
+                )
+            if use_watermark:
+                self.send_progress(f"Processing records after {tracking_id_field} {watermark}...")
+            elif total_records is not None:
+                num_pages = (total_records + self.POLLING_PAGE_SIZE - 1) // self.POLLING_PAGE_SIZE
+                self.send_progress(f"Processing records, page {last_page} of {num_pages}...")
+            else:
+                self.send_progress(f"Processing records, page {last_page}...")
+            nrecs = 0
             page_fully_scanned = True
-            for i, rec in enumerate(records):
+            for rec in records:
+                nrecs += 1
+                if use_watermark:
+                    # Records come in tracking ID order, so the watermark follows each one read
+                    watermark = self._tracking_value(rec, tracking_id_field, watermark)
                 content_id = int(rec["@contentId"])
                 if content_id <= max_content_id:
                     continue
-                self.send_progress(f"On record {i + 1}/{nrecs}...")
+                self.send_progress(f"On record {nrecs}...")
                 record_name = consts.ARCHER_ERR_RECORD_NOT_FOUND
 
                 cef = {}
@@ -244,21 +327,56 @@ class ArcherConnector(BaseConnector):
                 max_ingested_id = max(max_ingested_id, c["data"]["archer_content_id"])
                 completed_records += 1
                 if completed_records >= max_records:
-                    if i < nrecs - 1:
+                    # Records are only left on this page if we stopped short of a full page
+                    if nrecs < self.POLLING_PAGE_SIZE:
                         page_fully_scanned = False
                         self.send_progress(f"Reached ingestion limit with records still pending on Archer page {last_page}")
                     break
 
+            if records.count is not None:
+                total_records = records.count
+            if use_watermark:
+                # A short page was the last one; an unchanged watermark can't reach further
+                if nrecs < self.POLLING_PAGE_SIZE or watermark == page_watermark:
+                    break
+                continue
+            if not nrecs:
+                if last_page > 1 and not restarted_from_first_page:
+                    self.send_progress(f"Archer page {last_page} is empty; restarting ingestion scan from page 1")
+                    last_page = 1
+                    restarted_from_first_page = True
+                    continue
+                break
             if not page_fully_scanned or nrecs < self.POLLING_PAGE_SIZE:
                 break
             last_page += 1
 
         self.save_progress(f"Ingested {completed_records} records")
-        if not self.is_poll_now():
+        if use_watermark:
+            self._state[application] = {"max_content_id": max_ingested_id, "tracking_watermark": watermark}
+        elif not self.is_poll_now():
             self._state[application] = {"max_content_id": max_ingested_id, "last_page": last_page}
         self.save_progress("Import complete.")
         return action_result.set_status(phantom.APP_SUCCESS, "Import complete")
 
+    @staticmethod
+    def _tracking_value(record, tracking_id_field, default=None):
+        """Returns a record's tracking ID as a number, or `default` if it has
+        none.
+        """
+        for field in record.get("Field", []):
+            if field.get("@name") == tracking_id_field:
+                text = field.get("#text")
+                try:
+                    return int(text)
+                except (TypeError, ValueError):
+                    pass
+                try:
+                    return float(text)
+                except (TypeError, ValueError):
+                    return default
+        return default
+
     def _save_latest_time(self, latest_time=None):
         """Sets the time of the last record successfully fetched, in epoch
         time.
@@ -287,7 +405,21 @@ class ArcherConnector(BaseConnector):
             ep, user, pwd, instance, users_domain = self._get_proxy_args()
             verify = self.get_config().get("verify_ssl", True)
             self.debug_print(f"New Archer API session at ep:{ep}, user:{user}, verify:{verify}")
-            self.proxy = archer_utils.ArcherAPISession(ep, user, pwd, instance, users_domain, verify, self)
+            cache_path = os.path.join(self.get_state_dir(), consts.ARCHER_SCHEMA_CACHE_FILE.format(self.get_asset_id()))
+            schema_cache = archer_cache.SchemaCache(cache_path, self._schema_cache_ttl)
+            self.proxy = archer_utils.ArcherAPISession(
+                ep,
+                user,
+                pwd,
+                instance,
+                users_domain,
+                verify,
+                self,
+                timeout=self._timeout,
+                max_connections=self._max_connections,
+                schema_cache=schema_cache,
+                preload_directory=self.get_config().get("preload_directory", False),
+            )
             archer_utils.W = self.debug_print
         return self.proxy
 
@@ -554,6 +686,7 @@ class ArcherConnector(BaseConnector):
         self.save_progress("Get Archer record...")
         app = param["application"]
         max_count = param.get("max_results", 100)
+        max_scanned = param.get("max_scanned", consts.DEFAULT_MAX_SCANNED)
         search_field_name = param.get("name_field")
         search_value = param.get("search_value")
 
@@ -561,6 +694,14 @@ class ArcherConnector(BaseConnector):
         if phantom.is_fail(status):
             return action_result.get_status()
 
+        status, max_scanned = self._validate_integer(action_result, max_scanned, "max_scanned", False)
+        if phantom.is_fail(status):
+            return action_result.get_status()
+
+        export_format = (param.get("export_format") or "").lower()
+        if export_format and export_format not in archer_export.EXPORT_FORMATS:
+            return action_result.set_status(phantom.APP_ERROR, consts.ARCHER_ERR_EXPORT_FORMAT.format(archer_export.EXPORT_FORMATS))
+
         if (search_field_name or search_value) and not (search_field_name and search_value):
             return action_result.set_status(phantom.APP_ERROR, "Need both the field name and the search value to search")
 
@@ -572,47 +713,85 @@ class ArcherConnector(BaseConnector):
         results_filter_dict = parameter.get("results_filter_json")
         results_filter_operator = parameter.get("results_filter_operator")
         results_filter_equality = parameter.get("results_filter_equality")
-        records = []
-
         self.proxy.excluded_fields = [x.lower().strip() for x in self.get_config().get("exclude_fields", "").split(",")]
-        num_iterations = max_count // self.LIST_TICKETS_PAGE_SIZE
-        rem_count = max_count % self.LIST_TICKETS_PAGE_SIZE
-        if rem_count != 0:
-            num_iterations = num_iterations + 1
-        page = 1
-        for iter_count in range(num_iterations):
-            records_req = self.LIST_TICKETS_PAGE_SIZE
-            if rem_count != 0 and iter_count == num_iterations - 1:
-                records_req = rem_count
-
-            lst_records = self.proxy.find_records(app, search_field_name, search_value, max_count=records_req, page=page)
-            num_records = len(lst_records)
-
-            if lst_records:
-                records.extend(lst_records)
-            else:
-                break
-            if num_records < self.LIST_TICKETS_PAGE_SIZE:
-                break
-
-            page += 1
-
-        self.save_progress("Filtering records...")
+        criteria = None
         if results_filter_dict:
-            filtered_records = self.filter_records(results_filter_dict, results_filter_operator, results_filter_equality, records)
-        else:
-            filtered_records = records
+            # Let Archer apply what it can of the results filter; the rest is applied below
+            criteria, results_filter_dict = self.proxy.compile_results_filter(
+                app, results_filter_dict, results_filter_operator, results_filter_equality
+            )
+        fields = None
+        if param.get("fields"):
+            names = [x.strip() for x in param["fields"].split(",") if x.strip()]
+            try:
+                fields = self.proxy.select_fields(app, names)
+            except ValueError as e:
+                return action_result.set_status(phantom.APP_ERROR, str(e))
+            if fields and results_filter_dict:
+                # Client-side filtering needs the fields it filters on too
+                fields.update(self.proxy.select_fields(app, list(results_filter_dict), ignore_missing=True) or {})
+        matches = self.record_filter(results_filter_dict, results_filter_operator, results_filter_equality)
+        # Compact records keep large results small until each one is added
+        records = self.proxy.iter_records(
+            app,
+            search_field_name,
+            search_value,
+            # max_results counts matches, so a client-side filter may read more
+            max_count if matches is None else max_scanned,
+            page_size=self.LIST_TICKETS_PAGE_SIZE,
+            fields=fields,
+            criteria=criteria,
+            compact=True,
+            # More workers than pooled connections would only queue for one
+            workers=min(self._search_workers, self._max_connections),
+        )
 
-        if filtered_records:
+        self.save_progress("Filtering records...")
+        filtered_records = []
+        found = 0
+        scanned = 0
+        # An export writes each record as it arrives instead of keeping it
+        writer = self._export_writer(export_format)
+        try:
+            for record in records:
+                scanned += 1
+                if matches is None or matches(record):
+                    found += 1
+                    if writer is None:
+                        filtered_records.append(record)
+                    else:
+                        writer.write(record)
+                    if found >= max_count:
+                        break
+        except BaseException:
+            # Don't leave a partial export behind in the vault's temporary directory
+            self._discard_export(writer)
+            raise
+        finally:
+            records.close()
+            if writer is not None:
+                writer.close()
+        action_result.update_summary({"records_scanned": scanned})
+        if records.count is not None:
+            # Matches in Archer, before any client-side filtering or max_results
+            self.save_progress(f"Archer reports {records.count} matching records")
+            action_result.update_summary({"total_records": records.count})
+
+        if found and writer is not None:
+            if phantom.is_fail(self._add_export_to_vault(action_result, writer, f"archer_{app}_tickets")):
+                return action_result.get_status()
+            action_result.set_status(phantom.APP_SUCCESS, "Tickets exported to the vault")
+        elif found:
             for r in filtered_records:
-                action_result.add_data(r)
+                action_result.add_data(archer_records.as_record_dict(r))
             action_result.set_status(phantom.APP_SUCCESS, "Tickets retrieved")
-            action_result.update_summary({"records_found": len(filtered_records)})
+            action_result.update_summary({"records_found": found})
         else:
+            self._discard_export(writer)
             filter_msg = ""
             if search_field_name and search_value:
                 filter_msg = f" with field {search_field_name} containing value {search_value}"
-            if results_filter_dict:
+            if parameter.get("results_filter_json"):
                 if filter_msg != "":
                     filter_msg = f"{filter_msg} and results filter json"
                 else:
@@ -623,6 +802,24 @@ class ArcherConnector(BaseConnector):
 
         return action_result.get_status()
 
+    def _handle_count_tickets(self, action_result, param):
+        """Handles 'count_tickets' actions"""
+        self.save_progress("Counting Archer records...")
+        app = param["application"]
+        search_field_name = param.get("name_field")
+        search_value = param.get("search_value")
+
+        if (search_field_name or search_value) and not (search_field_name and search_value):
+            return action_result.set_status(phantom.APP_ERROR, "Need both the field name and the search value to search")
+
+        count = self.proxy.count_records(app, search_field_name, search_value)
+        if count is None:
+            return action_result.set_status(phantom.APP_ERROR, f"Archer did not report a record count for {app}")
+
+        action_result.add_data({"count": count})
+        action_result.update_summary({"records_found": count})
+        return action_result.set_status(phantom.APP_SUCCESS, f"Found {count} tickets")
+
     def _handle_create_attachment(self, action_result, param):
         self.debug_print("In action create attachment...")
         vault_id = param["vault_id"]
@@ -661,49 +858,50 @@ class ArcherConnector(BaseConnector):
 
         return action_result.get_status()
 
-    def filter_records(self, results_filter_dict, results_filter_operator, results_filter_equality, records):
-        filtered_records = []
-
-        if results_filter_operator == "and":
-            and_dict_len = len(results_filter_dict)
-            for record in records:
-                and_dict_count = 0
-                for field in record["Field"]:
-                    for k, v in results_filter_dict.items():
-                        try:
-                            if results_filter_equality == "equals":
-                                if field["@name"] == k and v.lower() == field["#text"].lower():
-                                    and_dict_count += 1
-                            else:
-                                if field["@name"] == k and v.lower() in field["#text"].lower():
-                                    and_dict_count += 1
-                        except Exception:
-                            continue
-                if and_dict_count >= and_dict_len:
-                    filtered_records.append(record)
-
-        elif results_filter_operator == "or":
-            for record in records:
-                next_record = False
-                for field in record["Field"]:
-                    for k, v in results_filter_dict.items():
-                        try:
-                            if results_filter_equality == "equals":
-                                if field["#text"] and field["@name"] == k and v.lower() == field["#text"].lower():
-                                    filtered_records.append(record)
-                                    next_record = True
-                                    break
-                            else:
-                                if field["#text"] and field["@name"] == k and v.lower() in field["#text"].lower():
-                                    filtered_records.append(record)
-                                    next_record = True
-                                    break
-                        except Exception:
-                            continue
-                    if next_record:
-                        break
+    def _export_writer(self, export_format):
+        """Returns an archer_export.RecordWriter to a file in the vault's
+        temporary directory, or None if no export format was asked for.
+        """
+        if not export_format:
+            return None
+        fd, path = tempfile.mkstemp(dir=vault.Vault.get_vault_tmp_dir(), prefix="archer_export_", suffix=f".{export_format}")
+        os.close(fd)
+        return archer_export.RecordWriter(path, export_format)
+
+    def _add_export_to_vault(self, action_result, writer, name):
+        """Adds a closed export file to the vault, with its vault ID, record
+        count and first few records as the action's data.
+        """
+        file_name = f"{name}.{writer.fmt}"
+        success, message, vault_id = vault.vault_add(container=self.get_container_id(), file_location=writer.path, file_name=file_name)
+        if not success:
+            self._discard_export(writer)
+            return action_result.set_status(phantom.APP_ERROR, consts.ARCHER_ERR_VAULT_ADD.format(message))
+        action_result.add_data({"vault_id": vault_id, "file_name": file_name, "record_count": writer.count, "preview": writer.preview})
+        action_result.update_summary({"vault_id": vault_id, "records_found": writer.count})
+        return phantom.APP_SUCCESS
 
-        return filtered_records
+    @staticmethod
+    def _discard_export(writer):
+        """Closes an export and removes its file, e.g. after a failure."""
+        if writer is None:
+            return
+        try:
+            writer.close()
+        except Exception:
+            pass
+        if os.path.exists(writer.path):
+            os.remove(writer.path)
+
+    def record_filter(self, results_filter_dict, results_filter_operator, results_filter_equality):
+        """Returns the predicate records must pass for the client-side part of
+        a results filter, or None if there is nothing to filter.
+        """
+        if not results_filter_dict:
+            return None
+        if results_filter_operator not in ("and", "or"):
+            return lambda record: False
+        return archer_search.compile_record_filter(results_filter_dict, results_filter_operator, results_filter_equality)
 
     def _handle_get_report(self, action_result, param):
         """Handles 'get_report' actions"""
@@ -711,11 +909,20 @@ class ArcherConnector(BaseConnector):
         guid = param["guid"]
         max_count = param.get("max_results", 100)
         max_pages = param.get("max_pages", 10)
+        max_scanned = param.get("max_scanned", consts.DEFAULT_MAX_SCANNED)
 
         status, max_count = self._validate_integer(action_result, max_count, "max_result", False)
         if phantom.is_fail(status):
             return action_result.get_status()
 
+        status, max_scanned = self._validate_integer(action_result, max_scanned, "max_scanned", False)
+        if phantom.is_fail(status):
+            return action_result.get_status()
+
+        export_format = (param.get("export_format") or "").lower()
+        if export_format and export_format not in archer_export.EXPORT_FORMATS:
+            return action_result.set_status(phantom.APP_ERROR, consts.ARCHER_ERR_EXPORT_FORMAT.format(archer_export.EXPORT_FORMATS))
+
         status, max_pages = self._validate_integer(action_result, max_pages, "max_pages", False)
         if phantom.is_fail(status):
             return action_result.get_status()
@@ -728,27 +935,47 @@ class ArcherConnector(BaseConnector):
         results_filter_dict = parameter.get("results_filter_json")
         results_filter_operator = parameter.get("results_filter_operator")
         results_filter_equality = parameter.get("results_filter_equality")
+        writer = None
 
         try:
-            result_dict = self.proxy.get_report_by_id(guid, max_count, max_pages)
+            # Records are filtered as pages are merged, so paging stops once max_results match
+            matches = self.record_filter(results_filter_dict, results_filter_operator, results_filter_equality)
+            # An export writes each page of records as it is merged instead of keeping them
+            writer = self._export_writer(export_format)
+            try:
+                on_records = writer.write_all if writer is not None else None
+                result_dict = self.proxy.get_report_by_id(
+                    guid, max_count, max_pages, matches, max_scanned, on_records, processes=self._parse_processes
+                )
+            except BaseException:
+                # Don't leave a partial export behind in the vault's temporary directory
+                self._discard_export(writer)
+                raise
+            finally:
+                if writer is not None:
+                    writer.close()
+            action_result.update_summary({"records_scanned": result_dict.get("records_scanned", 0)})
+            # Seconds spent fetching, parsing and merging report pages; fetching overlaps the others
+            action_result.update_summary({k: round(v, 3) for k, v in result_dict.get("timings", {}).items()})
             if result_dict["status"] != "success":
+                self._discard_export(writer)
                 return action_result.set_status(phantom.APP_ERROR, result_dict["message"])
 
-            records = result_dict["records"]
+            filtered_records = result_dict["records"]
 
-            self.save_progress("Filtering records...")
-            if results_filter_dict:
-                filtered_records = self.filter_records(results_filter_dict, results_filter_operator, results_filter_equality, records)
-            else:
-                filtered_records = records
-
-            if filtered_records:
+            if result_dict["records_found"] and writer is not None:
+                if phantom.is_fail(self._add_export_to_vault(action_result, writer, f"archer_report_{guid}")):
+                    return action_result.get_status()
+                action_result.set_status(phantom.APP_SUCCESS, "Tickets exported to the vault")
+                action_result.update_summary({"pages_found": result_dict["page_count"]})
+            elif filtered_records:
                 for r in filtered_records:
                     action_result.add_data(r)
                 action_result.set_status(phantom.APP_SUCCESS, "Tickets retrieved")
                 action_result.update_summary({"records_found": len(filtered_records)})
                 action_result.update_summary({"pages_found": result_dict["page_count"]})
             else:
+                self._discard_export(writer)
                 if results_filter_dict:
                     filter_msg = " with results filter json"
                 else:
@@ -759,6 +986,7 @@ class ArcherConnector(BaseConnector):
                 action_result.update_summary({"pages_found": result_dict["page_count"]})
 
         except Exception as e:
+            self._discard_export(writer)
             action_result.set_status(phantom.APP_ERROR, f"Error handling get report action - e = {e}")
 
         return action_result.get_status()
@@ -977,12 +1205,42 @@ class ArcherConnector(BaseConnector):
 
         return action_result.get_status()
 
+    def _handle_refresh_schema(self, action_result, param):
+        """Handles 'refresh_schema' actions: drops the cached Archer schema
+        metadata and fetches it again.
+        """
+        self.save_progress("Refreshing Archer schema cache...")
+        app = param.get("application")
+
+        self.proxy.refresh_schema()
+        summary = {"applications_found": len(self.proxy.get_schema().apps_by_id)}
+
+        if app:
+            level_id = self.proxy.get_levelId_for_app(app)
+            if level_id is None:
+                return action_result.set_status(phantom.APP_ERROR, f"Error: Could not identify application {app}")
+            fields = self.proxy.get_level_fields(level_id)
+            summary["fields_found"] = len(fields) if fields else 0
+
+        action_result.update_summary(summary)
+        return action_result.set_status(phantom.APP_SUCCESS, "Schema cache refreshed")
+
+    def _get_stats(self):
+        """Returns the connection pool and schema cache counters of this
+        asset run so far.
+        """
+        if not self.proxy:
+            return {}
+        return {**self.proxy.transport.get_stats(), **self.proxy.schema_cache.get_stats()}
+
     def handle_action(self, param):
         """Dispatches actions."""
         action_id = self.get_action_identifier()
         self.debug_print("action_id", action_id)
         action_result = ActionResult(dict(param))
         self.add_action_result(action_result)
+        # Counters are per asset run; the summary gets this action's share
+        stats = self._get_stats()
         try:
             if action_id == consts.ARCHER_ACTION_CREATE_TICKET:
                 return self._handle_create_ticket(action_result, param)
@@ -1004,12 +1262,19 @@ class ArcherConnector(BaseConnector):
                 return self._handle_assign_ticket(action_result, param)
             elif action_id == consts.ARCHER_ACTION_ATTACH_ALERT:
                 return self._handle_attach_alert(action_result, param)
+            elif action_id == consts.ARCHER_ACTION_REFRESH_SCHEMA:
+                return self._handle_refresh_schema(action_result, param)
+            elif action_id == consts.ARCHER_ACTION_COUNT_TICKETS:
+                return self._handle_count_tickets(action_result, param)
             return phantom.APP_SUCCESS
         except Exception as e:
             err = self._get_error_message_from_exception(e)
             error_message = consts.ARCHER_ERR_ACTION_EXECUTION.format(action_id, err)
             self.debug_print(error_message)
             return action_result.set_status(phantom.APP_ERROR, error_message)
+        finally:
+            if self.proxy:
+                action_result.update_summary(_counts_since(stats, self._get_stats()))
 
 
 if __name__ == "__main__":
@@ -21,6 +21,8 @@ ARCHER_ACTION_CREATE_ATTACHMENT = "create_attachment"
 ARCHER_ACTION_GET_REPORT = "get_report"
 ARCHER_ACTION_ASSIGN_TICKET = "assign_ticket"
 ARCHER_ACTION_ATTACH_ALERT = "attach_alert"
+ARCHER_ACTION_REFRESH_SCHEMA = "refresh_schema"
+ARCHER_ACTION_COUNT_TICKETS = "count_tickets"
 ARCHER_SESSION_TOKEN = "session_token"
 ARCHER_INVALID_SESSION_TOKEN_MSG = ["Invalid session token", "Unable to validate session"]
 
@@ -30,6 +32,7 @@ ARCHER_SORT_TYPE_ASCENDING = "Ascending"
 ARCHER_SORT_TYPE_DESCENDING = "Descending"
 
 ARCHER_LAST_RECORD_FILE = "last_record_{}.txt"
+ARCHER_SCHEMA_CACHE_FILE = "{}_schema_cache.json"
 ARCHER_ENCRYPT_TOKEN = "Encrypting the {} token"
 ARCHER_DECRYPT_TOKEN = "Decrypting the {} token"
 
@@ -42,6 +45,8 @@ ARCHER_ERR_NON_DICT = "Non-dict map: {}"
 ARCHER_ERR_ACTION_EXECUTION = "Error occurred during execution of archer action: {} and the error is: {}"
 ARCHER_ERR_VALID_INTEGER = "Please provide a valid integer value in the {}"
 ARCHER_ERR_NON_NEGATIVE = "Please provide a valid non-negative integer value in the {}"
+ARCHER_ERR_EXPORT_FORMAT = "Please provide a valid value for export_format from {}"
+ARCHER_ERR_VAULT_ADD = "Failed to add the exported records to the vault: {}"
 
 ARCHER_XPATH_AUTH = "/soap:Envelope/soap:Body/dummy:CreateUserSessionFromInstanceResponse/dummy:CreateUserSessionFromInstanceResult"
 ARCHER_XPATH_DOMAIN_USER_AUTH = (
@@ -60,3 +65,37 @@ ARCHER_XPATH_GROUP = "/soap:Envelope/soap:Body/dummy:LookupGroupResponse/dummy:L
 ARCHER_INVALID_JSON = "Invalid JSON string. Must be a dictionary containing key-value pairs"
 
 DEFAULT_TIMEOUT = 30
+# Seconds to wait for Archer to answer each pooled request; 0 waits as long as
+# it takes, since large report pages can take minutes to build
+DEFAULT_REQUEST_TIMEOUT = 0
+# Seconds to wait for a new connection to Archer to open
+DEFAULT_CONNECT_TIMEOUT = 30
+DEFAULT_POOL_CONNECTIONS = 2
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_SCHEMA_CACHE_TTL = 3600
+DEFAULT_SCHEMA_CACHE_MAX_ENTRIES = 4096
+# Upper bounds in seconds for kinds of metadata that change more often than
+# the application/field layout; kinds not listed use the configured TTL
+SCHEMA_CACHE_KIND_TTLS = {
+    "valueslist": 900,
+    "content_field": 900,
+    "user": 900,
+    "group": 900,
+    "domain_user": 900,
+    "users": 900,
+    "groups": 900,
+    "references": 300,
+}
+# Seconds to remember that a user/group name didn't resolve
+DIRECTORY_MISS_TTL = 300
+DEFAULT_DIRECTORY_WORKERS = 8
+DEFAULT_SEARCH_WORKERS = 4
+# Report pages fetched ahead of the one being parsed and merged
+DEFAULT_REPORT_PREFETCH_PAGES = 2
+# Worker processes parsing report pages; 0 parses them in the action's process
+DEFAULT_PARSE_PROCESSES = 0
+
+# Records read at most while a results filter looks for max_results matches
+DEFAULT_MAX_SCANNED = 10000
+# Records of an export returned in the action result, next to the vault file
+DEFAULT_EXPORT_PREVIEW_RECORDS = 5
@@ -0,0 +1,113 @@
+# File: archer_directory.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Resolve user and group names for Users/Groups List fields, remembering
+hits and misses in the schema cache.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import archer_consts as consts
+
+
+def _name_index(entries, key):
+    """Returns {case-folded name: Id} for REST user or group listings, the
+    first entry of a name winning.
+    """
+    index = {}
+    for entry in entries or ():
+        if entry.get(key):
+            index.setdefault(entry[key].casefold(), entry["Id"])
+    return index
+
+
+class ArcherDirectory:
+    """Looks up Archer user and group IDs by name.
+
+    session, an ArcherAPISession: used for the SOAP lookups, the bulk REST
+        listings and its `schema_cache`
+    preload, a boolean: fetch every user and group once (two REST calls)
+        and answer from that index, matching names case-insensitively,
+        falling back to SOAP lookups on a miss
+    max_workers, an int: names resolved in parallel by resolve_many()
+    """
+
+    def __init__(self, session, preload=False, max_workers=consts.DEFAULT_DIRECTORY_WORKERS):
+        self.session = session
+        self.preload = preload
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._users_source = None
+        self._groups_source = None
+        self._users = {}
+        self._groups = {}
+
+    def _load_index(self):
+        """(Re)builds the preloaded user/group index from the cached listings."""
+        users = self.session.get_users()
+        groups = self.session.get_groups()
+        with self._lock:
+            if users is not self._users_source:
+                self._users = _name_index(users, "UserName")
+                self._users_source = users
+            if groups is not self._groups_source:
+                self._groups = _name_index(groups, "Name")
+                self._groups_source = groups
+
+    def _find_user(self, name):
+        if self.preload:
+            uid = self._users.get(name.casefold())
+            if uid:
+                return uid
+        return self.session.asoap.find_user(name)
+
+    def _find_group(self, name):
+        if self.preload:
+            gid = self._groups.get(name.casefold())
+            if gid:
+                return gid
+        return self.session.asoap.find_group(name)
+
+    def _lookup(self, kind, name, find):
+        cache = self.session.schema_cache
+        found, value = cache.get(kind, (name,))
+        if found:
+            return value
+        value = find(name)
+        cache.set(kind, (name,), value, ttl=None if value else consts.DIRECTORY_MISS_TTL)
+        return value
+
+    def resolve(self, name):
+        """Returns (user ID, group ID) for the given name, either of which
+        may be None.  Names that are neither a local user nor a group are
+        looked up as domain users.
+        """
+        uid = self._lookup("user", name, self._find_user)
+        gid = self._lookup("group", name, self._find_group)
+        if not uid and not gid:
+            uid = self._lookup("domain_user", name, self.session.asoap.find_domain_user)
+        return uid, gid
+
+    def resolve_many(self, names):
+        """Returns {name: (user ID, group ID)} for the given names, looking
+        up names missing from the cache in parallel.
+        """
+        names = list(dict.fromkeys(names))
+        if self.preload:
+            self._load_index()
+        if len(names) < 2 or self.max_workers < 2:
+            return {name: self.resolve(name) for name in names}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as executor:
+            return dict(zip(names, executor.map(self.resolve, names)))
@@ -0,0 +1,130 @@
+# File: archer_export.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Write Archer records to a JSONL or CSV file as they are fetched, so large
+results never have to be held in memory or stored in an action result.
+"""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+
+import archer_consts as consts
+from archer_records import CompactRecord, as_record_dict
+
+
+EXPORT_FORMATS = ("jsonl", "csv")
+
+# CSV columns for the record attributes, ahead of the field columns
+CSV_RECORD_COLUMNS = ("@contentId", "@levelId", "@moduleId", "@parentId")
+
+
+def _csv_row(record):
+    """Returns {column: text} for a record dict or CompactRecord: its
+    attributes, then one column per field name.
+    """
+    row = {k: record.get(k) for k in CSV_RECORD_COLUMNS}
+    if isinstance(record, CompactRecord):
+        texts = record.texts()
+    else:
+        texts = ((f.get("@name"), f.get("#text")) for f in record.get("Field") or ())
+    for name, text in texts:
+        if name is not None and name not in row:
+            row[name] = text
+    return row
+
+
+class RecordWriter:
+    """Writes records one at a time to `path`, keeping only a short preview
+    in memory.  Use as a context manager, or call close() once done.
+
+    JSONL has one record dict per line.  CSV has one row per record, with a
+    column per record attribute and per field name; columns are added as
+    new field names turn up, so rows are buffered in a temporary file next
+    to `path` and the header is written on close().
+
+    path, a string: the file to write
+    fmt, a string: "jsonl" or "csv"
+    preview_size, an int: records kept (as dicts) in `preview`
+    """
+
+    def __init__(self, path, fmt="jsonl", preview_size=consts.DEFAULT_EXPORT_PREVIEW_RECORDS):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}, expected one of {EXPORT_FORMATS}")
+        self.path = path
+        self.fmt = fmt
+        self.preview_size = preview_size
+        self.preview = []
+        self.count = 0
+        self._columns = {}
+        if fmt == "csv":
+            fd, self._body_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".archer_export_")
+            self._file = os.fdopen(fd, "w", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._file)
+        else:
+            self._body_path = None
+            self._file = open(path, "w", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, record):
+        """Writes one record, a dict or an archer_records.CompactRecord."""
+        as_dict = None
+        if self.fmt == "csv":
+            row = _csv_row(record)
+            for column in row:
+                self._columns.setdefault(column, len(self._columns))
+            values = [""] * len(self._columns)
+            for column, text in row.items():
+                values[self._columns[column]] = "" if text is None else text
+            self._csv.writerow(values)
+        else:
+            as_dict = as_record_dict(record)
+            self._file.write(json.dumps(as_dict))
+            self._file.write("\n")
+        if len(self.preview) < self.preview_size:
+            self.preview.append(as_dict or as_record_dict(record))
+        self.count += 1
+
+    def write_all(self, records):
+        """Writes every record of an iterable; returns how many were written."""
+        start = self.count
+        for record in records:
+            self.write(record)
+        return self.count - start
+
+    def close(self):
+        """Finishes the file; for CSV, writes the header and then the rows
+        buffered so far.  Rows written before a column turned up are
+        shorter than the header, which CSV readers take as empty values.
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if self._body_path is None:
+            return
+        try:
+            with open(self.path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(self._columns)
+                with open(self._body_path, newline="", encoding="utf-8") as body:
+                    shutil.copyfileobj(body, f)
+        finally:
+            os.remove(self._body_path)
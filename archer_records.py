@@ -0,0 +1,384 @@
+# File: archer_records.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Convert Archer record XML (as lxml elements) straight into the dict shape
+the app has always returned (`@attr`, `#text`, child tags as keys), without
+serializing the elements and re-parsing them with xmltodict.
+"""
+
+
+def element_to_dict(elem, force_list=("Field",)):
+    """Returns the xmltodict-style value of `elem`: a string (or None) for a
+    bare text element, otherwise a dict of `@`-prefixed attributes, child
+    elements by tag (repeated tags become lists) and `#text`.
+
+    Children whose tag is in `force_list` are always returned as a list.
+    """
+    attrib = elem.attrib
+    value = {"@" + k: v for k, v in attrib.items()} if attrib else {}
+    text = elem.text
+    if len(elem):
+        parts = [text] if text else []
+        for child in elem:
+            if child.tail:
+                parts.append(child.tail)
+            tag = child.tag
+            if not isinstance(tag, str):
+                # Comments and processing instructions
+                continue
+            child_value = element_to_dict(child, force_list)
+            if tag in value:
+                existing = value[tag]
+                if isinstance(existing, list):
+                    existing.append(child_value)
+                else:
+                    value[tag] = [existing, child_value]
+            elif tag in force_list:
+                value[tag] = [child_value]
+            else:
+                value[tag] = child_value
+        text = "".join(parts)
+
+    if text:
+        text = text.strip()
+    if not value:
+        return text or None
+    if text:
+        value["#text"] = text
+    return value
+
+
+def _as_list(value):
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _join_values(field, values):
+    """Sets `multi_value` and `#text` on `field` from the given display
+    values plus the field's own `@value`, dropping duplicates.
+    """
+    v = field.get("@value")
+    if v:
+        values.append(v)
+    field["multi_value"] = list(dict.fromkeys(values))
+    field["#text"] = ", ".join(field["multi_value"])
+
+
+def _convert_field(field, field_names):
+    """Names one converted search `Field` dict from `field_names` and fills
+    in values list text.  Returns None for fields without a value, unless
+    they are values lists.
+    """
+    if not isinstance(field, dict):
+        return None
+    field_id = field.get("@id")
+    if field.get("#text"):
+        field["@name"] = field_names.get(int(field_id), field_id)
+        return field
+    if field.get("@type") == "4":
+        field["@name"] = field_names.get(int(field_id), field_id)
+        list_values = field.get("ListValues")
+        list_values = _as_list(list_values.get("ListValue") if isinstance(list_values, dict) else None)
+        if list_values:
+            _join_values(field, [x.get("#text", "") if isinstance(x, dict) else (x or "") for x in list_values])
+        else:
+            field["#text"] = None
+        return field
+    return None
+
+
+def user_display_name(user):
+    """Returns "First Middle Last" for a report `User` dict, skipping empty
+    name parts after the first.
+    """
+    name = user.get("@firstName", "")
+    for part in (user.get("@middleName", ""), user.get("@lastName", "")):
+        if part != "":
+            name = f"{name} {part}"
+    return name
+
+
+def _merge_values_list(field):
+    list_values = _as_list((field.get("ListValues") or {}).get("ListValue"))
+    if list_values:
+        _join_values(field, [x.get("#text", "") if isinstance(x, dict) else (x or "") for x in list_values])
+
+
+def _merge_users(field):
+    users = _as_list((field.get("Users") or {}).get("User"))
+    if users:
+        _join_values(field, [user_display_name(x) for x in users if isinstance(x, dict)])
+
+
+def _merge_reference(field):
+    references = _as_list(field.get("Reference"))
+    field["#text"] = ", ".join(x.get("#text", "") if isinstance(x, dict) else x for x in references)
+
+
+# Report field types whose values are nested elements, by @type
+REPORT_FIELD_HANDLERS = {4: _merge_values_list, 8: _merge_users, 9: _merge_reference}
+
+
+class ReportFields:
+    """The field definitions of a report (from its page metadata), by ID,
+    so every record field is named with one dict lookup.
+
+    field_defs, a list: the report's `FieldDefinition` dicts
+    """
+
+    def __init__(self, field_defs):
+        self.by_id = {}
+        if isinstance(field_defs, dict):
+            field_defs = [field_defs]
+        for field_def in field_defs or ():
+            try:
+                field_id = int(field_def.get("@id"))
+            except (AttributeError, TypeError, ValueError):
+                continue
+            # The first definition of an ID wins, as in a scan
+            self.by_id.setdefault(field_id, (str(field_def.get("@name")), field_def.get("@type")))
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def merge(self, record, on_error=None):
+        """Names the fields of a report record dict in place and fills in the
+        text of values list, user and reference fields.  Returns how many
+        fields were named.  A field that can't be read gets a None name,
+        and is passed to `on_error` with the exception.
+        """
+        named = 0
+        by_id = self.by_id
+        for field in record["Field"]:
+            try:
+                name, def_type = by_id.get(int(field.get("@id")), (None, None))
+                field["@name"] = name
+                if name is not None:
+                    named += 1
+                handler = REPORT_FIELD_HANDLERS.get(int(field.get("@type") or def_type))
+                if handler is not None:
+                    handler(field)
+            except Exception as e:
+                if on_error is not None:
+                    on_error(field, e)
+                field["@name"] = None
+        return named
+
+
+def convert_search_record(elem, field_names):
+    """Converts an ExecuteSearch `Record` element into a record dict in one
+    pass, naming each field from `field_names` (id -> name) and keeping
+    only fields that carry a value or are values lists.
+    """
+    record = element_to_dict(elem)
+    if not isinstance(record, dict):
+        record = {}
+    fields = []
+    for field in record.get("Field", []):
+        field = _convert_field(field, field_names)
+        if field is not None:
+            fields.append(field)
+    record["Field"] = fields
+    return record
+
+
+def _blank(text):
+    return not text or text.isspace()
+
+
+def _leaf_dict(attrs, text):
+    """Returns what element_to_dict gives for a childless element."""
+    if not attrs:
+        return text
+    value = {"@" + k: v for k, v in attrs}
+    if text:
+        value["#text"] = text
+    return value
+
+
+class FieldTable:
+    """Field attributes, names and types shared by the compact records of
+    one search, so each record only holds its values.
+
+    field_names, a dict: {field ID: name} used to name the fields
+    """
+
+    def __init__(self, field_names):
+        self.field_names = field_names
+        self.positions = {}
+        self.attrs = []
+        self.names = []
+        self.types = []
+        self.values = []
+        self.list_texts = {}
+        self._shared = {}
+
+    def position(self, attrs):
+        """Returns the position of the field with the given attribute items,
+        adding it to the table the first time it is seen.
+        """
+        pos = self.positions.get(attrs)
+        if pos is None:
+            attrib = dict(attrs)
+            field_id = attrib["id"]
+            pos = self.positions[attrs] = len(self.attrs)
+            self.attrs.append(attrs)
+            self.names.append(self.field_names.get(int(field_id), field_id))
+            self.types.append(attrib.get("type"))
+            self.values.append(attrib.get("value"))
+        return pos
+
+    def list_value(self, pos, leaves):
+        """Returns a shared copy of the given values list value of the field
+        at `pos`, remembering its text.
+        """
+        key = (pos, leaves)
+        if key not in self.list_texts:
+            texts = [text or "" for attrs, text in leaves]
+            if self.values[pos]:
+                texts.append(self.values[pos])
+            self.list_texts[key] = ", ".join(dict.fromkeys(texts)) if leaves else None
+        return self._shared.setdefault(leaves, leaves)
+
+    def record_keys(self, keys):
+        """Returns a shared copy of the given tuple of record attribute names."""
+        return self._shared.setdefault(keys, keys)
+
+
+class CompactRecord:
+    """A search record held as a tuple of field values by their position in
+    a shared FieldTable.  A field's value is its text; for values lists, a
+    tuple of (attribute items, text) per ListValue, or None if the field
+    has no ListValues element.  to_dict() builds the usual record dict.
+    """
+
+    __slots__ = ("attrs", "keys", "positions", "table", "values")
+
+    def __init__(self, table, keys, attrs, positions, values):
+        self.table = table
+        self.keys = keys
+        self.attrs = attrs
+        self.positions = positions
+        self.values = values
+
+    def get(self, key, default=None):
+        """Returns a record attribute by its dict key, e.g. "@contentId"."""
+        if key.startswith("@"):
+            try:
+                return self.attrs[self.keys.index(key[1:])]
+            except ValueError:
+                pass
+        return default
+
+    def texts(self):
+        """Returns (field name, field text) for each field, as they appear
+        under "@name" and "#text" in to_dict().
+        """
+        names = self.table.names
+        list_texts = self.table.list_texts
+        return [
+            (names[pos], value if value is None or isinstance(value, str) else list_texts[pos, value])
+            for pos, value in zip(self.positions, self.values)
+        ]
+
+    def to_dict(self):
+        """Returns the record in the dict shape convert_search_record gives."""
+        table = self.table
+        record = {"@" + k: v for k, v in zip(self.keys, self.attrs)}
+        fields = []
+        for pos, value in zip(self.positions, self.values):
+            field = {"@" + k: v for k, v in table.attrs[pos]}
+            if isinstance(value, str):
+                field["#text"] = value
+                field["@name"] = table.names[pos]
+            elif value is None:
+                field["@name"] = table.names[pos]
+                field["#text"] = None
+            else:
+                leaves = [_leaf_dict(attrs, text) for attrs, text in value]
+                field["ListValues"] = {"ListValue": leaves[0] if len(leaves) == 1 else leaves} if leaves else None
+                field["@name"] = table.names[pos]
+                if leaves:
+                    _join_values(field, [text or "" for attrs, text in value])
+                else:
+                    field["#text"] = None
+            fields.append(field)
+        record["Field"] = fields
+        return record
+
+
+def _compact_list_values(field):
+    """Returns the compact value of a values list `Field` element, or False
+    if it holds anything the compact form can't reproduce.
+    """
+    if len(field) == 0:
+        return None
+    if len(field) > 1 or not _blank(field.text) or not _blank(field[0].tail):
+        return False
+    list_values = field[0]
+    if list_values.tag != "ListValues" or list_values.attrib or not _blank(list_values.text):
+        return False
+    leaves = []
+    for lv in list_values:
+        if lv.tag != "ListValue" or len(lv) or not _blank(lv.tail):
+            return False
+        text = lv.text.strip() if lv.text else lv.text
+        leaves.append((tuple(lv.attrib.items()), text or None))
+    return tuple(leaves)
+
+
+def convert_compact_record(elem, table):
+    """Converts an ExecuteSearch `Record` element into a CompactRecord whose
+    fields are described in `table`.  Records the compact form can't hold
+    exactly (nested elements other than values lists, mixed text) are
+    returned as dicts, as from convert_search_record.
+    """
+    if not _blank(elem.text):
+        return convert_search_record(elem, table.field_names)
+    positions = []
+    values = []
+    for field in elem:
+        if field.tag != "Field" or not _blank(field.tail):
+            return convert_search_record(elem, table.field_names)
+        attrib = field.attrib
+        if "id" not in attrib:
+            return convert_search_record(elem, table.field_names)
+        if len(field) == 0:
+            text = field.text.strip() if field.text else None
+            if not text and attrib.get("type") != "4":
+                continue
+            value = text or None
+        elif attrib.get("type") == "4":
+            value = _compact_list_values(field)
+            if value is False:
+                return convert_search_record(elem, table.field_names)
+        elif all(_blank(child.tail) for child in field) and _blank(field.text):
+            # Nested elements without text (e.g. cross-references) aren't returned
+            continue
+        else:
+            return convert_search_record(elem, table.field_names)
+        pos = table.position(tuple(attrib.items()))
+        positions.append(pos)
+        values.append(value if value is None or isinstance(value, str) else table.list_value(pos, value))
+    return CompactRecord(table, table.record_keys(tuple(elem.attrib.keys())), tuple(elem.attrib.values()), tuple(positions), tuple(values))
+
+
+def as_record_dict(record):
+    """Returns the dict form of a search record, compact or not."""
+    if isinstance(record, CompactRecord):
+        return record.to_dict()
+    return record
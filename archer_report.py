@@ -0,0 +1,220 @@
+# File: archer_report.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Fetch report pages ahead of the caller, so the next page is on its way
+and parsed as it streams in while the current one is merged, or optionally
+parse and merge pages in worker processes.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import archer_consts as consts
+from archer_records import ReportFields, element_to_dict
+from archer_soap import iter_soap_result
+
+
+_DONE = object()
+
+
+class ReportPager:
+    """Iterates over (page number, page result, error) for pages 1 to
+    `max_pages` of a report, fetching them in order on a background thread.
+    At most `depth` fetched pages wait in a bounded queue for the caller; a
+    page that failed to fetch comes with its exception and ends the pages.
+
+    Pages after the first are only fetched once the caller has called
+    stop_after(), so a report that fits on one page costs one request.
+
+    fetch, a callable: page number -> page result, e.g. fetch_report_page
+    max_pages, an int: the last page to fetch
+    depth, an int: pages fetched ahead of the one the caller works on
+    """
+
+    def __init__(self, fetch, max_pages, depth=consts.DEFAULT_REPORT_PREFETCH_PAGES):
+        self.fetch = fetch
+        self.last_page = max_pages
+        self.depth = depth
+        self.fetch_seconds = 0.0
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._planned = threading.Event()
+        self._thread = None
+
+    def stop_after(self, page):
+        """Stops fetching after the given page, e.g. once the caller knows
+        the later pages are empty or not needed, and lets pages after the
+        first be fetched.
+        """
+        self.last_page = min(self.last_page, page)
+        self._planned.set()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        page = 1
+        while page <= self.last_page and not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                item = (page, self.fetch(page), None)
+            except Exception as e:
+                item = (page, None, e)
+            self.fetch_seconds += time.perf_counter() - start
+            if not self._put(item) or item[2] is not None:
+                return
+            if page == 1:
+                self._planned.wait()
+            page += 1
+        self._put(_DONE)
+
+    def __iter__(self):
+        self._thread = threading.Thread(target=self._run, name="archer-report-pager", daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    return
+                yield item
+                if item[2] is not None:
+                    return
+        finally:
+            self.close()
+
+    def close(self):
+        """Stops fetching.  A fetch in progress finishes in the background
+        and its page is dropped.
+        """
+        self._stop.set()
+        self._planned.set()
+
+
+def read_report_page(elems, metadata=True):
+    """Converts one report page's top-level elements (see
+    ArcherSOAP.iter_report) as they are parsed.  Returns the page result:
+    the Records count attribute or None, the record dicts, the Metadata dict
+    ({} if there is none or `metadata` is False) and the seconds spent
+    converting.
+    """
+    records = []
+    meta = {}
+    records_count = None
+    parse_seconds = 0.0
+    for elem in elems:
+        start = time.perf_counter()
+        if elem.tag == "Record":
+            if not records:
+                records_count = elem.getparent().get("count")
+            records.append(element_to_dict(elem))
+        elif elem.tag == "Metadata" and metadata:
+            meta = element_to_dict(elem, force_list=("FieldDefinition",)) or {}
+        parse_seconds += time.perf_counter() - start
+    return {"status": "success", "records_count": records_count, "records": records, "metadata": meta, "parse_seconds": parse_seconds}
+
+
+def fetch_report_page(asoap, guid, page_number, metadata=True):
+    """Streams one page of the report with the given guid from Archer and
+    converts it as it comes in (see read_report_page).  Returns a failed
+    page result with Archer's message if the page could not be run.
+    """
+    faults = []
+    page = read_report_page(asoap.iter_report(guid, page_number, on_fault=faults.append), metadata)
+    if faults:
+        return {"status": "failed", "result": faults[0]}
+    return page
+
+
+def convert_report_response(data):
+    """Parses a raw SearchRecordsByReport response (see
+    ArcherSOAP.get_report_response) and merges the names of the page's own
+    field definitions into its records; runs in a worker process.  Returns
+    the page result as read_report_page() does, with the number of named
+    fields of each record under "named" and the messages of fields that
+    failed to merge under "errors".  A page without field definitions of
+    its own is left for the caller to merge.
+    """
+    faults = []
+    page = read_report_page(iter_soap_result("SearchRecordsByReport", data, ("Record", "Metadata"), on_fault=faults.append))
+    if faults:
+        return {"status": "failed", "result": faults[0]}
+    start = time.perf_counter()
+    errors = []
+    field_defs = (page["metadata"].get("FieldDefinitions") or {}).get("FieldDefinition")
+    if page["records"] and field_defs:
+        report_fields = ReportFields(field_defs)
+        page["named"] = [
+            report_fields.merge(record, lambda field, e: errors.append(f"Failed to parse {field}: {e}")) for record in page["records"]
+        ]
+    page.update(errors=errors, parse_seconds=page["parse_seconds"] + time.perf_counter() - start)
+    return page
+
+
+class ReportPageConverter:
+    """Runs convert_report_response() over raw report pages in a pool of
+    worker processes, keeping up to `processes` pages in flight.  The
+    workers are started when this is created, before any pager thread
+    exists to be copied into them.
+
+    processes, an int: worker processes, and pages converted at a time
+    """
+
+    def __init__(self, processes):
+        self.processes = processes
+        self._pool = ProcessPoolExecutor(max_workers=processes)
+        self._pool.submit(int).result()
+
+    def convert(self, pages):
+        """Yields the (page number, page result, error) items of a
+        ReportPager fetching raw pages, in page order, with each page
+        converted.  The first page is yielded as soon as it is converted, as
+        the caller needs it to plan the remaining pages before they are
+        fetched.
+        """
+        pending = deque()
+        try:
+            for page, data, error in pages:
+                future = self._pool.submit(convert_report_response, data) if error is None else None
+                pending.append((page, future, error))
+                if page == 1 or len(pending) > self.processes:
+                    yield self._converted(pending.popleft())
+            while pending:
+                yield self._converted(pending.popleft())
+        finally:
+            for _, future, _ in pending:
+                if future is not None:
+                    future.cancel()
+
+    @staticmethod
+    def _converted(item):
+        page, future, error = item
+        if error is not None:
+            return item
+        try:
+            return page, future.result(), None
+        except Exception as e:
+            return page, None, e
+
+    def close(self):
+        """Stops the workers; pages still waiting for one are dropped."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
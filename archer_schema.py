@@ -0,0 +1,283 @@
+# File: archer_schema.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Index Archer application and field definitions so names, aliases and IDs
+resolve with a dict lookup instead of a scan of the REST responses.
+"""
+
+
+class ArcherApplication:
+    """One Archer module/app from /api/core/system/application."""
+
+    __slots__ = ("alias", "id", "name")
+
+    def __init__(self, definition):
+        self.id = int(definition["Id"])
+        self.name = definition.get("Name")
+        self.alias = definition.get("Alias")
+
+
+class ArcherField:
+    """One field definition from /api/core/system/fielddefinition."""
+
+    __slots__ = ("alias", "definition", "id", "level_id", "name", "reference_field_id", "type", "values_list_id")
+
+    def __init__(self, definition):
+        self.definition = definition
+        self.id = int(definition["Id"])
+        self.name = definition.get("Name")
+        self.alias = definition.get("Alias")
+        self.type = int(definition["Type"])
+        self.level_id = definition.get("LevelId")
+        self.values_list_id = definition.get("RelatedValuesListId")
+        self.reference_field_id = definition.get("ReferencedFieldId")
+
+
+class ArcherLevelFields:
+    """The fields of one level, by ID and by name.
+
+    level_id, an int: the level these fields belong to
+    response, a list: the fielddefinition/level REST response
+    """
+
+    def __init__(self, level_id, response):
+        self.level_id = level_id
+        self.source = response
+        self.by_id = {}
+        self.by_name = {}
+        self.errors = []
+        self._name_maps = {}
+        for f in response:
+            try:
+                field = ArcherField(f["RequestedObject"])
+            except (KeyError, TypeError, ValueError) as e:
+                self.errors.append((f, e))
+                continue
+            self.by_id[field.id] = field
+            # Keep the first of any duplicate names, as a scan would
+            self.by_name.setdefault(field.name, field)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def get(self, name_or_id):
+        """Returns the field with the given name, or ID if given an int."""
+        if isinstance(name_or_id, int):
+            return self.by_id.get(name_or_id)
+        return self.by_name.get(name_or_id)
+
+    def name_map(self, excluded_names=(), skipped_types=()):
+        """Returns {field ID: field name} for every field whose (lowercase)
+        name isn't in `excluded_names` and whose type isn't in
+        `skipped_types`.  The result is shared between callers; don't
+        modify it.
+        """
+        key = (tuple(excluded_names), tuple(skipped_types))
+        names = self._name_maps.get(key)
+        if names is None:
+            names = self._name_maps[key] = {
+                f.id: f.name for f in self if (f.name or "").lower() not in excluded_names and f.type not in skipped_types
+            }
+        return names
+
+
+def _fold(value):
+    return str(value).casefold()
+
+
+class ArcherValuesList:
+    """Lookup index over the values of one values list.
+
+    Keys are case-folded, in order of precedence: Name and Alias, then
+    Description, then NumericValue and Id.  A requested value matches on
+    the first tier where it matches anything, so e.g. "1" picks the value
+    named "1" rather than also every value whose ID is 1.
+
+    vlid, an int: the values list's ID
+    response, a list: the values as returned by get_valueslist()
+    """
+
+    MATCH_TIERS = (("Name", "Alias"), ("Description",), ("NumericValue", "Id"))
+
+    def __init__(self, vlid, response):
+        self.vlid = vlid
+        self.source = response
+        self.ids = []
+        self.tiers = [{} for _ in self.MATCH_TIERS]
+        self.other_text = {}
+        for pos, value in enumerate(response):
+            self.ids.append(value["Id"])
+            keys = set()
+            for tier, fields in zip(self.tiers, self.MATCH_TIERS):
+                for f in fields:
+                    v = value.get(f)
+                    if v in (None, ""):
+                        continue
+                    key = _fold(v)
+                    keys.add(key)
+                    positions = tier.setdefault(key, [])
+                    if not positions or positions[-1] != pos:
+                        positions.append(pos)
+            if value.get("EnableOtherText"):
+                for key in keys:
+                    self.other_text.setdefault(key, value["Id"])
+
+    def find(self, requested):
+        """Returns the IDs of the values matching any of the requested
+        strings, in values list order.
+        """
+        positions = set()
+        for r in requested:
+            key = _fold(r)
+            for tier in self.tiers:
+                hits = tier.get(key)
+                if hits:
+                    positions.update(hits)
+                    break
+        return [self.ids[p] for p in sorted(positions)]
+
+    def find_other(self, name):
+        """Returns the ID of the "other text" value matching `name`, or None."""
+        return self.other_text.get(_fold(name))
+
+
+def reference_index(records):
+    """Returns [[Sequential ID, content ID], ...] for the records a
+    cross-reference field can link to, leaving out Sequential IDs shared
+    by several records, since they can't name a single record.  A list of
+    pairs, unlike a dict, keeps its int keys through the JSON schema cache.
+
+    records, a list: the records as returned by the referencefield REST call
+    """
+    by_sequential_id = {}
+    ambiguous = set()
+    for record in records or ():
+        seq = record.get("SequentialId")
+        if seq is None:
+            continue
+        if seq in by_sequential_id:
+            ambiguous.add(seq)
+        by_sequential_id[seq] = record.get("Id")
+    return [[seq, cid] for seq, cid in by_sequential_id.items() if seq not in ambiguous]
+
+
+class ArcherReferences:
+    """Content IDs of the records one cross-reference field can link to,
+    by Sequential ID.
+
+    field_id, an int: the cross-reference field's ID
+    response, a list: the pairs returned by reference_index()
+    """
+
+    def __init__(self, field_id, response):
+        self.field_id = field_id
+        self.source = response
+        self.by_sequential_id = dict(response or ())
+
+    def resolve(self, value):
+        """Returns the content ID of the record with the given Sequential
+        ID, or None.
+        """
+        return self.by_sequential_id.get(value)
+
+
+class ArcherSchema:
+    """Indexes over the application list and per-level field lists.
+
+    Each index remembers the response it was built from and is rebuilt only
+    when handed a different one, so it follows the session's schema cache:
+    while a response is served from the cache its index is reused, and once
+    the cache is refreshed the next lookup re-indexes the fresh response.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forgets every index, e.g. after the schema cache was refreshed."""
+        self._apps_source = None
+        self.apps_by_id = {}
+        self.apps_by_name = {}
+        self._levels = {}
+        self._values_lists = {}
+        self._references = {}
+
+    def applications(self, response):
+        """Indexes the given application list response (if it changed)."""
+        if response is self._apps_source:
+            return self
+        by_id = {}
+        by_name = {}
+        for a in response or ():
+            try:
+                app = ArcherApplication(a["RequestedObject"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            by_id[app.id] = app
+            # The first app whose name or alias matches wins, as in a scan
+            by_name.setdefault(app.name, app)
+            if app.alias:
+                by_name.setdefault(app.alias, app)
+        self.apps_by_id = by_id
+        self.apps_by_name = by_name
+        self._apps_source = response
+        return self
+
+    def get_application(self, name_or_id):
+        """Returns the application with the given name or alias, or ID if
+        given an int.
+        """
+        if isinstance(name_or_id, int):
+            return self.apps_by_id.get(name_or_id)
+        return self.apps_by_name.get(name_or_id)
+
+    def level_fields(self, level_id, response):
+        """Returns the field index for the given level, indexing the given
+        fielddefinition/level response if it changed.
+        """
+        level = self._levels.get(level_id)
+        if level is None or level.source is not response:
+            level = self._levels[level_id] = ArcherLevelFields(level_id, response)
+        return level
+
+    def values_list(self, vlid, response):
+        """Returns the lookup index for the given values list, indexing the
+        given response if it changed.
+        """
+        values = self._values_lists.get(vlid)
+        if values is None or values.source is not response:
+            values = self._values_lists[vlid] = ArcherValuesList(vlid, response)
+        return values
+
+    def references(self, field_id, response):
+        """Returns the reference index for the given cross-reference field,
+        indexing the given response if it changed.
+        """
+        refs = self._references.get(field_id)
+        if refs is None or refs.source is not response:
+            refs = self._references[field_id] = ArcherReferences(field_id, response)
+        return refs
+
+    def find_field(self, field_id):
+        """Returns the field with the given ID from any level indexed so far,
+        or None.
+        """
+        for level in self._levels.values():
+            field = level.by_id.get(field_id)
+            if field is not None:
+                return field
+        return None
@@ -0,0 +1,273 @@
+# File: archer_search.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Plan Archer searches: pick the filter condition that suits the searched
+field's type, so each search is issued once with the right condition.
+"""
+
+from archer_records import CompactRecord
+
+
+NUMERIC_FIELD_TYPES = (2, 6)
+DATE_FIELD_TYPES = (3, 21, 22)
+VALUES_LIST_FIELD_TYPES = (4,)
+
+DEFAULT_OPERATORS = {
+    "text": "Contains",
+    "numeric": "Equals",
+    "date": "Equals",
+    "valueslist": "Contains",
+}
+
+
+class SearchPlan:
+    """How to filter an ExecuteSearch on one field.
+
+    filter_type, a string: "text", "numeric", "date" or "valueslist"
+    operator, a string: the condition's Operator
+    value: the value to compare with (a list of value IDs for values lists)
+    reason, a string: why this condition was picked, for debug output
+    """
+
+    __slots__ = ("field_id", "filter_type", "operator", "reason", "value")
+
+    def __init__(self, field_id, filter_type, value, operator=None, reason=""):
+        self.field_id = field_id
+        self.filter_type = filter_type
+        self.operator = operator or DEFAULT_OPERATORS[filter_type]
+        self.value = value
+        self.reason = reason
+
+    def __repr__(self):
+        return f"SearchPlan(field={self.field_id}, {self.filter_type} {self.operator} {self.value!r}: {self.reason})"
+
+    def with_value(self, value, operator=None):
+        """Returns this plan comparing the field with another value, e.g. a
+        new polling watermark, without looking the field up again.
+        """
+        return SearchPlan(self.field_id, self.filter_type, value, operator, self.reason)
+
+
+def _as_number(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None  # Not NaN
+
+
+def plan_search(field_id, field_type, value, comparison=None, resolve_values=None):
+    """Returns the SearchPlan for filtering on the given field.
+
+    field_type, an int: the field's Archer type, or None if unknown
+    comparison, a string: operator to use instead of the type's default
+    resolve_values, a callable: maps a value to a list of values list value
+        IDs (or nothing), for values list fields
+    """
+    if field_type in NUMERIC_FIELD_TYPES:
+        number = _as_number(value)
+        if number is not None:
+            return SearchPlan(field_id, "numeric", number, comparison, f"type {field_type} field")
+        return SearchPlan(field_id, "text", value, comparison, f"non-numeric value for type {field_type} field")
+    if field_type in DATE_FIELD_TYPES:
+        return SearchPlan(field_id, "date", value, comparison, f"type {field_type} field")
+    if field_type in VALUES_LIST_FIELD_TYPES and resolve_values:
+        value_ids = resolve_values(value)
+        if value_ids:
+            return SearchPlan(field_id, "valueslist", value_ids, comparison, f"type {field_type} field")
+        return SearchPlan(field_id, "text", value, comparison, "value not found in the values list")
+    if field_type is None and comparison is not None and _as_number(value) is not None:
+        # No type to go on; an explicit comparison has always meant numeric
+        return SearchPlan(field_id, "numeric", _as_number(value), comparison, "unknown field type")
+    return SearchPlan(field_id, "text", value, comparison, f"type {field_type} field")
+
+
+class SearchCriteria:
+    """Search conditions (SearchPlans) or nested SearchCriteria joined by
+    one boolean operator, sent to Archer as a list of filter conditions
+    plus an OperatorLogic expression over their positions.
+
+    operator, a string: "AND" or "OR"
+    children, a list: SearchPlans and SearchCriteria
+    """
+
+    def __init__(self, operator, children):
+        self.operator = operator.upper()
+        self.children = [c for c in children if c is not None]
+
+    def __bool__(self):
+        return bool(self.children)
+
+    def __repr__(self):
+        return f"SearchCriteria({self.operator_logic()}: {self.conditions()})"
+
+    def conditions(self):
+        """Returns the SearchPlans in this tree, in OperatorLogic order."""
+        plans = []
+        for child in self.children:
+            if isinstance(child, SearchCriteria):
+                plans.extend(child.conditions())
+            else:
+                plans.append(child)
+        return plans
+
+    def operator_logic(self, start=1):
+        """Returns the OperatorLogic expression, e.g. "1 AND (2 OR 3)",
+        numbering conditions from `start`.
+        """
+        return self._logic(start)[0]
+
+    def _logic(self, position):
+        terms = []
+        for child in self.children:
+            if isinstance(child, SearchCriteria):
+                term, position = child._logic(position)
+                if len(child.children) > 1:
+                    term = f"({term})"
+            else:
+                term = str(position)
+                position += 1
+            terms.append(term)
+        return f" {self.operator} ".join(terms), position
+
+
+class SearchResults:
+    """The records of a search, iterated as they are fetched, and the total
+    number of records Archer says match it.
+
+    count, an int: set once the first page has been parsed; None before
+        that, or if Archer didn't report a count
+    """
+
+    def __init__(self):
+        self.count = None
+        self.records = iter(())
+
+    def __iter__(self):
+        return self.records
+
+    def close(self):
+        """Stops the search, e.g. once enough records were read; pages
+        still being fetched are dropped.
+        """
+        close = getattr(self.records, "close", None)
+        if close is not None:
+            close()
+
+
+# Field types whose text Archer compares the same way the results filter
+# does; anything else is filtered after the records are fetched
+TEXT_FILTER_FIELD_TYPES = (1,)
+
+
+def compile_results_filter(conditions, operator, equality, fields):
+    """Splits a results filter into the part Archer can evaluate and the
+    part that has to stay client-side.
+
+    conditions, a dict: field name -> value (results_filter_json)
+    operator, a string: "and" or "or"
+    equality, a string: "equals" or "contains"
+    fields, a dict: field name -> (field ID, field type) for the searched
+        application
+
+    Returns (SearchCriteria or None, dict of leftover conditions).  With
+    "or", either every condition is sent to Archer or none is.
+    """
+    comparison = "Equals" if equality == "equals" else "Contains"
+    pushed = []
+    leftover = {}
+    for name, value in conditions.items():
+        field_id, field_type = fields.get(name, (None, None))
+        plan = None
+        if field_id is not None and isinstance(value, str) and value:
+            if field_type in TEXT_FILTER_FIELD_TYPES:
+                plan = SearchPlan(field_id, "text", value, comparison, f"results filter on type {field_type} field")
+            elif field_type in NUMERIC_FIELD_TYPES and comparison == "Equals" and isinstance(_as_number(value), int):
+                plan = SearchPlan(field_id, "numeric", int(value), comparison, f"results filter on type {field_type} field")
+        if plan is None:
+            leftover[name] = value
+        else:
+            pushed.append(plan)
+    if operator == "or" and leftover:
+        return None, dict(conditions)
+    if not pushed:
+        return None, leftover
+    return SearchCriteria(operator, pushed), leftover
+
+
+def _filtered_texts(record, needles):
+    """Yields (field name, field text) for the fields of a record dict or an
+    archer_records.CompactRecord whose name is in `needles`.  Other fields
+    are skipped inside the loop, without building a pair for each.
+    """
+    if isinstance(record, CompactRecord):
+        for name, text in record.texts():
+            if name in needles:
+                yield name, text
+        return
+    for field in record.get("Field") or ():
+        name = field.get("@name")
+        if name in needles:
+            yield name, field.get("#text")
+
+
+def compile_record_filter(conditions, operator, equality):
+    """Returns a predicate that tells whether a record (a dict or a
+    CompactRecord) passes a results filter, checked on the client.
+
+    conditions, a dict: field name -> value (results_filter_json)
+    operator, a string: "and" (every condition) or "or" (any condition)
+    equality, a string: "equals" (whole value) or "contains" (substring),
+        both case-insensitive
+
+    Filter values are lower-cased once here; each record is scanned once,
+    stopping as soon as its outcome is known.
+    """
+    # Values that aren't strings can't match any field text
+    needles = {name: value.lower() for name, value in conditions.items() if isinstance(value, str)}
+    exact = equality == "equals"
+
+    if operator != "and":
+
+        def any_match(record):
+            for name, text in _filtered_texts(record, needles):
+                needle = needles[name]
+                # Empty values have never matched an "or" filter
+                if text and isinstance(text, str) and (text.lower() == needle if exact else needle in text.lower()):
+                    return True
+            return False
+
+        return any_match
+
+    if len(needles) < len(conditions):
+        return lambda record: False
+    wanted = len(needles)
+
+    def all_match(record):
+        matched = set()
+        for name, text in _filtered_texts(record, needles):
+            if name in matched:
+                continue
+            needle = needles[name]
+            if isinstance(text, str) and (text.lower() == needle if exact else needle in text.lower()):
+                matched.add(name)
+                if len(matched) == wanted:
+                    return True
+        return not wanted
+
+    return all_match
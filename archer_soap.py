@@ -12,13 +12,15 @@
 # the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
 # either express or implied. See the License for the specific language governing permissions
 # and limitations under the License.
-from io import BytesIO
+import re
+import threading
+from xml.sax.saxutils import escape
 
-import requests
 from bs4 import UnicodeDammit
 from lxml import etree
 
 import archer_consts
+from archer_transport import ArcherTransport
 
 
 SOAPNS = "http://schemas.xmlsoap.org/soap/envelope/"
@@ -40,30 +42,357 @@ ALL_NS_MAP = NS_MAP.copy()
 ALL_NS_MAP["dummy"] = ARCHERNS
 
 DEBUG = False
-MAX_XML_RESPONSE_BYTES = 10 * 1024 * 1024
+MIB = 1024 * 1024
+MAX_XML_RESPONSE_BYTES = 10 * MIB
+# Search pages are parsed as they stream in, envelope and result alike, and
+# never held whole, so they may be larger
+MAX_STREAMED_XML_RESPONSE_BYTES = 256 * MIB
+XML_CHUNK_SIZE = 64 * 1024
+DOCTYPE_TAG = b"<!DOCTYPE"
+DOCTYPE_RE = re.compile(re.escape(DOCTYPE_TAG), re.IGNORECASE)
+
+_local = threading.local()
+
+# ExecuteSearch condition element for each search filter type
+FILTER_CONDITIONS = {
+    "text": "TextFilterCondition",
+    "numeric": "NumericFilterCondition",
+    "date": "DateComparisonFilterCondition",
+    "valueslist": "ValueListFilterCondition",
+}
 
+SOAP_ENVELOPE_HEAD = f'<soap:Envelope xmlns:soap="{SOAPNS}" xmlns:xsi="{XSINS}" xmlns:xsd="{XSDNS}"><soap:Body>'
+SOAP_ENVELOPE_TAIL = "</soap:Body></soap:Envelope>"
+# Escaped like lxml's serializer: a bare CR would be read back as LF, and
+# non-ASCII text is sent as character references
+TEXT_ENTITIES = {"\r": "&#13;"}
+
+
+class SoapOperation:
+    """A cached request template for one Archer web service operation.
+
+    The envelope is rendered once into a compact byte template with one
+    `%(param)s` slot per parameter, so a call only escapes and substitutes
+    its values.  The output is byte for byte what etree.tostring() gives
+    for the same request built as a tree.  The SOAPAction header and the XPath to the operation's
+    result element are built alongside it.
+    """
+
+    def __init__(self, name, service, params):
+        self.name = name
+        self.service = service
+        self.params = params
+        self.headers = {
+            "Content-Type": "text/xml; charset=utf-8",
+            "SOAPAction": f'"{ARCHERNS}{name}"',
+        }
+        body = "".join(f"<{p}>%({p})s</{p}>" for p in params)
+        self.template = f'{SOAP_ENVELOPE_HEAD}<{name} xmlns="{ARCHERNS}">{body}</{name}>{SOAP_ENVELOPE_TAIL}'.encode()
+        self.result = etree.XPath(f"/soap:Envelope/soap:Body/dummy:{name}Response/dummy:{name}Result", namespaces=ALL_NS_MAP)
+
+    def render(self, values):
+        args = {}
+        for p in self.params:
+            value = values.get(p)
+            if value is None:
+                value = ""
+            elif isinstance(value, bytes):
+                value = value.decode("utf-8")
+            args[p.encode()] = escape(str(value), TEXT_ENTITIES).encode("ascii", "xmlcharrefreplace")
+        return self.template % args
+
+
+SOAP_OPERATIONS = {
+    op.name: op
+    for op in (
+        SoapOperation("CreateUserSessionFromInstance", "/general.asmx", ("userName", "instanceName", "password")),
+        SoapOperation("CreateDomainUserSessionFromInstance", "/general.asmx", ("userName", "instanceName", "password", "usersDomain")),
+        SoapOperation("LookupGroup", "/accesscontrol.asmx", ("sessionToken", "keyword")),
+        SoapOperation("LookupUserId", "/accesscontrol.asmx", ("sessionToken", "username")),
+        SoapOperation("LookupDomainUserId", "/accesscontrol.asmx", ("sessionToken", "username", "usersDomain")),
+        SoapOperation("ExecuteSearch", "/search.asmx", ("sessionToken", "pageNumber", "searchOptions")),
+        SoapOperation("SearchRecordsByReport", "/search.asmx", ("sessionToken", "reportIdOrGuid", "pageNumber")),
+        SoapOperation("GetRecordById", "/record.asmx", ("sessionToken", "moduleId", "contentId")),
+        SoapOperation("UpdateRecord", "/record.asmx", ("sessionToken", "moduleId", "contentId", "fieldValues")),
+        SoapOperation("CreateRecord", "/record.asmx", ("sessionToken", "moduleId", "fieldValues")),
+    )
+}
 
-def parse_untrusted_xml(xml_data):
+XPATH_AUTH = etree.XPath(archer_consts.ARCHER_XPATH_AUTH, namespaces=ALL_NS_MAP)
+XPATH_DOMAIN_USER_AUTH = etree.XPath(archer_consts.ARCHER_XPATH_DOMAIN_USER_AUTH, namespaces=ALL_NS_MAP)
+XPATH_GROUP = etree.XPath(archer_consts.ARCHER_XPATH_GROUP, namespaces=ALL_NS_MAP)
+XPATH_GROUP_OTHER = etree.XPath(archer_consts.ARCHER_XPATH_GROUP_OTHER, namespaces=ALL_NS_MAP)
+XPATH_INNER_GROUP = etree.XPath("//*[local-name()='Group']")
+XPATH_INNER_GROUP_NAME = etree.XPath("./*[local-name()='Name']")
+XPATH_INNER_GROUP_ID = etree.XPath("./*[local-name()='Id']")
+
+
+def _get_parser(huge_tree=False):
+    """Returns this thread's reusable hardened parser.  Parsers are cheap to
+    reuse but not safe to share between threads.
+    """
+    parsers = getattr(_local, "parsers", None)
+    if parsers is None:
+        parsers = _local.parsers = {}
+    parser = parsers.get(huge_tree)
+    if parser is None:
+        parser = parsers[huge_tree] = etree.XMLParser(
+            resolve_entities=False,
+            no_network=True,
+            load_dtd=False,
+            huge_tree=huge_tree,
+        )
+    return parser
+
+
+class _ChunkChecker:
+    """Enforces `max_bytes` over a document fed in chunks, and rejects any
+    DTD, including one split between two chunks.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total = 0
+        self.tail = b""
+
+    def check(self, chunk):
+        self.total += len(chunk)
+        if self.total > self.max_bytes:
+            raise ValueError(f"Archer XML response exceeds the {self.max_bytes // MIB} MiB safety limit")
+        if DOCTYPE_RE.search(chunk) or DOCTYPE_RE.search(self.tail + chunk[: len(DOCTYPE_TAG)]):
+            raise ValueError("Archer XML responses must not contain a DTD")
+        self.tail = chunk[-len(DOCTYPE_TAG) :]
+        return chunk
+
+
+def _iter_checked_chunks(xml_data, max_bytes):
+    """Yields `xml_data` (bytes, str, or an iterable of byte chunks) in
+    chunks, enforcing `max_bytes` and rejecting any DTD along the way
+    without copying the whole buffer.
+    """
     if isinstance(xml_data, str):
         xml_data = xml_data.encode("utf-8")
-    if len(xml_data) > MAX_XML_RESPONSE_BYTES:
-        raise ValueError("Archer XML response exceeds the 10 MiB safety limit")
-    if b"<!DOCTYPE" in xml_data.upper():
+    if isinstance(xml_data, bytes):
+        if len(xml_data) > max_bytes:
+            raise ValueError(f"Archer XML response exceeds the {max_bytes // MIB} MiB safety limit")
+        chunks = (xml_data[i : i + XML_CHUNK_SIZE] for i in range(0, len(xml_data), XML_CHUNK_SIZE))
+    else:
+        chunks = xml_data
+    checker = _ChunkChecker(max_bytes)
+    for chunk in chunks:
+        if chunk:
+            yield checker.check(chunk)
+
+
+def parse_untrusted_xml(xml_data, max_bytes=MAX_XML_RESPONSE_BYTES):
+    parser = _get_parser(huge_tree=max_bytes > MAX_XML_RESPONSE_BYTES)
+    try:
+        for chunk in _iter_checked_chunks(xml_data, max_bytes):
+            parser.feed(chunk)
+    except Exception:
+        # Reset the reusable parser before handing the error back
+        try:
+            parser.close()
+        except Exception:
+            pass
+        raise
+    document = parser.close().getroottree()
+    if document.docinfo.doctype:
         raise ValueError("Archer XML responses must not contain a DTD")
-    parser = etree.XMLParser(
+    return document
+
+
+def iter_untrusted_xml(xml_data, tag=None, max_bytes=MAX_STREAMED_XML_RESPONSE_BYTES, clear=True):
+    """Incrementally parses an untrusted Archer XML document and yields each
+    child of its root element (e.g. every top-level `Record`) as soon as it
+    is complete.  Passing the expected child `tag` (or tuple of tags) lets
+    the parser skip everything else without a Python round trip.
+
+    With `clear`, a yielded element is emptied and detached once the caller
+    asks for the next one, so memory stays flat however large the document
+    is; callers that keep elements around must pass clear=False.
+    """
+    parser = etree.XMLPullParser(
+        events=("end",),
+        tag=tag,
         resolve_entities=False,
         no_network=True,
         load_dtd=False,
-        huge_tree=False,
+        huge_tree=True,
     )
-    document = etree.parse(BytesIO(xml_data), parser=parser)
-    if document.docinfo.doctype:
+    for chunk in _iter_checked_chunks(xml_data, max_bytes):
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            parent = elem.getparent()
+            # Only direct children of the root; nested records stay with their field
+            if parent is None or parent.getparent() is not None:
+                continue
+            yield elem
+            if clear:
+                elem.clear(keep_tail=True)
+                while elem.getprevious() is not None:
+                    del parent[0]
+    root = parser.close()
+    if root.getroottree().docinfo.doctype:
         raise ValueError("Archer XML responses must not contain a DTD")
-    return document
+
+
+def _has_invalid_session_msg(text):
+    return any(msg in text for msg in archer_consts.ARCHER_INVALID_SESSION_TOKEN_MSG)
+
+
+_INVALID_SESSION_MSGS = tuple(msg.encode("utf-8") for msg in archer_consts.ARCHER_INVALID_SESSION_TOKEN_MSG)
+
+# Characters kept between text pieces, so a message split across two is found
+_SESSION_MSG_OVERLAP = max(len(msg) for msg in archer_consts.ARCHER_INVALID_SESSION_TOKEN_MSG) - 1
+
+
+class _StreamedResult:
+    """Parser target for a SOAP response whose result element holds an
+    escaped XML document.  The result's text is handed over piece by piece
+    as the envelope is decoded, and take() feeds it to a pull parser for
+    the inner document, so neither document is ever held whole.  Every
+    text of the response is also checked for an invalid session message,
+    and a SOAP fault's message is kept in `fault`.
+
+    result_tag, a string: the qualified tag of the result element
+    tag, a string: the inner root's children to report, e.g. "Record"
+    max_bytes, an int: size limit for the inner document
+    """
+
+    def __init__(self, result_tag, tag, max_bytes):
+        self.result_tag = result_tag
+        self.inner = etree.XMLPullParser(
+            events=("end",),
+            tag=tag,
+            resolve_entities=False,
+            no_network=True,
+            load_dtd=False,
+            huge_tree=True,
+        )
+        self.checker = _ChunkChecker(max_bytes)
+        self.seen_result = False
+        self.has_result = False
+        self.invalid_session = False
+        self.fault = None
+        self.root = None
+        self._in_result = False
+        self._in_fault = False
+        self._pieces = []
+        self._tail = ""
+
+    def start(self, tag, attrib):
+        if tag == self.result_tag:
+            self._in_result = self.seen_result = True
+        elif tag.rpartition("}")[2] == "faultstring":
+            self._in_fault = True
+            self.fault = ""
+
+    def end(self, tag):
+        if tag == self.result_tag:
+            self._in_result = False
+        elif self._in_fault:
+            self._in_fault = False
+
+    def data(self, text):
+        if self._in_result:
+            self._pieces.append(text)
+            return
+        if self._in_fault:
+            self.fault += text
+        if _has_invalid_session_msg(text):
+            self.invalid_session = True
+
+    def close(self):
+        return None
+
+    def take(self):
+        """Feeds the result text decoded so far to the inner parser and
+        returns the elements it completed.
+        """
+        if not self._pieces:
+            return []
+        text = "".join(self._pieces)
+        self._pieces = []
+        if _has_invalid_session_msg(self._tail + text):
+            self.invalid_session = True
+        self._tail = text[-_SESSION_MSG_OVERLAP:]
+        if not self.has_result and not text.strip():
+            return []
+        self.has_result = True
+        self.inner.feed(self.checker.check(text.encode("utf-8")))
+        return [elem for _, elem in self.inner.read_events()]
+
+    def finish(self):
+        """Sets and returns the inner document's root, or None if the
+        result was empty.
+        """
+        if not self.has_result:
+            return None
+        root = self.inner.close()
+        if root.getroottree().docinfo.doctype:
+            raise ValueError("Archer XML responses must not contain a DTD")
+        self.root = root
+        return root
+
+
+def _iter_streamed_result(target, chunks, clear=True, stop_on_invalid_session=False):
+    """Feeds a SOAP response's `chunks` to a parser for the given
+    _StreamedResult and yields each child of the inner document's root as
+    soon as it is complete.  Unless `clear` is False, a yielded element is
+    emptied once the caller asks for the next one.
+
+    With `stop_on_invalid_session`, stops without reading further once an
+    invalid session message is seen before anything was yielded, so the
+    request can be sent again; otherwise the target's root is set at the end.
+    """
+    parser = etree.XMLParser(target=target, resolve_entities=False, no_network=True, load_dtd=False, huge_tree=True)
+    yielded = False
+    for chunk in _iter_checked_chunks(chunks, MAX_STREAMED_XML_RESPONSE_BYTES):
+        parser.feed(chunk)
+        elems = target.take()
+        if stop_on_invalid_session and target.invalid_session and not yielded:
+            return
+        for elem in elems:
+            parent = elem.getparent()
+            # Only direct children of the root; nested records stay with their field
+            if parent is None or parent.getparent() is not None:
+                continue
+            yielded = True
+            yield elem
+            if clear:
+                elem.clear(keep_tail=True)
+                while elem.getprevious() is not None:
+                    del parent[0]
+    parser.close()
+    target.finish()
+
+
+def iter_soap_result(operation, data, tag, on_fault=None):
+    """Parses a whole response of the named operation (e.g. from
+    ArcherSOAP.get_report_response) the way a streamed one is parsed, and
+    yields each `tag` child of the XML document escaped in its result; e.g.
+    in a worker process.
+
+    on_fault, a callable: called at the end with the SOAP fault's message
+        if the response had no result element
+    """
+    target = _StreamedResult(f"{{{ARCHERNS}}}{operation}Result", tag, MAX_STREAMED_XML_RESPONSE_BYTES)
+    yield from _iter_streamed_result(target, data)
+    if on_fault is not None and not target.seen_result:
+        on_fault(target.fault or f"Unable to find {operation}Result")
+
+
+def _records_count(records):
+    """Returns the `count` attribute of a `Records` element as an int, or None."""
+    try:
+        return int(records.get("count"))
+    except (TypeError, ValueError):
+        return None
 
 
 class ArcherSOAP:
-    def __init__(self, host, username, password, instance, verify_cert=True, usersDomain=None, conn_obj=None):
+    def __init__(self, host, username, password, instance, verify_cert=True, usersDomain=None, conn_obj=None, transport=None):
         self.base_uri = host + "/ws"
         self.username = username
         self.password = password
@@ -71,45 +400,30 @@ class ArcherSOAP:
         self.verify_cert = verify_cert
         self.users_domain = usersDomain
         self.conn_obj = conn_obj
+        self.transport = transport or ArcherTransport(verify=verify_cert)
         if not self.conn_obj.sessionToken:
             self._authenticate()
 
     def _authenticate(self):
-        doc, body = self._generate_xml_stub()
-
         if self.users_domain:
             return self._domain_user_authenticate()
 
-        n = etree.SubElement(body, "CreateUserSessionFromInstance", nsmap=ARCHER_MAP)
-        un = etree.SubElement(n, "userName")
-        un.text = self.username
-        inn = etree.SubElement(n, "instanceName")
-        inn.text = self.instance
-        p = etree.SubElement(n, "password")
-        p.text = self.password
-        sess_doc = self._do_request(self.base_uri + "/general.asmx", doc)
-        sess_root = sess_doc.getroot()
-        result = sess_root.xpath(archer_consts.ARCHER_XPATH_AUTH, namespaces=ALL_NS_MAP)
+        sess_doc = self._do_request(
+            "CreateUserSessionFromInstance",
+            {"userName": self.username, "instanceName": self.instance, "password": self.password},
+        )
+        result = XPATH_AUTH(sess_doc)
         if result:
             self.conn_obj.sessionToken = result[0].text
             return
         raise Exception("Failed to authenticate to Archer web services")
 
     def _domain_user_authenticate(self):
-        doc, body = self._generate_xml_stub()
-
-        n = etree.SubElement(body, "CreateDomainUserSessionFromInstance", nsmap=ARCHER_MAP)
-        un = etree.SubElement(n, "userName")
-        un.text = self.username
-        inn = etree.SubElement(n, "instanceName")
-        inn.text = self.instance
-        p = etree.SubElement(n, "password")
-        p.text = self.password
-        p = etree.SubElement(n, "usersDomain")
-        p.text = self.users_domain
-        sess_doc = self._do_request(self.base_uri + "/general.asmx", doc)
-        sess_root = sess_doc.getroot()
-        result = sess_root.xpath(archer_consts.ARCHER_XPATH_DOMAIN_USER_AUTH, namespaces=ALL_NS_MAP)
+        sess_doc = self._do_request(
+            "CreateDomainUserSessionFromInstance",
+            {"userName": self.username, "instanceName": self.instance, "password": self.password, "usersDomain": self.users_domain},
+        )
+        result = XPATH_DOMAIN_USER_AUTH(sess_doc)
         if result:
             self.conn_obj.sessionToken = result[0].text
             return
@@ -118,26 +432,19 @@ class ArcherSOAP:
     def find_group(self, groupname):
         if not self.conn_obj.sessionToken:
             raise Exception("No session")
-        doc, body = self._generate_xml_stub()
-        lu = etree.SubElement(body, "LookupGroup", nsmap=ARCHER_MAP)
-        to = etree.SubElement(lu, "sessionToken")
-        to.text = self.conn_obj.sessionToken
-        u = etree.SubElement(lu, "keyword")
-        u.text = groupname
-        resp_doc = self._do_request(self.base_uri + "/accesscontrol.asmx", doc)
-        resp_root = resp_doc.getroot()
-        result = resp_root.xpath(archer_consts.ARCHER_XPATH_GROUP, namespaces=ALL_NS_MAP)
+        resp_doc = self._do_request("LookupGroup", {"keyword": groupname})
+        result = XPATH_GROUP(resp_doc)
         for name_element in result:
             if name_element.text == groupname:
                 for node in name_element.itersiblings(tag="Id"):
                     return int(node.text)
 
-        result = resp_root.xpath(archer_consts.ARCHER_XPATH_GROUP_OTHER, namespaces=ALL_NS_MAP)
+        result = XPATH_GROUP_OTHER(resp_doc)
         if result and result[0].text:
             inner_document = parse_untrusted_xml(result[0].text)
-            for group in inner_document.xpath("//*[local-name()='Group']"):
-                names = group.xpath("./*[local-name()='Name']")
-                identifiers = group.xpath("./*[local-name()='Id']")
+            for group in XPATH_INNER_GROUP(inner_document):
+                names = XPATH_INNER_GROUP_NAME(group)
+                identifiers = XPATH_INNER_GROUP_ID(group)
                 if names and identifiers and names[0].text == groupname:
                     return int(identifiers[0].text)
 
@@ -146,15 +453,8 @@ class ArcherSOAP:
     def find_user(self, username):
         if not self.conn_obj.sessionToken:
             raise Exception("No session")
-        doc, body = self._generate_xml_stub()
-        lu = etree.SubElement(body, "LookupUserId", nsmap=ARCHER_MAP)
-        to = etree.SubElement(lu, "sessionToken")
-        to.text = self.conn_obj.sessionToken
-        u = etree.SubElement(lu, "username")
-        u.text = username
-        resp_doc = self._do_request(self.base_uri + "/accesscontrol.asmx", doc)
-        resp_root = resp_doc.getroot()
-        result = resp_root.xpath("/soap:Envelope/soap:Body/dummy:LookupUserIdResponse/dummy:LookupUserIdResult", namespaces=ALL_NS_MAP)
+        op = SOAP_OPERATIONS["LookupUserId"]
+        result = op.result(self._do_request(op.name, {"username": username}))
         if result:
             return int(result[0].text)
         return
@@ -162,40 +462,45 @@ class ArcherSOAP:
     def find_domain_user(self, username):
         if not self.conn_obj.sessionToken:
             raise Exception("No session")
-        doc, body = self._generate_xml_stub()
-        lu = etree.SubElement(body, "LookupDomainUserId", nsmap=ARCHER_MAP)
-        to = etree.SubElement(lu, "sessionToken")
-        to.text = self.conn_obj.sessionToken
-        u = etree.SubElement(lu, "username")
-        u.text = username
-        u = etree.SubElement(lu, "usersDomain")
-        u.text = self.users_domain
-        resp_doc = self._do_request(self.base_uri + "/accesscontrol.asmx", doc)
-        resp_root = resp_doc.getroot()
-        result = resp_root.xpath(
-            "/soap:Envelope/soap:Body/dummy:LookupDomainUserIdResponse/dummy:LookupDomainUserIdResult", namespaces=ALL_NS_MAP
-        )
+        op = SOAP_OPERATIONS["LookupDomainUserId"]
+        result = op.result(self._do_request(op.name, {"username": username, "usersDomain": self.users_domain}))
         if result:
             return int(result[0].text)
         return
 
-    def find_records(
-        self, mod_id, mod_name, key_id, key_name, value, filter_type="text", max_count=1000, fields=None, comparison="Equals", sort=None, page=1
+    def iter_records(
+        self,
+        mod_id,
+        mod_name,
+        key_id,
+        key_name,
+        value,
+        filter_type="text",
+        max_count=1000,
+        fields=None,
+        comparison="Equals",
+        sort=None,
+        page=1,
+        clear=True,
+        criteria=None,
+        on_count=None,
     ):
+        """Runs an ExecuteSearch and yields each `Record` element of the
+        result page as it is parsed.  Unless `clear` is False, each element
+        is emptied once the caller moves on to the next one.
+
+        criteria, an archer_search.SearchCriteria: filter on these
+            conditions instead of `key_id` and `value`
+        on_count, a callable: called with the total number of matching
+            records (the `count` of the result's `Records` element, None if
+            missing) before the first record is yielded
+        """
         if not self.conn_obj.sessionToken:
             raise Exception("No session")
         if fields is None:
             fields = {key_id: key_name}
-        doc, body = self._generate_xml_stub()
-        se = etree.SubElement(body, "ExecuteSearch", nsmap=ARCHER_MAP)
-        to = etree.SubElement(se, "sessionToken")
-        to.text = self.conn_obj.sessionToken
-        pn = etree.SubElement(se, "pageNumber")
-        pn.text = str(page)
-        so = etree.SubElement(se, "searchOptions")
 
         sr = etree.Element("SearchReport")
-        report_doc = etree.ElementTree(sr)
 
         ps = etree.SubElement(sr, "PageSize")
         ps.text = str(max_count)
@@ -206,26 +511,17 @@ class ArcherSOAP:
             df.set("name", UnicodeDammit(field_name).unicode_markup.encode("ascii", "xmlcharrefreplace"))
 
         cr = etree.SubElement(sr, "Criteria")
-        if not comparison:
-            if filter_type == "numeric":
-                comparison = "Equals"
-            else:
-                comparison = "Contains"
-        if value is not None and value != "":
+        if criteria:
             fi = etree.SubElement(cr, "Filter")
             co = etree.SubElement(fi, "Conditions")
-            if filter_type == "numeric":
-                fc = etree.SubElement(co, "NumericFilterCondition")
-                op = etree.SubElement(fc, "Operator")
-                op.text = comparison
-            else:
-                fc = etree.SubElement(co, "TextFilterCondition")
-                op = etree.SubElement(fc, "Operator")
-                op.text = comparison
-            fi = etree.SubElement(fc, "Field")
-            fi.text = str(key_id)
-            v = etree.SubElement(fc, "Value")
-            v.text = str(value)
+            for plan in criteria.conditions():
+                self._add_condition(co, plan.field_id, plan.filter_type, plan.value, plan.operator)
+            ol = etree.SubElement(fi, "OperatorLogic")
+            ol.text = criteria.operator_logic()
+        elif value is not None and value != "":
+            fi = etree.SubElement(cr, "Filter")
+            co = etree.SubElement(fi, "Conditions")
+            self._add_condition(co, key_id, filter_type, value, comparison)
 
         mc = etree.SubElement(cr, "ModuleCriteria")
         m = etree.SubElement(mc, "Module")
@@ -239,31 +535,72 @@ class ArcherSOAP:
         m.set("name", mod_name)
         m.text = str(mod_id)
 
-        so.text = etree.tostring(report_doc, pretty_print=True)
+        counted = on_count is None
 
-        resp_doc = self._do_request(self.base_uri + "/search.asmx", doc)
+        def on_root(root):
+            # No records on this page (or no result at all); count from the root
+            if not counted:
+                on_count(None if root is None else _records_count(root))
 
-        resp_root = resp_doc.getroot()
-        result = resp_root.xpath("/soap:Envelope/soap:Body/dummy:ExecuteSearchResponse/dummy:ExecuteSearchResult", namespaces=ALL_NS_MAP)
+        values = {"pageNumber": page, "searchOptions": etree.tostring(sr)}
+        for elem in self._stream_result("ExecuteSearch", values, "Record", clear=clear, on_root=on_root):
+            if not counted:
+                counted = True
+                on_count(_records_count(elem.getparent()))
+            yield elem
 
-        if not result:
-            return []
+    def _add_condition(self, conditions, field_id, filter_type, value, comparison=None):
+        """Appends the search filter condition for one field to the given
+        `Conditions` element.
+        """
+        if not comparison:
+            if filter_type in ("numeric", "date"):
+                comparison = "Equals"
+            else:
+                comparison = "Contains"
+        fc = etree.SubElement(conditions, FILTER_CONDITIONS.get(filter_type, "TextFilterCondition"))
+        op = etree.SubElement(fc, "Operator")
+        op.text = comparison
+        fi = etree.SubElement(fc, "Field")
+        fi.text = str(field_id)
+        if filter_type == "valueslist":
+            ns = etree.SubElement(fc, "IsNoSelectionIncluded")
+            ns.text = "False"
+            vs = etree.SubElement(fc, "Values")
+            for value_id in value if isinstance(value, list) else [value]:
+                v = etree.SubElement(vs, "Value")
+                v.text = str(value_id)
+        else:
+            v = etree.SubElement(fc, "Value")
+            v.text = str(value)
+            if filter_type == "date":
+                ti = etree.SubElement(fc, "IsTimeIncluded")
+                ti.text = "True" if ":" in str(value) else "False"
 
-        search_result = parse_untrusted_xml(result[0].text)
-        return search_result.xpath("/Records/Record")
+    def find_records(
+        self,
+        mod_id,
+        mod_name,
+        key_id,
+        key_name,
+        value,
+        filter_type="text",
+        max_count=1000,
+        fields=None,
+        comparison="Equals",
+        sort=None,
+        page=1,
+        criteria=None,
+    ):
+        return list(
+            self.iter_records(
+                mod_id, mod_name, key_id, key_name, value, filter_type, max_count, fields, comparison, sort, page, clear=False, criteria=criteria
+            )
+        )
 
     def get_record(self, content_id, module_id):
-        doc, body = self._generate_xml_stub()
-        gr = etree.SubElement(body, "GetRecordById", nsmap=ARCHER_MAP)
-        to = etree.SubElement(gr, "sessionToken")
-        to.text = self.conn_obj.sessionToken
-        mi = etree.SubElement(gr, "moduleId")
-        mi.text = str(module_id)
-        ci = etree.SubElement(gr, "contentId")
-        ci.text = str(content_id)
-        resp_doc = self._do_request(self.base_uri + "/record.asmx", doc)
-        resp_root = resp_doc.getroot()
-        rec_xml = resp_root.xpath("/soap:Envelope/soap:Body/dummy:GetRecordByIdResponse/dummy:GetRecordByIdResult", namespaces=ALL_NS_MAP)
+        op = SOAP_OPERATIONS["GetRecordById"]
+        rec_xml = op.result(self._do_request(op.name, {"moduleId": module_id, "contentId": content_id}))
 
         return rec_xml[0].text
 
@@ -283,7 +620,7 @@ class ArcherSOAP:
         values = field["value"]
         o = None
         if isinstance(values, dict):
-            o = field.get("other_text")
+            o = values.get("other_text")
             values = values["value_id"]
 
         if isinstance(values, list):
@@ -337,30 +674,17 @@ class ArcherSOAP:
     def update_record(self, content_id, module_id, fields):
         type_formatter_map = self.get_field_map()
 
-        doc, body = self._generate_xml_stub()
-        gr = etree.SubElement(body, "UpdateRecord", nsmap=ARCHER_MAP)
-        to = etree.SubElement(gr, "sessionToken")
-        to.text = self.conn_obj.sessionToken
-        mi = etree.SubElement(gr, "moduleId")
-        mi.text = str(module_id)
-        ci = etree.SubElement(gr, "contentId")
-        ci.text = str(content_id)
-        fv = etree.SubElement(gr, "fieldValues")
-
         r = etree.Element("Records")
-        update_doc = etree.ElementTree(r)
         for field in fields:
             fn = type_formatter_map.get(field["type"])
             if not fn:
                 raise ValueError(f"Unsupported Archer field type {field['type']} for field {field['id']}")
             fn(field, r)
 
-        fv.text = etree.tostring(update_doc, pretty_print=True)
-
-        resp_doc = self._do_request(self.base_uri + "/record.asmx", doc)
+        op = SOAP_OPERATIONS["UpdateRecord"]
+        resp_doc = self._do_request(op.name, {"moduleId": module_id, "contentId": content_id, "fieldValues": etree.tostring(r)})
 
-        resp_root = resp_doc.getroot()
-        result = resp_root.xpath("/soap:Envelope/soap:Body/dummy:UpdateRecordResponse/dummy:UpdateRecordResult", namespaces=ALL_NS_MAP)
+        result = op.result(resp_doc)
         if result and len(result) > 0:
             try:
                 return int(result[0].text)
@@ -371,28 +695,17 @@ class ArcherSOAP:
     def create_record(self, moduleid, fields):
         type_formatter_map = self.get_field_map()
 
-        doc, body = self._generate_xml_stub()
-        gr = etree.SubElement(body, "CreateRecord", nsmap=ARCHER_MAP)
-        to = etree.SubElement(gr, "sessionToken")
-        to.text = self.conn_obj.sessionToken
-        mi = etree.SubElement(gr, "moduleId")
-        mi.text = str(moduleid)
-        fv = etree.SubElement(gr, "fieldValues")
-
         r = etree.Element("Record")
-        update_doc = etree.ElementTree(r)
         for field in fields:
             fn = type_formatter_map.get(field["type"])
             if not fn:
                 raise ValueError(f"Unsupported Archer field type {field['type']} for field {field['id']}")
             fn(field, r)
 
-        fv.text = etree.tostring(update_doc, pretty_print=True)
-
-        resp_doc = self._do_request(self.base_uri + "/record.asmx", doc)
+        op = SOAP_OPERATIONS["CreateRecord"]
+        resp_doc = self._do_request(op.name, {"moduleId": moduleid, "fieldValues": etree.tostring(r)})
 
-        resp_root = resp_doc.getroot()
-        result = resp_root.xpath("/soap:Envelope/soap:Body/dummy:CreateRecordResponse/dummy:CreateRecordResult", namespaces=ALL_NS_MAP)
+        result = op.result(resp_doc)
         if result and len(result) > 0:
             try:
                 return int(result[0].text)
@@ -400,56 +713,100 @@ class ArcherSOAP:
                 pass
         return False
 
-    def _generate_xml_stub(self):
-        envelope = etree.Element(etree.QName(SOAPNS, "Envelope"), nsmap=NS_MAP)
-        document = etree.ElementTree(envelope)
-        body = etree.SubElement(envelope, etree.QName(SOAPNS, "Body"))
-        return document, body
+    def iter_report(self, guid, page_number, on_fault=None):
+        """Runs a SearchRecordsByReport and yields each `Record` and
+        `Metadata` element of the report page as it is parsed, emptying
+        each one once the caller moves on to the next.
 
-    def get_report(self, guid, page_number):
+        on_fault, a callable: called with Archer's fault message, or a note
+            that the response had no result, if the page could not be run
+        """
         if not self.conn_obj.sessionToken:
             raise Exception("No session")
-        doc, body = self._generate_xml_stub()
-        gr = etree.SubElement(body, "SearchRecordsByReport", nsmap=ARCHER_MAP)
-        to = etree.SubElement(gr, "sessionToken")
-        to.text = self.conn_obj.sessionToken
-        gi = etree.SubElement(gr, "reportIdOrGuid")
-        gi.text = str(guid)
-        pn = etree.SubElement(gr, "pageNumber")
-        pn.text = str(page_number)
-        resp_doc = self._do_request(self.base_uri + "/search.asmx", doc)
-        resp_root = resp_doc.getroot()
-        rec_xml = resp_root.xpath(
-            "/soap:Envelope/soap:Body/dummy:SearchRecordsByReportResponse/dummy:SearchRecordsByReportResult", namespaces=ALL_NS_MAP
-        )
-
-        if len(rec_xml) > 0:
-            return {"status": "success", "result": rec_xml[0].text}
-        else:
-            rec_xml = resp_root.xpath('//*[local-name()="faultstring"]', namespaces=ALL_NS_MAP)
-            return {"status": "failed", "result": rec_xml[0].text if len(rec_xml) > 0 else "Unable to find SearchRecordsByReportResult"}
-
-    def _do_request(self, uri, doc, method="post"):
-        generate_new_token = False
-        if method == "post":
-            xml = etree.tostring(doc, pretty_print=True)
-            api = doc.xpath("/soap:Envelope/soap:Body", namespaces=NS_MAP)
-            api = api[0].getchildren()
-            if not api:
-                raise Exception("Could not find API node")
-            api_tag = api[0].tag
-            headers = {
-                "Content-Type": "text/xml; charset=utf-8",
-                "SOAPAction": f'"http://archer-tech.com/webservices/{api_tag}"',
-            }
-            response = requests.post(  # nosemgrep: python.requests.best-practice.use-timeout.use-timeout
-                uri, data=xml, headers=headers, verify=self.verify_cert
-            )
-            generate_new_token = any(x in response.text for x in archer_consts.ARCHER_INVALID_SESSION_TOKEN_MSG)
-            if generate_new_token:
-                self._authenticate()
-                session_token = api[0].getchildren()[0]
-                session_token.text = self.conn_obj.sessionToken
-                return self._do_request(uri, doc, method="post")
-            return parse_untrusted_xml(response.text)
-        raise ValueError("Invalid Method")
+        values = {"reportIdOrGuid": guid, "pageNumber": page_number}
+        yield from self._stream_result("SearchRecordsByReport", values, ("Record", "Metadata"), on_fault=on_fault)
+
+    def get_report_response(self, guid, page_number):
+        """Runs a SearchRecordsByReport and returns its response unparsed,
+        as bytes of at most the streamed size limit, for parsing elsewhere
+        with iter_soap_result().
+        """
+        if not self.conn_obj.sessionToken:
+            raise Exception("No session")
+        return self._download("SearchRecordsByReport", {"reportIdOrGuid": guid, "pageNumber": page_number})
+
+    def _is_invalid_session(self, document):
+        """Tells whether any text of the response, its result payload as
+        well as any fault, reports an invalid or expired session.
+        """
+        return any(_has_invalid_session_msg(text) for text in document.getroot().itertext())
+
+    def _stream_result(self, operation, values, tag, clear=True, on_root=None, on_fault=None, retry=True):
+        """Posts the named operation and yields each `tag` child of the XML
+        document escaped in its result, as the response streams in (see
+        _StreamedResult), so memory stays flat however large the page is.
+        Unless `clear` is False, each element is emptied once the caller
+        moves on to the next one.
+
+        on_root, a callable: called at the end with the inner document's
+            root element, or None if the response had no result
+        on_fault, a callable: called at the end with the SOAP fault's
+            message if the response had no result element
+        """
+        op = SOAP_OPERATIONS[operation]
+        if "sessionToken" in op.params:
+            values["sessionToken"] = self.conn_obj.sessionToken
+        target = _StreamedResult(f"{{{ARCHERNS}}}{operation}Result", tag, MAX_STREAMED_XML_RESPONSE_BYTES)
+        response = self.transport.post(self.base_uri + op.service, data=op.render(values), headers=op.headers, stream=True)
+        yielded = False
+        try:
+            for elem in _iter_streamed_result(target, response.iter_content(XML_CHUNK_SIZE), clear, stop_on_invalid_session=retry):
+                yielded = True
+                yield elem
+        finally:
+            response.close()
+        if retry and target.invalid_session:
+            self._authenticate()
+            if not yielded:
+                yield from self._stream_result(operation, values, tag, clear, on_root, on_fault, retry=False)
+                return
+        if on_fault is not None and not target.seen_result:
+            on_fault(target.fault or f"Unable to find {operation}Result")
+        if on_root is not None:
+            on_root(target.root)
+
+    def _download(self, operation, values, retry=True):
+        """Posts the named operation and returns the whole response body,
+        checked against the streamed size limit but not parsed.
+        """
+        op = SOAP_OPERATIONS[operation]
+        if "sessionToken" in op.params:
+            values["sessionToken"] = self.conn_obj.sessionToken
+        response = self.transport.post(self.base_uri + op.service, data=op.render(values), headers=op.headers, stream=True)
+        try:
+            data = b"".join(_iter_checked_chunks(response.iter_content(XML_CHUNK_SIZE), MAX_STREAMED_XML_RESPONSE_BYTES))
+        finally:
+            response.close()
+        if retry and any(msg in data for msg in _INVALID_SESSION_MSGS):
+            self._authenticate()
+            return self._download(operation, values, retry=False)
+        return data
+
+    def _do_request(self, operation, values, max_bytes=MAX_XML_RESPONSE_BYTES, retry=True):
+        """Renders the named operation's cached envelope with the given
+        values (and the current session token, if the operation takes one),
+        posts it to the operation's service endpoint and parses the response
+        as it streams in.
+        """
+        op = SOAP_OPERATIONS[operation]
+        if "sessionToken" in op.params:
+            values["sessionToken"] = self.conn_obj.sessionToken
+        response = self.transport.post(self.base_uri + op.service, data=op.render(values), headers=op.headers, stream=True)
+        try:
+            document = parse_untrusted_xml(response.iter_content(XML_CHUNK_SIZE), max_bytes=max_bytes)
+        finally:
+            response.close()
+        if retry and self._is_invalid_session(document):
+            self._authenticate()
+            return self._do_request(operation, values, max_bytes=max_bytes, retry=False)
+        return document
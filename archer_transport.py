@@ -0,0 +1,79 @@
+# File: archer_transport.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Pooled keep-alive HTTP transport shared by the Archer SOAP and REST
+clients, so an action run pays for the TCP+TLS handshake once per
+connection instead of once per request.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import archer_consts as consts
+
+
+class ArcherTransport:
+    """Wraps one `requests.Session` with a bounded connection pool.
+
+    timeout, a number: seconds to wait for Archer to answer each request;
+        0 or None waits as long as it takes
+    connect_timeout, a number: seconds to wait for a connection to open
+    pool_connections, an int: number of per-host pools to keep around
+    pool_maxsize, an int: maximum open connections to a single host; callers
+        block for a free connection rather than opening more than this
+    """
+
+    def __init__(
+        self,
+        verify=True,
+        timeout=consts.DEFAULT_REQUEST_TIMEOUT,
+        connect_timeout=consts.DEFAULT_CONNECT_TIMEOUT,
+        pool_connections=consts.DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize=consts.DEFAULT_POOL_MAXSIZE,
+    ):
+        self.verify = verify
+        self.timeout = (connect_timeout, timeout or None)
+        self.session = requests.Session()
+        self.session.verify = verify
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs.setdefault("verify", self.verify)
+        return self.session.request(method, url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("post", url, **kwargs)
+
+    def get_stats(self):
+        """Returns counters for the connections opened and reused so far."""
+        opened = 0
+        requests_sent = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            requests_sent += pool.num_requests
+        return {
+            "connections_opened": opened,
+            "connections_reused": max(requests_sent - opened, 0),
+            "requests_sent": requests_sent,
+        }
+
+    def close(self):
+        self.session.close()
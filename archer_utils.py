@@ -17,18 +17,24 @@ one.  There are some things that can only be done in one or the other.  So
 we use them both as necessary.
 """
 
-import functools
 import json
 import re
 import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
-import xmltodict
 from bs4 import UnicodeDammit
-from lxml import etree
 
 import archer_consts as consts
-from archer_soap import ArcherSOAP
+from archer_cache import SchemaCache, cached_schema
+from archer_directory import ArcherDirectory
+from archer_records import FieldTable, ReportFields, convert_compact_record, convert_search_record, element_to_dict, user_display_name
+from archer_report import ReportPageConverter, ReportPager, fetch_report_page
+from archer_schema import ArcherSchema, reference_index
+from archer_search import SearchCriteria, SearchResults, compile_results_filter, plan_search
+from archer_soap import ArcherSOAP, parse_untrusted_xml
+from archer_transport import ArcherTransport
 
 
 def W(msg):
@@ -43,23 +49,6 @@ def W(msg):
     sys.stderr.write(new_msg)
 
 
-def memoize(f):
-    """Naive memoizer, since Python2's functools doesn't have a memoizer.
-
-    TODO: persistence would vastly improve performance, but we'll want a
-        mechanism to clear the cache when the schema changes upstream.
-    """
-    cache = {}
-
-    @functools.wraps(f)
-    def cache_on_delivery(*args):
-        if args not in cache:
-            cache[args] = f(*args)
-        return cache[args]
-
-    return cache_on_delivery
-
-
 def get_record_field(record, field):
     """Utility to return the field (as OrderedDict) with the given name in the
     given record.  Returns None if the field isn't found.
@@ -79,8 +68,22 @@ class ArcherAPISession:
     """Keeps state and simplifies Archer Web Service (SOAP) interactions."""
 
     BLACKLIST_TYPES = (24, 25)
-
-    def __init__(self, base_url, userName, password, instanceName, usersDomain, verify_ssl, obj):
+    SEARCH_PAGE_SIZE = 1000
+
+    def __init__(
+        self,
+        base_url,
+        userName,
+        password,
+        instanceName,
+        usersDomain,
+        verify_ssl,
+        obj,
+        timeout=consts.DEFAULT_REQUEST_TIMEOUT,
+        max_connections=consts.DEFAULT_POOL_MAXSIZE,
+        schema_cache=None,
+        preload_directory=False,
+    ):
         """Initializes an API session.
 
         base, a string: base endpoint for the Archer APIs.  E.g.,
@@ -88,6 +91,13 @@ class ArcherAPISession:
         user, a string: userName for authentication
         password, a string: password for authentication
         instance, a string: Archer instanceName (e.g., 'Default')
+        timeout, a number: seconds to wait for Archer to answer each HTTP
+            request; 0 waits as long as it takes
+        max_connections, an int: keep-alive connections to pool per host
+        schema_cache, a SchemaCache: where to keep metadata lookups; an
+            in-memory cache for this session if not given
+        preload_directory, a boolean: resolve user/group names from a bulk
+            listing of all users and groups instead of one lookup per name
         """
         self.base_url = base_url
         self.userName = userName
@@ -101,6 +111,11 @@ class ArcherAPISession:
             "Content-Type": "application/json",
         }
         self.users_domain = usersDomain
+        self.schema_cache = schema_cache or SchemaCache()
+        self.schema = ArcherSchema()
+        self.directory = ArcherDirectory(self, preload=preload_directory)
+        self._refetched_references = set()
+        self.transport = ArcherTransport(verify=self.verifySSL, timeout=timeout, pool_maxsize=max_connections)
         self.asoap = ArcherSOAP(
             self.base_url,
             self.userName,
@@ -109,6 +124,7 @@ class ArcherAPISession:
             verify_cert=self.verifySSL,
             usersDomain=self.users_domain,
             conn_obj=obj,
+            transport=self.transport,
         )
 
     def _get_error_message_from_exception(self, e):
@@ -143,22 +159,50 @@ class ArcherAPISession:
     def get_token(self):
         self.asoap._authenticate()
 
+    def _retry_with_fresh_schema(self, func, *args):
+        """Calls func; if it fails or finds nothing while working from cached
+        schema metadata, the cache may be stale, so refresh it once and retry.
+        func must only look metadata up: it may run twice, so it must never
+        send a write to Archer.
+        """
+        try:
+            result = func(*args)
+        except Exception as e:
+            if not self._invalidate_schema_once():
+                raise
+            W(f"Retrying with refreshed schema after error: {e}")
+            return func(*args)
+        if not result and self._invalidate_schema_once():
+            W("Retrying with refreshed schema after lookup miss")
+            result = func(*args)
+        return result
+
+    def _invalidate_schema_once(self):
+        if not self.schema_cache.invalidate_once():
+            return False
+        self.schema.reset()
+        return True
+
+    def refresh_schema(self):
+        """Drops all cached schema metadata and the indexes built from it."""
+        self.schema_cache.invalidate()
+        self.schema.reset()
+
+    def close(self):
+        """Logs the connection pool counters and releases pooled connections."""
+        W(f"Archer connection stats: {self.transport.get_stats()}")
+        self.transport.close()
+
     def _rest_call(self, ep, meth="get", data={}):
         hdrs = self.headers.copy()
         hdrs.update({"X-Http-Method-Override": meth})
         hdrs.update({"Authorization": f'Archer session-id="{self.conn_obj.sessionToken}"'})
         url = f"{self.base_url}{ep}"
 
-        request_func = getattr(requests, meth)
         if data:
-            r = request_func(
-                url,
-                headers=hdrs,
-                json=data,
-                verify=self.verifySSL,  # nosemgrep: python.requests.best-practice.use-timeout.use-timeout
-            )
+            r = self.transport.request(meth, url, headers=hdrs, json=data)
         else:
-            r = request_func(url, headers=hdrs, verify=self.verifySSL)  # nosemgrep: python.requests.best-practice.use-timeout.use-timeout
+            r = self.transport.request(meth, url, headers=hdrs)
         if r.status_code == consts.ARCHER_UNAUTHORIZED_USER:
             self.get_token()
             return self._rest_call(ep, meth, data)
@@ -169,7 +213,7 @@ class ArcherAPISession:
             return r.text or r.reason
         return r
 
-    @memoize
+    @cached_schema("content_field")
     def get_fieldId_for_content_and_name(self, cid, fname):
         """Returns ID of the field with the given name in the given record.
         Return None if not found.
@@ -181,48 +225,55 @@ class ArcherAPISession:
         j = json.loads(self._rest_call(f"/api/core/content/{cid}"))
         if not ("RequestedObject" in j and "FieldContents" in j["RequestedObject"]):
             return None
-        for fid in j["RequestedObject"]["FieldContents"]:
-            j2 = json.loads(self._rest_call(f"/api/core/system/fielddefinition/{fid}"))
-            n = j2["RequestedObject"]["Name"]
-            W(f'...matching "{fname}" == "{n}"')
-            if n == fname:
-                id_ = j2["RequestedObject"]["Id"]
-                W(f"...Matched!  Returning ID {id_}")
-                return id_
+        level = self.get_level_fields(j["RequestedObject"].get("LevelId"))
+        if level is not None:
+            field = level.by_name.get(fname)
+            if field is not None:
+                W(f"...Matched!  Returning ID {field.id}")
+                return field.id
+        else:
+            # No level to index; look at the record's own fields one by one
+            for fid in j["RequestedObject"]["FieldContents"]:
+                n = self.get_name_of_field(fid)
+                W(f'...matching "{fname}" == "{n}"')
+                if n == fname:
+                    id_ = self.get_field_details(fid)["Id"]
+                    W(f"...Matched!  Returning ID {id_}")
+                    return id_
         W("...NO MATCH!  Returning None")
         return None
 
-    @memoize
     def get_fieldId_for_app_and_name(self, mid, fname):
         """Returns ID of the field with the given name in the given module.
         `mid` will be interpreted as app_name, level_id, then app_id.
-        Return None if not found.
+        Return None if not found, even after refreshing the schema cache.
         """
+        return self._retry_with_fresh_schema(self._get_fieldId_for_app_and_name, mid, fname)
+
+    def _get_fieldId_for_app_and_name(self, mid, fname):
         W(f"Getting fieldId for {mid} in module {fname}")
         try:
             mid = int(mid)
         except (ValueError, TypeError):
             mid = self.get_levelId_for_app(mid)
             W(f"Got level id: {mid}")
-            flds = self.get_fields_for_level(mid)
+            level = self.get_level_fields(mid)
         else:
-            flds = self.get_fields_for_level(mid)
-            if not flds[0]["IsSuccessful"]:
+            level = self.get_level_fields(mid)
+            if level is None:
                 W(f"No fields for level {mid}")
                 mid = self.get_levelId_for_app(mid)
                 W(f"Got level id: {mid}")
-                flds = self.get_fields_for_level(mid)
-        if type(flds) is not list:
-            return None
-        if not flds[0]["IsSuccessful"]:
+                level = self.get_level_fields(mid)
+        if level is None:
             W(f"No fields for level {mid}, returning None")
             return None
-        for fld in flds:
-            if fld["RequestedObject"]["Name"] == fname:
-                W("Found a match!")
-                return fld["RequestedObject"]["Id"]
-        W("Found no match")
-        return None
+        field = level.by_name.get(fname)
+        if field is None:
+            W("Found no match")
+            return None
+        W("Found a match!")
+        return field.id
 
     def get_module_name(self, mid):
         """Returns the name of the given module."""
@@ -233,13 +284,10 @@ class ArcherAPISession:
                 return mid
             else:
                 return None
-        mid = str(mid)
-        for a in self.get_applications():
-            if mid == a["RequestedObject"]["Id"]:
-                return a["RequestedObject"]["Name"]
-        return None
+        app = self.get_schema().get_application(int(mid))
+        return app.name if app else None
 
-    @memoize
+    @cached_schema("applications")
     def get_applications(self):
         """Return an array of all modules/apps"""
         return json.loads(self._rest_call("/api/core/system/application"))
@@ -248,17 +296,33 @@ class ArcherAPISession:
         """Return the ID of the Archer module/app with the given name.  Returns
         None if the module name isn't found.
         """
-        for j in self.get_applications():
-            if name in (j["RequestedObject"][x] for x in ("Name", "Alias")):
-                return j["RequestedObject"]["Id"]
-        return None
+        return self._retry_with_fresh_schema(self._get_moduleid, name)
+
+    def _get_moduleid(self, name):
+        app = self.get_schema().get_application(name)
+        return app.id if app else None
+
+    def get_schema(self):
+        """Returns the schema index, with the current application list."""
+        return self.schema.applications(self.get_applications())
+
+    def get_level_fields(self, levelId):
+        """Returns the indexed fields of the given level, or None if Archer
+        has no fields for it.
+        """
+        if levelId is None:
+            return None
+        flds = self.get_fields_for_level(levelId)
+        if type(flds) is not list or not flds or not flds[0].get("IsSuccessful"):
+            return None
+        return self.schema.level_fields(levelId, flds)
 
-    @memoize
+    @cached_schema("fields")
     def get_fields_for_level(self, levelId):
         """Return array of fields for the given level"""
         return json.loads(self._rest_call(f"/api/core/system/fielddefinition/level/{levelId}"))
 
-    @memoize
+    @cached_schema("levels")
     def get_levelId_for_app(self, name):
         """Return the ID of the base level for the named module/app.  Returns
         None if the module's name or level isn't found.
@@ -277,9 +341,15 @@ class ArcherAPISession:
             return None
         return j["RequestedObject"]["Id"]
 
-    @memoize
     def get_field_details(self, fieldId):
         """Returns details about the field with the given ID."""
+        field = self.schema.find_field(int(fieldId))
+        if field is not None:
+            return field.definition
+        return self._get_field_details(fieldId)
+
+    @cached_schema("field")
+    def _get_field_details(self, fieldId):
         r = self._rest_call(f"/api/core/system/fielddefinition/{fieldId}")
         return json.loads(r)["RequestedObject"]
 
@@ -327,7 +397,7 @@ class ArcherAPISession:
         """
         fld = self.get_field_details(fieldId)
 
-        if fld["Type"] not in (4, 8, 6):
+        if fld["Type"] not in (4, 6, 8, 9):
             return value
 
         if fld["Type"] in (4, 6):
@@ -343,44 +413,83 @@ class ArcherAPISession:
                 value = [x.strip() for x in value.split(",")]
             user_id = []
             group_id = []
+            resolved = self.directory.resolve_many(value)
             for val in value:
-                uid = self.asoap.find_user(val)
-                gid = self.asoap.find_group(val)
-                group_id.append(gid)
-                user_id.append(uid)
+                uid, gid = resolved[val]
                 if not uid and not gid:
-                    W("Users/Groups not found in local user search")
-                    duid = self.asoap.find_domain_user(val)
-                    user_id.append(duid)
-                    if not duid:
-                        W("Users/Groups not found in domain user search")
-                        raise Exception(f"Failed to find Users/Groups {val}")
+                    W("Users/Groups not found in local or domain user search")
+                    raise Exception(f"Failed to find Users/Groups {val}")
+                user_id.append(uid)
+                group_id.append(gid)
 
             return [user_id, group_id]
 
         W(f'Valufying "{value}" as cross-reference field {fld}')
-
+        return self.get_reference_values(fld["Id"], value)
+
+    def get_reference_values(self, fieldId, value):
+        """Returns the content ID(s) to store in the given cross-reference
+        field for `value`: a content ID or Sequential ID, or a list (or
+        comma-separated string) of them.  A value is a content ID if a
+        record has it as one; only the other values are looked up as
+        Sequential IDs among the records the field can link to.  Values
+        that aren't integers are returned unchanged.
+        """
+        if isinstance(value, str):
+            values = [x.strip() for x in value.split(",") if x.strip()]
+        elif isinstance(value, list):
+            values = value
+        else:
+            values = [value]
         try:
-            value = int(value)
+            values = [int(x) for x in values]
         except (ValueError, TypeError):
             W(f"Cross-reference values must be integers: {value}")
-            return None
-        # refrecs = self.get_referenced_records(fld.get('ReferencedFieldId'))
-        refrecs = self.get_referenced_records(fld.get("Id"))
-        if refrecs:
-            rec = [x["Id"] for x in refrecs if x["SequentialId"] == value]
-            if len(rec) != 1:
-                W(f"Zero or multiple referenced records found by SeqId: {rec} in reference records: {refrecs}")
-                with open("/tmp/this.json", "w") as of:
-                    json.dump(refrecs, of)
-            else:
-                W(f"Cross-reference is a Sequential ID: {value}")
-                return rec[0]
-        content = self._rest_call(f"/api/core/content/{value}", "get")
-        if json.loads(content)["IsSuccessful"]:
-            W(f"Cross-reference is a content ID: {value}")
             return value
-        raise Exception(f"Failed to set Cross-Reference field vlid:{vlid}/val:{value}")
+
+        resolved = {}
+        sequential = []
+        for x in dict.fromkeys(values):
+            # A single lookup tells if it's a content ID; the referenced records are only listed for the others
+            if json.loads(self._rest_call(f"/api/core/content/{x}", "get")).get("IsSuccessful"):
+                W(f"Cross-reference is a content ID: {x}")
+                resolved[x] = x
+            else:
+                sequential.append(x)
+        if sequential:
+            resolved.update(self._resolve_references(fieldId, sequential))
+            missing = [x for x in sequential if resolved.get(x) is None]
+            if missing and fieldId not in self._refetched_references:
+                # The cached index may predate the records; fetch it again once
+                self._refetched_references.add(fieldId)
+                self.schema_cache.invalidate("references", fieldId)
+                resolved.update(self._resolve_references(fieldId, missing))
+            for x in missing:
+                if resolved.get(x) is None:
+                    raise Exception(f"Failed to set Cross-Reference field {fieldId}/val:{x}")
+
+        ids = [resolved[x] for x in values]
+        if len(ids) == 1 and not isinstance(value, list):
+            return ids[0]
+        return ids
+
+    def _resolve_references(self, fieldId, values):
+        index = self.get_reference_index(fieldId)
+        if not index:
+            return {}
+        refs = self.schema.references(fieldId, index)
+        return {x: refs.resolve(x) for x in values}
+
+    @cached_schema("references")
+    def get_reference_index(self, rfid):
+        """Returns the Sequential ID -> content ID pairs of the records the
+        given reference field can link to (see archer_schema.reference_index).
+        Only this index is cached, never the records themselves.
+        """
+        refrecs = self.get_referenced_records(rfid)
+        if refrecs is None:
+            return None
+        return reference_index(refrecs)
 
     def get_referenced_records(self, rfid):
         """Returns records that could be linked by the given reference field"""
@@ -390,7 +499,7 @@ class ArcherAPISession:
             return None
         return [x["RequestedObject"] for x in j]
 
-    @memoize
+    @cached_schema("valueslist")
     def get_valueslist(self, vlid):
         """Returns the ValuesList with the give Id"""
         j = json.loads(self._rest_call(f"/api/core/system/valueslistvalue/flat/valueslist/{vlid}", "get"))
@@ -399,6 +508,24 @@ class ArcherAPISession:
             return None
         return [x["RequestedObject"] for x in j]
 
+    @cached_schema("users")
+    def get_users(self):
+        """Returns every Archer user"""
+        j = json.loads(self._rest_call("/api/core/system/user", "get"))
+        if "Message" in j:
+            W("Error getting users: {}".format(j["Message"]))
+            return None
+        return [x["RequestedObject"] for x in j if x.get("IsSuccessful")]
+
+    @cached_schema("groups")
+    def get_groups(self):
+        """Returns every Archer group"""
+        j = json.loads(self._rest_call("/api/core/system/group", "get"))
+        if "Message" in j:
+            W("Error getting groups: {}".format(j["Message"]))
+            return None
+        return [x["RequestedObject"] for x in j if x.get("IsSuccessful")]
+
     def get_value(self, value):
         """
         Returns value as per the returned datatype
@@ -415,36 +542,31 @@ class ArcherAPISession:
         value before the first ':' - in which case that's the valueid
         returned, and OtherText is set to the value with prefix removed.
 
-        Case-insensitive match.
+        Case-insensitive match, through an index kept with the cached
+        valueslist (see `archer_schema.ArcherValuesList`).
         """
         values = self.get_valueslist(vlid)
-        match_flds = ("Name", "Alias", "NumericValue", "Description", "Id")
-        vlid = []
+        if not values:
+            W(f"No values in valueslist {vlid}")
+            return None, None
+        index = self.schema.values_list(vlid, values)
 
-        if isinstance(value, list):
-            lval = [str(x.lower()) for x in value]
-        elif isinstance(value, dict):
-            lval = value
+        if isinstance(value, (list, dict)):
+            lval = list(value)
         else:
-            lval = [str(value.lower())]
-
-        if values:
-            for val in values:
-                for lv in lval:
-                    if lv in (self.get_value(val[y]) for y in match_flds if val[y]):
-                        W(f"Get value : {self.get_value(val['Id'])}")
-                        vlid.append(val["Id"])
-                        break
+            lval = [value]
 
-            return vlid, None
+        ids = index.find(lval)
+        if ids:
+            W(f"Got values : {ids}")
+            return ids, None
 
-        if ":" in value:
+        if isinstance(value, str) and ":" in value:
             vname, vval = value.split(":", 1)
-            vname = vname.lower()
-            for other in (x for x in values if x["EnableOtherText"]):
-                if vname in (self.get_value(other[x]) for x in match_flds if other[x]):
-                    W(f"get_valueslistvalue_id other['Id'] {other['Id']}")
-                    return other["Id"], vval
+            other = index.find_other(vname)
+            if other is not None:
+                W(f"get_valueslistvalue_id other['Id'] {other}")
+                return other, vval
         W(f"No valueslistvalue found for vlid:{vlid} and value:{value}")
         return None, None
 
@@ -459,82 +581,210 @@ class ArcherAPISession:
     def _get_field_id_map(self, app):
         mid = self.get_moduleid(app)
 
-        levelid = self.get_levelId_for_app(mid)
-        q_fields = self.get_fields_for_level(levelid)
-        if not q_fields or type(q_fields) is not list or type(q_fields[0]) is not dict or "RequestedObject" not in q_fields[0]:
+        level = self.get_level_fields(self.get_levelId_for_app(mid))
+        if not level:
             raise Exception(f'Could not find any fields for application "{app}". Please verify the application is correct.')
-        fields = {}
-        for f in q_fields:
+        for f, e in level.errors:
+            W(f"Failed to parse: {f}: {e}")
+        return level.name_map(self.excluded_fields, self.BLACKLIST_TYPES)
+
+    def _search_records(self, mid, app, fid, field_name, value, fields=None, table=None, **kwargs):
+        """Runs one search page and yields each record as a dict, with
+        readable field names, as it is streamed out of the response.  With
+        a FieldTable, records are yielded in compact form instead.
+        """
+        for r in self.asoap.iter_records(mid, app, fid, field_name, value, fields=fields, **kwargs):
+            yield self._convert_record(r, fields, table)
+
+    @staticmethod
+    def _convert_record(elem, fields, table):
+        if table is not None:
+            return convert_compact_record(elem, table)
+        return convert_search_record(elem, fields or {})
+
+    @staticmethod
+    def _fetch_pages(fetch, first, last, page_size, workers):
+        """Yields fetch(page) for the pages from `first` to `last`, in page
+        order, with up to `workers` pages in flight (fetching, or fetched
+        and waiting their turn).  Once a page comes back short, or the
+        caller stops, no more pages are started, those not started yet are
+        cancelled, and pages being fetched are dropped without waiting for
+        them.
+        """
+        pending = deque()
+        next_page = first
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            while next_page <= last or pending:
+                while next_page <= last and len(pending) < workers:
+                    pending.append(executor.submit(fetch, next_page))
+                    next_page += 1
+                records = pending.popleft().result()
+                if len(records) < page_size:
+                    yield records
+                    return
+                if next_page <= last:
+                    pending.append(executor.submit(fetch, next_page))
+                    next_page += 1
+                yield records
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def plan_search(self, fid, value, comparison=None):
+        """Returns the SearchPlan for filtering on the given field ID, based
+        on the field's type.
+        """
+        field_type = None
+        vlid = None
+        if fid is not None and value is not None and value != "":
             try:
-                ftype = int(f["RequestedObject"]["Type"])
-                if ftype not in (1, 2, 3, 4, 6, 8, 9, 11, 19, 20, 21, 22, 23, 26, 27, 29, 1001):
-                    W(f"Unexpected field type {ftype} trying anyway: {json.dumps(f)}")
-                if f["RequestedObject"]["Name"].lower() in self.excluded_fields:
-                    W("Skipping {}".format(f["RequestedObject"]["Name"]))
-                    continue
-                elif ftype not in self.BLACKLIST_TYPES:
-                    fields[int(f["RequestedObject"]["Id"])] = f["RequestedObject"]["Name"]
-                else:
-                    W("unable to parse field {}, type {}: {}".format(f["RequestedObject"]["Name"], f["RequestedObject"]["Type"], json.dumps(f)))
+                fld = self.get_field_details(fid)
+                field_type = int(fld["Type"])
+                vlid = fld.get("RelatedValuesListId")
+            except Exception as e:
+                err = self._get_error_message_from_exception(e)
+                W(f"Failed to get the type of field {fid}, searching it as text: {err}")
+
+        def resolve_values(v):
+            # Only a value naming values list entries is matched by value ID; anything else stays a text match
+            try:
+                value_ids, other_text = self.get_valueslistvalue_id(vlid, v)
             except Exception as e:
                 err = self._get_error_message_from_exception(e)
-                W(f"Failed to parse: {f}: {err}")
-        return fields
+                W(f"Failed to look up {v} in values list {vlid}, searching it as text: {err}")
+                return None
+            return value_ids if other_text is None else None
+
+        plan = plan_search(fid, field_type, value, comparison, resolve_values if vlid else None)
+        W(f"Search plan: {plan}")
+        return plan
+
+    def _iter_search(
+        self,
+        app,
+        field_name,
+        value,
+        max_count,
+        mid,
+        fid,
+        fields,
+        comparison=None,
+        sort=None,
+        page=1,
+        page_size=None,
+        criteria=None,
+        compact=False,
+        workers=1,
+        results=None,
+        plan=None,
+    ):
+        """Yields up to `max_count` records, fetching `page_size` records per
+        ExecuteSearch page from `page` onwards until a page comes back short
+        or Archer's count of matches shows there are no more.
+        `criteria` (a SearchCriteria) is ANDed with the search on `fid`.
+        With `compact`, records are archer_records.CompactRecords sharing
+        one FieldTable.  With more than one worker, the pages after the
+        first are fetched concurrently (see `_fetch_pages`).  The count is
+        stored on `results` (a SearchResults) if given.  A given `plan`
+        is used instead of planning the search on `fid` from `value`.
+        """
+        if max_count <= 0:
+            return
+        page_size = min(page_size or self.SEARCH_PAGE_SIZE, max_count)
+        if plan is None:
+            plan = self.plan_search(fid, value, comparison)
+        if criteria:
+            if plan.value is not None and plan.value != "":
+                criteria = SearchCriteria("AND", [plan, criteria])
+            W(f"Search criteria: {criteria}")
+        table = FieldTable(fields or {}) if compact else None
+        total = None
+
+        def on_count(count):
+            nonlocal total
+            if count is not None:
+                total = count
+                if results is not None:
+                    results.count = count
+
+        search = {
+            "filter_type": plan.filter_type,
+            "max_count": page_size,
+            "fields": fields,
+            "comparison": plan.operator,
+            "sort": sort,
+            "criteria": criteria,
+            "on_count": on_count,
+        }
+        remaining = max_count
+        while True:
+            num_records = 0
+            for record in self._search_records(mid, app, fid, field_name, plan.value, table=table, page=page, **search):
+                num_records += 1
+                remaining -= 1
+                yield record
+                if remaining <= 0:
+                    return
+            if num_records < page_size or (total is not None and page * page_size >= total):
+                return
+            page += 1
+            if workers > 1 and remaining > page_size:
+                break
+
+        # The first page was full and several more are wanted
+        last_page = page + (remaining - 1) // page_size
+        if total is not None:
+            last_page = min(last_page, (total - 1) // page_size + 1)
+        W(f"Fetching search pages {page} to {last_page} with {workers} workers")
+
+        def fetch(page_number):
+            return list(self.asoap.iter_records(mid, app, fid, field_name, plan.value, page=page_number, clear=False, **search))
+
+        for elems in self._fetch_pages(fetch, page, last_page, page_size, workers):
+            for elem in elems:
+                remaining -= 1
+                yield self._convert_record(elem, fields, table)
+                if remaining <= 0:
+                    return
 
     def get_records(self, app, field_name, value, max_count, mid, fid, fields, comparison=None, sort=None, page=1):
-        records = []
-
-        num_iterations = max_count // 1000
-        rem_count = max_count % 1000
-        if rem_count != 0:
-            num_iterations = num_iterations + 1
-
-        for iter_count in range(num_iterations):
-            records_req = 1000
-            if rem_count != 0 and iter_count == num_iterations - 1:
-                records_req = rem_count
-
-            if comparison is None:
-                lst_records = self.asoap.find_records(
-                    mid,
-                    app,
-                    fid,
-                    field_name,
-                    value,
-                    filter_type="text",
-                    max_count=records_req,
-                    fields=fields,
-                    comparison=comparison,
-                    sort=sort,
-                    page=page,
-                )
-                if lst_records:
-                    records.extend(lst_records)
-            if not lst_records:
-                try:
-                    lst_inter_records = self.asoap.find_records(
-                        mid,
-                        app,
-                        fid,
-                        field_name,
-                        int(value),
-                        filter_type="numeric",
-                        max_count=records_req,
-                        fields=fields,
-                        comparison=comparison,
-                        sort=sort,
-                        page=page,
-                    )
-                    if lst_inter_records:
-                        records.extend(lst_inter_records)
-                    else:
-                        break
-                except (TypeError, ValueError):
-                    pass  # Not looking up numerically
-
-        return records
+        return list(self._iter_search(app, field_name, value, max_count, mid, fid, fields, comparison, sort, page))
 
-    def find_records(self, app, field_name, value, max_count, comparison=None, sort=None, page=1):
+    def select_fields(self, app, names, ignore_missing=False):
+        """Returns {field ID: name} for the named fields of `app` (matched
+        case-insensitively), to request only those as display fields.
+        Returns None, meaning all fields, if no names are given or none
+        of them match.
+
+        ignore_missing, a boolean: skip unknown names instead of raising
+        """
+        if not names:
+            return None
+        wanted = {n.strip().lower() for n in names if n and n.strip()}
+        selected = {fid: name for fid, name in self._get_field_id_map(app).items() if name.lower() in wanted}
+        missing = wanted - {name.lower() for name in selected.values()}
+        if missing and not ignore_missing:
+            raise ValueError("Field(s) not found in application {}: {}".format(app, ", ".join(sorted(missing))))
+        return selected or None
+
+    def compile_results_filter(self, app, conditions, operator, equality):
+        """Returns (SearchCriteria or None, leftover conditions) for a
+        results filter on `app`: the conditions Archer can evaluate itself,
+        and the ones that still have to be checked on the fetched records.
+        """
+        level = self.get_level_fields(self.get_levelId_for_app(app))
+        fields = {}
+        if level:
+            for f in level:
+                fields.setdefault(f.name, (f.id, f.type))
+        criteria, leftover = compile_results_filter(conditions, operator, equality, fields)
+        W(f"Results filter sent to Archer: {criteria}, filtered locally: {leftover}")
+        return criteria, leftover
+
+    def _resolve_search(self, app, field_name, value, fields=None):
+        """Returns (module ID, field ID, {field ID: name}) to search `app`
+        on the given field, displaying `fields` (all fields if not given).
+        """
         fid = None
         err = ""
 
@@ -549,57 +799,80 @@ class ArcherAPISession:
         if field_name and value and not fid:
             raise Exception(f'Failed to find field "{field_name}" in "{app}": {err}')
         mid = self.get_moduleid(app)
-        fields = self._get_field_id_map(app)
+        if not fields:
+            fields = self._get_field_id_map(app)
+        return mid, fid, fields
+
+    def iter_records(
+        self,
+        app,
+        field_name,
+        value,
+        max_count,
+        comparison=None,
+        sort=None,
+        page=1,
+        page_size=None,
+        fields=None,
+        criteria=None,
+        compact=False,
+        workers=1,
+        plan=None,
+    ):
+        """Returns a SearchResults over up to `max_count` records of `app`
+        whose `field_name` matches `value` (all records if no value), fetched
+        page by page from `page` and converted as they are parsed.  Its
+        `count` is Archer's total number of matches.
+
+        page_size, an int: records per ExecuteSearch page; keep it the same
+            between calls that resume from a page number
+        fields, a dict: {field ID: name} of the fields to return (see
+            `select_fields`); all fields if not given
+        criteria, a SearchCriteria: further conditions records must meet
+            (see `compile_results_filter`)
+        compact, a boolean: yield archer_records.CompactRecords, which hold
+            a fraction of the memory; call as_record_dict() on each record
+            to get the usual dict
+        workers, an int: search pages fetched at the same time; records
+            are still yielded in Archer's order
+        plan, a SearchPlan: filter on the field with this plan (see
+            plan_field_search) instead of planning it from `value` and
+            `comparison` again
+        """
+        mid, fid, fields = self._resolve_search(app, field_name, value, fields)
+        results = SearchResults()
+        results.records = self._iter_search(
+            app, field_name, value, max_count, mid, fid, fields, comparison, sort, page, page_size, criteria, compact, workers, results, plan
+        )
+        return results
 
-        records = self.get_records(app, field_name, value, max_count, mid, fid, fields, comparison, sort, page)
-        if not records:
-            return records
-
-        recs = etree.Element("Records")
-        document = etree.ElementTree(recs)
-        for r in records:
-            recs.append(r)
-        rec_xml = etree.tostring(document, pretty_print=True)
-
-        rec_dict = (records and xmltodict.parse(rec_xml)) or {}
-        records = rec_dict.get("Records", {}).get("Record")
-        # remove blanks and add readable name
-        if not records:
-            return []
-
-        if not isinstance(records, list):
-            records = [records]
-
-        for r in records:
-            cur_fields = r.get("Field", [])
-            new_fields = []
-            for f in cur_fields:
-                try:
-                    t = f.get("#text")
-                    if t:
-                        f["@name"] = fields.get(int(f["@id"]), f["@id"])
-                        new_fields.append(f)
-                    elif f.get("@type") == "4":
-                        f["@name"] = fields.get(int(f["@id"]), f["@id"])
-                        value_list = f.get("ListValues", {}).get("ListValue", {})
-                        if value_list:
-                            if isinstance(value_list, dict):
-                                value_list = [value_list]
-                            value_list = set(x.get("#text", "") for x in value_list)
-                            v = f.get("@value")
-                            if v:
-                                value_list.add(v)
-                            f["multi_value"] = list(value_list)
-                            f["#text"] = ", ".join(f["multi_value"])
-                        else:
-                            f["#text"] = None
-                        new_fields.append(f)
-                except Exception as e:
-                    err = self._get_error_message_from_exception(e)
-                    W(f"Failed to parse {f}: {err}")
-            r["Field"] = new_fields
+    def count_records(self, app, field_name, value, comparison=None, criteria=None):
+        """Returns how many records of `app` match the search (as for
+        iter_records), fetching a single one-record page with one display
+        field.  Returns None if Archer doesn't report a count.
+        """
+        mid, fid, fields = self._resolve_search(app, field_name, value)
+        if fid in fields:
+            fields = {fid: fields[fid]}
+        else:
+            fields = dict(list(fields.items())[:1])
+        results = SearchResults()
+        results.records = self._iter_search(
+            app, field_name, value, 1, mid, fid, fields, comparison, page_size=1, criteria=criteria, results=results
+        )
+        for _ in results:
+            pass
+        return results.count
+
+    def plan_field_search(self, app, field_name, value, comparison=None):
+        """Returns the SearchPlan iter_records() would filter `app` on the
+        named field with, e.g. to check that the field is numeric.
+        """
+        _, fid, _ = self._resolve_search(app, field_name, value)
+        return self.plan_search(fid, value, comparison)
 
-        return records
+    def find_records(self, app, field_name, value, max_count, comparison=None, sort=None, page=1):
+        return list(self.iter_records(app, field_name, value, max_count, comparison, sort, page))
 
     def get_record_by_id(self, app, contentId, cl=None):
         """Returns the full record with the given id."""
@@ -608,7 +881,8 @@ class ArcherAPISession:
 
         data = self.asoap.get_record(contentId, moduleId)
 
-        rec_dict = xmltodict.parse(data) or {}
+        root = parse_untrusted_xml(data).getroot()
+        rec_dict = {root.tag: element_to_dict(root)}
 
         rec_dict["@moduleId"] = moduleId
         rec_dict["@contentId"] = contentId
@@ -626,6 +900,8 @@ class ArcherAPISession:
                     continue
                 if field_type == 4:
                     value_list = field.get("MultiValue", [])
+                    if isinstance(value_list, dict):
+                        value_list = [value_list]
                     if value_list:
                         value_list = set(x.get("@value", "") for x in value_list)
                         value_list.add(field.get("@value"))
@@ -645,39 +921,33 @@ class ArcherAPISession:
         data has fieldId/value pairs with which to call `update_record`.
         """
         W(f"In create_record({app},{data})")
+        # Only the schema lookups are retried; the write is sent exactly once
+        moduleId, fields = self._retry_with_fresh_schema(self._create_record_fields, app, data)
+        cid = self.asoap.create_record(moduleId, fields)
+        return cid
 
+    def _create_record_fields(self, app, data):
+        """Returns (module ID, field values) for creating a record in `app`."""
         W("Crafting data for new record...")
         moduleId = self.get_moduleid(app)
         fields = []
 
-        levelid = self.get_levelId_for_app(moduleId)
-        q_fields = self.get_fields_for_level(levelid)
-        if not q_fields or type(q_fields) is not list or type(q_fields[0]) is not dict or "RequestedObject" not in q_fields[0]:
+        level = self.get_level_fields(self.get_levelId_for_app(moduleId))
+        if not level:
             raise Exception(f'Could not find any fields for application "{app}". Please verify the application is correct.')
-        field_data = {}
-        for f in q_fields:
-            try:
-                ftype = int(f["RequestedObject"]["Type"])
-                field_data[f["RequestedObject"]["Name"]] = {"id": int(f["RequestedObject"]["Id"]), "type": ftype}
-            except Exception as e:
-                err = self._get_error_message_from_exception(e)
-                W(f"Failed to parse: {f}: {err}")
         for field, value in list(data.items()):
-            fd = field_data.get(field)
+            fd = level.by_name.get(field)
             if not fd:
                 raise Exception(f"Could not identify field {field}")
-            value = self.get_valuesetvalue_of_field(fd["id"], value)
-
-            field = {"value": value}
-            field.update(fd)
-            fields.append(field)
-        cid = self.asoap.create_record(moduleId, fields)
-        return cid
+            value = self.get_valuesetvalue_of_field(fd.id, value)
+            fields.append({"value": value, "id": fd.id, "type": fd.type})
+        return moduleId, fields
 
     def update_record(self, app, contentId, fieldId, value, doit=True):
         W(f"In update_record({contentId}, {fieldId}, {value})")
         data = {}
-        moduleId, field = self.get_data(app, fieldId, value, doit)
+        # Only the schema lookups are retried; the write is sent exactly once
+        moduleId, field = self._retry_with_fresh_schema(self.get_data, app, fieldId, value, doit)
         data = self.asoap.update_record(contentId, moduleId, [field])
         W(data)
         return bool(data)
@@ -732,6 +1002,15 @@ class ArcherAPISession:
         return moduleId, field
 
     def update_record_by_json(self, app, contentId, data=None, doit=True):
+        # Only the schema lookups are retried; the write is sent exactly once
+        moduleId, fields = self._retry_with_fresh_schema(self._update_fields_by_json, app, data, doit)
+        data = self.asoap.update_record(contentId, moduleId, fields)
+        return bool(data)
+
+    def _update_fields_by_json(self, app, data=None, doit=True):
+        """Returns (module ID, field values) for updating a record of `app`
+        with the {field: value} pairs in `data`.
+        """
         if data is None:
             data = {}
         fields = []
@@ -740,57 +1019,85 @@ class ArcherAPISession:
             moduleId, field = self.get_data(app, field, value, doit)
             fields.append(field)
 
-        data = self.asoap.update_record(contentId, moduleId, fields)
-        return bool(data)
-
-    def get_report_by_id(self, guid, max_count, max_pages):
-        """Returns the report with the given guid."""
+        return moduleId, fields
+
+    def get_report_by_id(self, guid, max_count, max_pages, matches=None, max_scanned=None, on_records=None, processes=0):
+        """Returns the report with the given guid.  The next page is fetched
+        and parsed as it streams in while the current one is merged; the
+        seconds spent in each stage are returned under "timings".
+
+        matches, a callable: keep only the records it returns True for, as
+            each page is merged; `max_count` then counts matching records
+        max_scanned, an int: with `matches`, stop after reading this many
+            records, matching or not
+        on_records, a callable: given each page's records as they are
+            merged, instead of collecting them under "records"; e.g. to
+            write a report too large to hold in memory
+        processes, an int: download the raw pages and parse and merge them
+            in this many worker processes (see
+            archer_report.ReportPageConverter); 0 or 1 does it all here
+        """
 
         # Initialize result dictionary
-        result_dict = {"status": "failed", "message": "Failed - default message", "page_count": 0, "records": []}
+        timings = {"fetch_seconds": 0.0, "parse_seconds": 0.0, "merge_seconds": 0.0}
+        result_dict = {
+            "status": "failed",
+            "message": "Failed - default message",
+            "page_count": 0,
+            "records": [],
+            "records_found": 0,
+            "records_scanned": 0,
+            "timings": timings,
+        }
 
-        # Initialize the current count of records
+        # Initialize the current count of records, and how many may be read
         total_count = 0
+        found = 0
+        scan_limit = max_count if matches is None else max_scanned or sys.maxsize
+        # Field definitions, indexed from the first page's metadata
+        report_fields = None
+        page_number = 0
 
         # Try to loop through report pages until no records are returned, max pages reached,
         # or max number of record results reached
+        converter = None
+        if processes > 1 and max_pages > 1:
+            try:
+                converter = ReportPageConverter(processes)
+            except Exception as e:
+                W(f"Parsing report pages in this process; failed to start {processes} worker processes: {e}")
+        if converter is None:
+            # Each page is parsed into dictionaries as it streams in, on the pager's thread;
+            # only the first page's field definitions are needed
+            pager = ReportPager(lambda page: fetch_report_page(self.asoap, guid, page, metadata=page == 1), max_pages)
+            pages = pager
+        else:
+            # Raw pages go to the workers, which parse and merge them, and come back in order
+            pager = ReportPager(lambda page: self.asoap.get_report_response(guid, page), max_pages)
+            pages = converter.convert(pager)
         try:
-            for page_number in range(1, max_pages + 1):
+            for page_number, data_dict, error in pages:
                 # Try to get current report page
-                try:
-                    data_dict = self.asoap.get_report(guid, page_number)
-                    if data_dict["status"] != "success":
-                        result_dict["message"] = data_dict["result"]
-                        return result_dict
-                    data = data_dict["result"]
-
-                except Exception as e:
-                    result_dict["message"] = f"Failed to get page {page_number} of report. Check input parameters are valid. e = {e}"
+                if error is not None:
+                    result_dict["message"] = f"Failed to get page {page_number} of report. Check input parameters are valid. e = {error}"
                     return result_dict
-
-                # Try to parse current report page from xml to a dictionary
-                try:
-                    if data is None:
-                        raw_dict = {}
-                    else:
-                        raw_dict = xmltodict.parse(data) or {}
-                except Exception as e:
-                    result_dict["message"] = f"Failed to parse report page {page_number} to dict - e = {e}"
+                if data_dict["status"] != "success":
+                    result_dict["message"] = data_dict["result"]
                     return result_dict
+                records_count, raw_records, metadata = data_dict["records_count"], data_dict["records"], data_dict["metadata"]
+                timings["parse_seconds"] += data_dict["parse_seconds"]
+                for message in data_dict.get("errors", ()):
+                    W(message)
 
                 # Try to get tickets/records from current report page
                 try:
-                    try:
-                        raw_records = raw_dict["Records"]["Record"]
-                        num_raw_records = len(raw_records)
-                    except:
-                        num_raw_records = 0
+                    num_raw_records = len(raw_records)
 
                     # If no report records were found in the current
                     # page, assume all records have been found
                     if num_raw_records < 1:
                         result_dict["status"] = "success"
-                        if len(result_dict["records"]) < 1:
+                        if found < 1:
                             result_dict["message"] = "No report tickets found"
                         else:
                             result_dict["message"] = "Report retrieved"
@@ -801,22 +1108,46 @@ class ArcherAPISession:
                     result_dict["message"] = f"Failed to get tickets from report page {page_number} - {e}"
                     return result_dict
 
-                # Try to get field definitions for current report page
-                try:
-                    field_defs = raw_dict["Records"]["Metadata"]["FieldDefinitions"]["FieldDefinition"]
+                if page_number == 1:
+                    # Don't prefetch pages past the report's last one, or past max_count
+                    pager.stop_after((scan_limit - 1) // num_raw_records + 1)
+                    if records_count and records_count.isdigit():
+                        pager.stop_after((int(records_count) - 1) // num_raw_records + 1)
 
-                except Exception as e:
-                    result_dict["message"] = f"Failed to get field definitions for report page {page_number} - e = {e}"
-                    return result_dict
+                # Try to get field definitions from the first report page; every page has the same ones
+                if report_fields is None:
+                    try:
+                        report_fields = ReportFields(metadata["FieldDefinitions"]["FieldDefinition"])
+
+                    except Exception as e:
+                        result_dict["message"] = f"Failed to get field definitions for report page {page_number} - e = {e}"
+                        return result_dict
 
                 # Merge the field definitions with the record/ticket data for the current report page
-                merge_dict = self.merge_field_defs(field_defs, raw_records, max_count, total_count, page_number)
-                result_dict["records"].extend(merge_dict["records"])
-                total_count = len(result_dict["records"])
+                start = time.perf_counter()
+                merge_dict = self.merge_field_defs(report_fields, raw_records, scan_limit, total_count, page_number, data_dict.get("named"))
+                page_records = merge_dict["records"]
+                total_count += len(page_records)
+                result_dict["records_scanned"] = total_count
+                if matches is not None:
+                    page_records = [r for r in page_records if matches(r)]
+                    page_records = page_records[: max_count - found]
+                timings["merge_seconds"] += time.perf_counter() - start
+                found += len(page_records)
+                result_dict["records_found"] = found
+                if on_records is None:
+                    result_dict["records"].extend(page_records)
+                else:
+                    on_records(page_records)
+                if matches is not None and found >= max_count:
+                    result_dict["status"] = "success"
+                    result_dict["page_count"] = page_number
+                    result_dict["message"] = "Report retrieved - max results reached"
+                    return result_dict
                 if merge_dict["status"] == "max records reached":
                     result_dict["status"] = "success"
                     result_dict["page_count"] = page_number
-                    result_dict["message"] = merge_dict["message"]
+                    result_dict["message"] = merge_dict["message"] if matches is None else "Report retrieved - max scanned records reached"
                     return result_dict
                 elif merge_dict["status"] != "success":
                     result_dict["message"] = merge_dict["message"]
@@ -832,71 +1163,41 @@ class ArcherAPISession:
             result_dict["message"] = f"Failed while getting report page(s) - e = {e}"
             return result_dict
 
-    def merge_field_defs(self, field_defs, raw_records, max_count, total_count, page_number):
+        finally:
+            pager.close()
+            if converter is not None:
+                converter.close()
+                timings["fetch_seconds"] = pager.fetch_seconds
+            else:
+                timings["fetch_seconds"] = max(pager.fetch_seconds - timings["parse_seconds"], 0.0)
+
+    def merge_field_defs(self, field_defs, raw_records, max_count, total_count, page_number, named=None):
+        """Merges the report's field definitions (a list, or a ReportFields
+        index built once per report) into the page's records.  If the
+        records were already merged, e.g. by a worker process, `named` is
+        the number of named fields of each record.
+        """
         try:
             # Initialize result dictionary
             merge_dict = {"status": "failed", "message": "Failed - default message", "records": []}
 
             if not isinstance(raw_records, list):
                 raw_records = [raw_records]
+            report_fields = field_defs if isinstance(field_defs, ReportFields) else ReportFields(field_defs)
 
-            for raw_record in raw_records:
-                # Initialize field variables and increment the total record count
-                valid_name_count = 0
-                new_fields = []
-                total_count = total_count + 1
-
-                # Merge the field definitions into the current record
-                for field in raw_record["Field"]:
-                    try:
-                        field_id = int(field.get("@id"))
-                        field_name = None
-                        for field_def in field_defs:
-                            if field_id == int(field_def.get("@id")):
-                                field_name = str(field_def.get("@name"))
-                                break
-                        if field_name is not None:
-                            valid_name_count += 1
-                        field["@name"] = field_name
-                        field_type = int(field.get("@type"))
-                        if field_type == 4:
-                            value_list = field.get("ListValues", {}).get("ListValue", {})
-                            if value_list:
-                                if isinstance(value_list, dict):
-                                    value_list = [value_list]
-                                value_list = set(x.get("#text", "") for x in value_list)
-                                v = field.get("@value")
-                                if v:
-                                    value_list.add(v)
-                                field["multi_value"] = list(value_list)
-                                field["#text"] = ", ".join(field["multi_value"])
-                        elif field_type == 8:
-                            value_list = field.get("Users", {}).get("User", {})
-                            if value_list:
-                                if isinstance(value_list, dict):
-                                    value_list = [value_list]
-                                value_list = set([self.process_user_multivalue(x) for x in value_list])
-                                v = field.get("@value")
-                                if v:
-                                    value_list.add(v)
-                                field["multi_value"] = list(value_list)
-                                field["#text"] = ", ".join(field["multi_value"])
-                        elif field_type == 9:
-                            field["#text"] = field.get("Reference", {}).get("#text", "")
+            def on_error(field, e):
+                err = self._get_error_message_from_exception(e)
+                W(f"Failed to parse {field}: {err}")
 
-                    except Exception as e:
-                        err = self._get_error_message_from_exception(e)
-                        W(f"Failed to parse {field}: {err}")
-                        field["@name"] = None
-                    new_fields.append(field)
+            for i, raw_record in enumerate(raw_records):
+                total_count = total_count + 1
 
                 # If none of the name fields were merged, return fail
-                if valid_name_count < 1:
+                if (named[i] if named is not None else report_fields.merge(raw_record, on_error)) < 1:
                     merge_dict["message"] = "Failed to merge any field name(s). Check Archer report configuration"
                     return merge_dict
 
                 # Append merged record to the results record dictionary
-                raw_record["Field"] = new_fields
                 merge_dict["records"].append(raw_record)
 
                 # If the record count is reached, return
@@ -914,12 +1215,4 @@ class ArcherAPISession:
             return merge_dict
 
     def process_user_multivalue(self, x):
-        firstname = x.get("@firstName", "")
-        middlename = x.get("@middleName", "")
-        lastname = x.get("@lastName", "")
-        name = firstname
-        if middlename != "":
-            name = f"{name} {middlename}"
-        if lastname != "":
-            name = f"{name} {lastname}"
-        return name
+        return user_display_name(x)
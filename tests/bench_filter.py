@@ -0,0 +1,73 @@
+# File: bench_filter.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Times client-side results filters on synthetic records: the old
+filter_records loop against compile_record_filter, checking both return
+the same records.
+
+    python tests/bench_filter.py [records]
+"""
+
+import os
+import sys
+import time
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import legacy
+
+from archer_search import compile_record_filter
+
+
+CASES = [
+    ("and/contains, 2 keys", {"Field 3": "value 3", "Field 7": "7 OF"}, "and", "contains"),
+    ("or/equals, 2 keys", {"Field 5": "value 5 of 17", "Field 20": "none"}, "or", "equals"),
+    ("or/contains, 3 keys", {"Field 1": "of 42", "Field 9": "zzz", "Field 15": "99"}, "or", "contains"),
+    ("and/equals, 1 key", {"Field 11": "VALUE 11 OF 3"}, "and", "equals"),
+    ("and, non-string value", {"Field 2": "value", "Field 4": 4}, "and", "contains"),
+]
+
+
+def synthetic_records(count, fields=21):
+    return [
+        {
+            "@contentId": str(n),
+            "Field": [
+                {"@id": str(i), "@name": f"Field {i}", "#text": f"value {i} of {n % 100}" if (n + i) % 10 else None} for i in range(fields)
+            ],
+        }
+        for n in range(count)
+    ]
+
+
+def main(count=50000):
+    records = synthetic_records(count)
+    print(f"{count} records, {len(records[0]['Field'])} fields")
+    for label, conditions, operator, equality in CASES:
+        start = time.perf_counter()
+        before = legacy.filter_records(conditions, operator, equality, records)
+        old = time.perf_counter() - start
+
+        start = time.perf_counter()
+        passes = compile_record_filter(conditions, operator, equality)
+        after = [r for r in records if passes(r)]
+        new = time.perf_counter() - start
+
+        same = "same" if after == before else "DIFFERENT"
+        print(f"{label:24} {old:6.3f} s -> {new:6.3f} s  {len(after):6} records, {same}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
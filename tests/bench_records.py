@@ -0,0 +1,64 @@
+# File: bench_records.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Times converting ExecuteSearch records to dicts: the old tostring and
+xmltodict round trip against archer_records.
+
+    python tests/bench_records.py [records]
+"""
+
+import os
+import sys
+import time
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import legacy
+from lxml import etree
+
+from archer_records import FieldTable, convert_compact_record, convert_search_record
+
+
+FIELD_NAMES = {i: f"Field {i}" for i in range(1, 13)}
+
+
+def search_records(count):
+    fields = "".join(f'<Field id="{i}" type="1">value {i} &amp; more</Field>' for i in range(1, 10))
+    values = '<Field id="10" type="4"><ListValues><ListValue id="1">High</ListValue><ListValue id="2">Low</ListValue></ListValues></Field>'
+    record = f'<Record contentId="%d" levelId="3" moduleId="70">{fields}{values}<Field id="11" type="1"/></Record>'
+    return "<Records>" + "".join(record % n for n in range(count)) + "</Records>"
+
+
+def timed(label, func, xml):
+    elems = list(etree.fromstring(xml))
+    start = time.perf_counter()
+    func(elems)
+    elapsed = time.perf_counter() - start
+    print(f"{label:24} {elapsed:7.3f} s")
+    return elapsed
+
+
+def main(count=10000):
+    xml = search_records(count)
+    print(f"{count} records")
+    before = timed("tostring + xmltodict", lambda elems: legacy.convert_search_records(elems, FIELD_NAMES), xml)
+    after = timed("convert_search_record", lambda elems: [convert_search_record(e, FIELD_NAMES) for e in elems], xml)
+    table = FieldTable(FIELD_NAMES)
+    timed("convert_compact_record", lambda elems: [convert_compact_record(e, table) for e in elems], xml)
+    print(f"speedup {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,61 @@
+# File: bench_soap.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Times building SOAP requests and parsing responses, the old way against
+SoapOperation templates and the reused per-thread parser.
+
+    python tests/bench_soap.py [calls]
+"""
+
+import os
+import sys
+import timeit
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import legacy
+
+from archer_soap import SOAP_OPERATIONS, parse_untrusted_xml
+
+
+RESPONSE = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+    '<GetRecordByIdResponse xmlns="http://archer-tech.com/webservices/"><GetRecordByIdResult>'
+    "&lt;Record&gt;" + "&lt;Field id=&quot;1&quot; type=&quot;1&quot; value=&quot;x&quot; /&gt;" * 20 + "&lt;/Record&gt;"
+    "</GetRecordByIdResult></GetRecordByIdResponse></soap:Body></soap:Envelope>"
+)
+
+
+def per_call(func, calls):
+    return min(timeit.repeat(func, number=calls, repeat=5)) / calls * 1e6
+
+
+def main(calls=20000):
+    values = {"sessionToken": "0A1B2C3D", "moduleId": 421, "contentId": 100234}
+    op = SOAP_OPERATIONS["GetRecordById"]
+    pairs = [(p, str(values[p])) for p in op.params]
+
+    rows = [
+        ("build GetRecordById", lambda: legacy.render_envelope(op.name, pairs), lambda: op.render(values)),
+        ("parse GetRecordById response", lambda: legacy.parse_untrusted_xml(RESPONSE), lambda: parse_untrusted_xml(RESPONSE)),
+    ]
+    for label, old, new in rows:
+        before, after = per_call(old, calls), per_call(new, calls)
+        print(f"{label:32} {before:8.1f} us -> {after:8.1f} us  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,160 @@
+# File: legacy.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""The code paths the app used before they were optimized, kept so the tests
+can check the new ones still produce the same output and the benchmarks can
+time them side by side.
+"""
+
+from io import BytesIO
+
+from lxml import etree
+
+from archer_soap import ARCHER_MAP, NS_MAP, SOAPNS
+
+
+def build_envelope(operation, values):
+    """Builds a request envelope as an lxml tree, the way ArcherSOAP did
+    before SoapOperation templates.
+
+    operation, a string: the web service operation name
+    values, a list of (name, text) pairs: its parameters, in order
+    """
+    envelope = etree.Element(etree.QName(SOAPNS, "Envelope"), nsmap=NS_MAP)
+    document = etree.ElementTree(envelope)
+    body = etree.SubElement(envelope, etree.QName(SOAPNS, "Body"))
+    op = etree.SubElement(body, operation, nsmap=ARCHER_MAP)
+    for name, text in values:
+        etree.SubElement(op, name).text = text
+    return document
+
+
+def render_envelope(operation, values):
+    """Returns the request body the app used to post: the envelope tree,
+    pretty-printed.
+    """
+    return etree.tostring(build_envelope(operation, values), pretty_print=True)
+
+
+def parse_untrusted_xml(xml_data):
+    """Parses a response with a new hardened parser each time, as
+    archer_soap.parse_untrusted_xml did before it reused one per thread.
+    """
+    if isinstance(xml_data, str):
+        xml_data = xml_data.encode("utf-8")
+    if b"<!DOCTYPE" in xml_data.upper():
+        raise ValueError("Archer XML responses must not contain a DTD")
+    parser = etree.XMLParser(resolve_entities=False, no_network=True, load_dtd=False, huge_tree=False)
+    return etree.parse(BytesIO(xml_data), parser=parser)
+
+
+def convert_search_records(elems, field_names):
+    """Converts ExecuteSearch `Record` elements into record dicts the way
+    find_records did before archer_records: serialize them, re-parse with
+    xmltodict, then name the fields and fill in values lists.  A field that
+    fails to convert is dropped (it used to be logged too).
+    """
+    import xmltodict
+
+    recs = etree.Element("Records")
+    document = etree.ElementTree(recs)
+    for r in elems:
+        recs.append(r)
+    rec_xml = etree.tostring(document, pretty_print=True)
+
+    rec_dict = (elems and xmltodict.parse(rec_xml)) or {}
+    records = rec_dict.get("Records", {}).get("Record")
+    if not records:
+        return []
+
+    if not isinstance(records, list):
+        records = [records]
+
+    for r in records:
+        cur_fields = r.get("Field", [])
+        new_fields = []
+        for f in cur_fields:
+            try:
+                t = f.get("#text")
+                if t:
+                    f["@name"] = field_names.get(int(f["@id"]), f["@id"])
+                    new_fields.append(f)
+                elif f.get("@type") == "4":
+                    f["@name"] = field_names.get(int(f["@id"]), f["@id"])
+                    value_list = f.get("ListValues", {}).get("ListValue", {})
+                    if value_list:
+                        if isinstance(value_list, dict):
+                            value_list = [value_list]
+                        value_list = set(x.get("#text", "") for x in value_list)
+                        v = f.get("@value")
+                        if v:
+                            value_list.add(v)
+                        f["multi_value"] = list(value_list)
+                        f["#text"] = ", ".join(f["multi_value"])
+                    else:
+                        f["#text"] = None
+                    new_fields.append(f)
+            except Exception:
+                pass
+        r["Field"] = new_fields
+
+    return records
+
+
+def filter_records(results_filter_dict, results_filter_operator, results_filter_equality, records):
+    """Client-side results filter as ArcherConnector.filter_records applied
+    it before archer_search.compile_record_filter.
+    """
+    filtered_records = []
+
+    if results_filter_operator == "and":
+        and_dict_len = len(results_filter_dict)
+        for record in records:
+            and_dict_count = 0
+            for field in record["Field"]:
+                for k, v in results_filter_dict.items():
+                    try:
+                        if results_filter_equality == "equals":
+                            if field["@name"] == k and v.lower() == field["#text"].lower():
+                                and_dict_count += 1
+                        else:
+                            if field["@name"] == k and v.lower() in field["#text"].lower():
+                                and_dict_count += 1
+                    except Exception:
+                        continue
+            if and_dict_count >= and_dict_len:
+                filtered_records.append(record)
+
+    elif results_filter_operator == "or":
+        for record in records:
+            next_record = False
+            for field in record["Field"]:
+                for k, v in results_filter_dict.items():
+                    try:
+                        if results_filter_equality == "equals":
+                            if field["#text"] and field["@name"] == k and v.lower() == field["#text"].lower():
+                                filtered_records.append(record)
+                                next_record = True
+                                break
+                        else:
+                            if field["#text"] and field["@name"] == k and v.lower() in field["#text"].lower():
+                                filtered_records.append(record)
+                                next_record = True
+                                break
+                    except Exception:
+                        continue
+                if next_record:
+                    break
+
+    return filtered_records
@@ -0,0 +1,92 @@
+# File: test_compact_records.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Search records held in compact form (archer_records.FieldTable, CompactRecord)."""
+
+import pytest
+from lxml import etree
+
+from archer_records import CompactRecord, FieldTable, as_record_dict, convert_compact_record, convert_search_record
+
+
+FIELD_NAMES = {1: "Title", 4: "Severity"}
+
+
+def record_xml(content_id, title, severities):
+    list_values = "".join(f'<ListValue id="{7 + i}">{s}</ListValue>' for i, s in enumerate(severities))
+    return (
+        f'<Record contentId="{content_id}" levelId="3" moduleId="70"><Field id="1" type="1">{title}</Field>'
+        f'<Field id="4" type="4"><ListValues>{list_values}</ListValues></Field></Record>'
+    )
+
+
+def convert(xml, table):
+    return convert_compact_record(etree.fromstring(xml), table)
+
+
+def test_records_share_the_field_table():
+    table = FieldTable(FIELD_NAMES)
+
+    first = convert(record_xml(1, "a", ["High", "Low"]), table)
+    second = convert(record_xml(2, "b", ["High", "Low"]), table)
+
+    assert isinstance(first, CompactRecord)
+    assert table.names == ["Title", "Severity"]
+    assert first.positions == second.positions == (0, 1)
+    # Record attribute names and identical values list values are held once
+    assert first.keys is second.keys
+    assert first.values[1] is second.values[1]
+    assert first.values[0] == "a"
+
+
+def test_attributes_and_texts():
+    table = FieldTable(FIELD_NAMES)
+    record = convert(record_xml(1, "Phishing", ["High", "Low", "High"]), table)
+
+    assert record.get("@contentId") == "1"
+    assert record.get("@missing", "none") == "none"
+    assert record.get("Field") is None
+    assert record.texts() == [("Title", "Phishing"), ("Severity", "High, Low")]
+
+
+def test_to_dict_gives_the_search_record_dict():
+    table = FieldTable(FIELD_NAMES)
+    xmls = [
+        record_xml(1, "Phishing &amp; malware", ["High"]),
+        record_xml(2, "x", []),
+        '<Record contentId="3"><Field id="1" type="1">  </Field><Field id="9" type="2">42</Field><Field id="4" type="4" value="Other"/></Record>',
+    ]
+
+    for xml in xmls:
+        record = convert(xml, table)
+        assert isinstance(record, CompactRecord)
+        assert as_record_dict(record) == convert_search_record(etree.fromstring(xml), FIELD_NAMES)
+
+
+@pytest.mark.parametrize(
+    "xml",
+    [
+        # Mixed text, a child other than Field, and values list or field
+        # markup the compact form can't reproduce
+        '<Record contentId="1">text<Field id="1" type="1">a</Field></Record>',
+        '<Record contentId="1"><Field id="1" type="1">a</Field><Record contentId="2"/></Record>',
+        '<Record contentId="1"><Field id="4" type="4"><ListValues><ListValue id="7"><b>High</b></ListValue></ListValues></Field></Record>',
+        '<Record contentId="1"><Field id="1" type="1">a <b>bold</b> b</Field></Record>',
+    ],
+)
+def test_records_the_compact_form_cant_hold_stay_dicts(xml):
+    record = convert(xml, FieldTable(FIELD_NAMES))
+
+    assert record == convert_search_record(etree.fromstring(xml), FIELD_NAMES)
+    assert as_record_dict(record) is record
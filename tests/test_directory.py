@@ -0,0 +1,86 @@
+# File: test_directory.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Users/Groups name resolution (archer_directory.ArcherDirectory)."""
+
+from archer_cache import SchemaCache
+from archer_directory import ArcherDirectory
+
+
+class FakeSOAP:
+    """SOAP lookups by exact name, recording every call."""
+
+    def __init__(self, users=None, groups=None):
+        self.users = users or {}
+        self.groups = groups or {}
+        self.calls = []
+
+    def find_user(self, name):
+        self.calls.append(("user", name))
+        return self.users.get(name)
+
+    def find_group(self, name):
+        self.calls.append(("group", name))
+        return self.groups.get(name)
+
+    def find_domain_user(self, name):
+        self.calls.append(("domain_user", name))
+
+
+class FakeSession:
+    def __init__(self, users, groups, asoap=None):
+        self.users = users
+        self.groups = groups
+        self.asoap = asoap or FakeSOAP()
+        self.schema_cache = SchemaCache()
+
+    def get_users(self):
+        return self.users
+
+    def get_groups(self):
+        return self.groups
+
+
+USERS = [{"Id": 11, "UserName": "JDoe"}, {"Id": 12, "UserName": "asmith"}, {"Id": 13, "UserName": "jdoe"}, {"Id": 14}]
+GROUPS = [{"Id": 21, "Name": "SOC Analysts"}, {"Id": 22, "Name": "Incident Response"}, {"Id": 23, "Name": "soc analysts"}, {"Id": 24}]
+
+
+def test_preload_matches_users_and_groups_ignoring_case():
+    session = FakeSession(USERS, GROUPS)
+    directory = ArcherDirectory(session, preload=True, max_workers=1)
+
+    resolved = directory.resolve_many(["jdoe", "ASMITH", "soc analysts", "INCIDENT RESPONSE"])
+
+    assert resolved == {"jdoe": (11, None), "ASMITH": (12, None), "soc analysts": (None, 21), "INCIDENT RESPONSE": (None, 22)}
+    hits = {("user", "jdoe"), ("user", "ASMITH"), ("group", "soc analysts"), ("group", "INCIDENT RESPONSE")}
+    assert not hits.intersection(session.asoap.calls)
+
+
+def test_preload_miss_falls_back_to_soap():
+    session = FakeSession(USERS, GROUPS, FakeSOAP(users={"newhire": 15}, groups={"New Team": 25}))
+    directory = ArcherDirectory(session, preload=True, max_workers=1)
+
+    assert directory.resolve_many(["newhire", "New Team"]) == {"newhire": (15, None), "New Team": (None, 25)}
+    assert ("user", "newhire") in session.asoap.calls
+    assert ("group", "New Team") in session.asoap.calls
+
+
+def test_without_preload_uses_soap_and_caches():
+    session = FakeSession(USERS, GROUPS, FakeSOAP(users={"jdoe": 11}, groups={"SOC Analysts": 21}))
+    directory = ArcherDirectory(session, max_workers=4)
+
+    assert directory.resolve_many(["jdoe", "SOC Analysts", "jdoe"]) == {"jdoe": (11, None), "SOC Analysts": (None, 21)}
+    calls = len(session.asoap.calls)
+    assert directory.resolve_many(["jdoe", "SOC Analysts"]) == {"jdoe": (11, None), "SOC Analysts": (None, 21)}
+    assert len(session.asoap.calls) == calls
@@ -0,0 +1,132 @@
+# File: test_export.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Records streamed to a JSONL or CSV export file (archer_export.RecordWriter)."""
+
+import csv
+import json
+
+import pytest
+from lxml import etree
+
+from archer_export import RecordWriter
+from archer_records import FieldTable, convert_compact_record, convert_search_record
+
+
+FIELD_NAMES = {1: "Title", 2: "Severity", 3: "Notes"}
+
+
+def record_xml(i, notes=None):
+    xml = (
+        f'<Record contentId="{1000 + i}" levelId="3" moduleId="70"><Field id="1" type="1">Title, "{i}"</Field>'
+        f'<Field id="2" type="4"><ListValues><ListValue id="7">High</ListValue><ListValue id="8">Low</ListValue></ListValues></Field>'
+    )
+    if notes is not None:
+        xml += f'<Field id="3" type="1">{notes}</Field>'
+    return xml + "</Record>"
+
+
+def record(i, notes=None):
+    return convert_search_record(etree.fromstring(record_xml(i, notes)), FIELD_NAMES)
+
+
+def compact_record(i, table, notes=None):
+    return convert_compact_record(etree.fromstring(record_xml(i, notes)), table)
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_jsonl_has_one_record_dict_per_line(tmp_path):
+    path = tmp_path / "export.jsonl"
+    table = FieldTable(FIELD_NAMES)
+
+    with RecordWriter(str(path)) as writer:
+        assert writer.write_all([record(1), compact_record(2, table)]) == 2
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [record(1), record(2)]
+    assert writer.count == 2
+
+
+def test_csv_has_a_column_per_attribute_and_field(tmp_path):
+    path = tmp_path / "export.csv"
+
+    with RecordWriter(str(path), "csv") as writer:
+        writer.write(record(1))
+
+    assert read_csv(path) == [
+        ["@contentId", "@levelId", "@moduleId", "@parentId", "Title", "Severity"],
+        ["1001", "3", "70", "", 'Title, "1"', "High, Low"],
+    ]
+
+
+def test_csv_header_takes_columns_that_turn_up_later(tmp_path):
+    path = tmp_path / "export.csv"
+    table = FieldTable(FIELD_NAMES)
+
+    with RecordWriter(str(path), "csv") as writer:
+        writer.write(record(1))
+        writer.write(compact_record(2, table, notes="café"))
+
+    header, first, second = read_csv(path)
+    assert header[-1] == "Notes"
+    assert len(first) == len(header) - 1
+    assert second == ["1002", "3", "70", "", 'Title, "2"', "High, Low", "café"]
+
+
+def test_csv_keeps_the_first_field_of_a_name(tmp_path):
+    path = tmp_path / "export.csv"
+    duplicated = record(1)
+    duplicated["Field"].append({"@id": "9", "@name": "Title", "#text": "second"})
+    duplicated["Field"].append({"@id": "10", "@name": None, "#text": "unnamed"})
+
+    with RecordWriter(str(path), "csv") as writer:
+        writer.write(duplicated)
+
+    header, row = read_csv(path)
+    assert header.count("Title") == 1
+    assert row[header.index("Title")] == 'Title, "1"'
+    assert "unnamed" not in row
+
+
+def test_csv_rows_are_buffered_beside_the_export_and_removed(tmp_path):
+    path = tmp_path / "export.csv"
+    writer = RecordWriter(str(path), "csv")
+    writer.write(record(1))
+
+    assert not path.exists()
+    assert len(list(tmp_path.iterdir())) == 1
+
+    writer.close()
+    writer.close()
+    assert list(tmp_path.iterdir()) == [path]
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_preview_keeps_the_first_records_as_dicts(tmp_path, fmt):
+    table = FieldTable(FIELD_NAMES)
+
+    with RecordWriter(str(tmp_path / f"export.{fmt}"), fmt, preview_size=2) as writer:
+        writer.write_all(compact_record(i, table) for i in range(1, 6))
+
+    assert writer.preview == [record(1), record(2)]
+    assert writer.count == 5
+
+
+def test_unknown_format_is_refused(tmp_path):
+    with pytest.raises(ValueError, match="Unknown export format 'xml'"):
+        RecordWriter(str(tmp_path / "export.xml"), "xml")
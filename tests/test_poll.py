@@ -0,0 +1,166 @@
+# File: test_poll.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Scheduled polling from a tracking ID watermark (ArcherConnector._handle_on_poll)."""
+
+import json
+
+import pytest
+
+import archer_consts as consts
+from archer_search import SearchPlan, SearchResults
+
+
+phantom = pytest.importorskip("phantom.app")
+pytest.importorskip("encryption_helper")
+from phantom.action_result import ActionResult
+
+from archer_connector import ArcherConnector
+
+
+PAGE_SIZE = 3
+CONFIG = {
+    "endpoint_url": "https://archer",
+    "instance_name": "Default",
+    "username": "user",
+    "password": "pass",
+    "cef_mapping": json.dumps({"application": "Incidents", "tracking": "Incident ID", "Title": "title"}),
+}
+
+
+def tracking_id(record):
+    return int(record["Field"][0]["#text"])
+
+
+class Proxy:
+    """Records of Incidents, Incident ID i with content ID 1000 + i,
+    searched the way ArcherAPISession.iter_records does; remembers every
+    search.
+    """
+
+    def __init__(self, count):
+        self.records = [
+            {"@contentId": str(1000 + i), "Field": [{"@name": "Incident ID", "#text": str(i)}, {"@name": "Title", "#text": f"Title {i}"}]}
+            for i in range(1, count + 1)
+        ]
+        self.excluded_fields = []
+        self.planned = 0
+        self.searches = []
+
+    def select_fields(self, app, names, ignore_missing=False):
+        return {100: "Incident ID", 101: "Title"}
+
+    def plan_field_search(self, app, field_name, value, comparison=None):
+        self.planned += 1
+        return SearchPlan(100, "numeric", value, comparison, "type 6 field")
+
+    def iter_records(self, app, field_name, value, max_count, comparison=None, sort=None, page=1, page_size=None, fields=None, plan=None):
+        self.searches.append({"page": page, "sort": sort, "plan": plan and (plan.operator, plan.value)})
+        records = self.records
+        if plan is not None and plan.value is not None:
+            records = [r for r in records if tracking_id(r) > plan.value]
+        if sort == consts.ARCHER_SORT_TYPE_DESCENDING:
+            records = records[::-1]
+        results = SearchResults()
+        results.count = len(records)
+        results.records = iter(records[(page - 1) * page_size : page * page_size][:max_count])
+        return results
+
+
+@pytest.fixture
+def poll():
+    def run(proxy, state=None, poll_now=False, container_count=None):
+        connector = ArcherConnector()
+        connector.POLLING_PAGE_SIZE = PAGE_SIZE
+        connector.proxy = proxy
+        connector._state = {"Incidents": state} if state is not None else {}
+        connector.containers = []
+        connector.get_config = lambda: CONFIG
+        connector.is_poll_now = lambda: poll_now
+        connector.get_state_file_path = lambda: "/tmp"
+        connector.save_progress = connector.send_progress = connector.debug_print = lambda *args: None
+
+        def save_container(container):
+            connector.containers.append(container["data"]["archer_content_id"] - 1000)
+            return phantom.APP_SUCCESS, "", len(connector.containers)
+
+        connector.save_container = save_container
+        connector.save_artifact = lambda artifact: (phantom.APP_SUCCESS, "", 1)
+        param = {"container_count": container_count} if poll_now else {}
+        action_result = ActionResult(dict(param))
+        status = connector._handle_on_poll(action_result, param)
+        assert status == phantom.APP_SUCCESS
+        return connector
+
+    return run
+
+
+def test_first_poll_starts_from_the_lowest_tracking_id(poll):
+    proxy = Proxy(10)
+
+    connector = poll(proxy)
+
+    assert connector.containers == [1, 2, 3]
+    assert proxy.searches == [{"page": 1, "sort": consts.ARCHER_SORT_TYPE_ASCENDING, "plan": ("Equals", None)}]
+    assert connector._state["Incidents"] == {"max_content_id": 1003, "tracking_watermark": 3}
+
+
+def test_poll_resumes_past_the_saved_watermark(poll):
+    proxy = Proxy(10)
+
+    connector = poll(proxy, {"max_content_id": 1003, "tracking_watermark": 3})
+
+    assert connector.containers == [4, 5, 6]
+    assert proxy.searches[0]["plan"] == ("GreaterThan", 3)
+    assert connector._state["Incidents"] == {"max_content_id": 1006, "tracking_watermark": 6}
+    # The field was planned once, and that plan reused for every page
+    assert proxy.planned == 1
+
+
+def test_watermark_stops_at_the_last_ingested_record(poll):
+    proxy = Proxy(10)
+
+    # Records 3 and 4 were ingested before the watermark was saved
+    connector = poll(proxy, {"max_content_id": 1004, "tracking_watermark": 2})
+
+    assert connector.containers == [5, 6, 7]
+    assert [s["plan"] for s in proxy.searches] == [("GreaterThan", 2), ("GreaterThan", 5)]
+    # The limit was reached on record 7, with record 8 still on the page
+    assert connector._state["Incidents"] == {"max_content_id": 1007, "tracking_watermark": 7}
+    assert proxy.planned == 1
+
+
+def test_legacy_page_state_migrates_to_a_watermark(poll):
+    proxy = Proxy(10)
+
+    connector = poll(proxy, {"max_content_id": 1002, "last_page": 5})
+
+    # Searched from the start, not from the saved page; ingested records are skipped
+    assert [s["page"] for s in proxy.searches] == [1, 1]
+    assert connector.containers == [3, 4, 5]
+    assert connector._state["Incidents"] == {"max_content_id": 1005, "tracking_watermark": 5}
+
+
+def test_poll_now_pages_newest_first_and_saves_nothing(poll):
+    proxy = Proxy(10)
+
+    connector = poll(proxy, {"max_content_id": 1005, "tracking_watermark": 5}, poll_now=True, container_count=5)
+
+    assert connector.containers == [10, 9, 8, 7, 6]
+    assert [(s["page"], s["sort"], s["plan"]) for s in proxy.searches] == [
+        (1, consts.ARCHER_SORT_TYPE_DESCENDING, None),
+        (2, consts.ARCHER_SORT_TYPE_DESCENDING, None),
+    ]
+    assert proxy.planned == 0
+    assert connector._state["Incidents"] == {"max_content_id": 1005, "tracking_watermark": 5}
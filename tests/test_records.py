@@ -0,0 +1,126 @@
+# File: test_records.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Converting record elements directly must give the dicts the app used to
+get by serializing them and re-parsing with xmltodict.
+"""
+
+import legacy
+import pytest
+from lxml import etree
+
+from archer_records import FieldTable, as_record_dict, convert_compact_record, convert_search_record, element_to_dict
+
+
+xmltodict = pytest.importorskip("xmltodict")
+
+FIELD_NAMES = {1: "Title", 2: "Empty", 3: "Blank", 4: "Severity", 5: "Category", 6: "Tags", 7: "Notes"}
+
+# Text with entities and character references, empty and blank fields, a
+# field missing from FIELD_NAMES, values lists with several, duplicate,
+# empty, one or no values, mixed text, and a nested child record
+SEARCH_RECORDS = """<Records>
+<Record contentId="101" levelId="3" moduleId="70">
+  <Field id="1" type="1">Phishing &amp; malware &lt;urgent&gt; caf&#233; &#x2603;</Field>
+  <Field id="2" type="1"></Field>
+  <Field id="3" type="1">   </Field>
+  <Field id="4" type="4" value="High"><ListValues><ListValue id="7" displayName="High">High</ListValue><ListValue id="8">Low</ListValue><ListValue id="9">Low</ListValue></ListValues></Field>
+  <Field id="5" type="4"><ListValues><ListValue id="10">R&amp;D</ListValue></ListValues></Field>
+  <Field id="6" type="4"/>
+  <Field id="99" type="2">42</Field>
+  <Field id="7" type="1">before <b>bold</b> after &amp; more</Field>
+</Record>
+<Record contentId="102" levelId="3" moduleId="70">
+  <Field id="1" type="1">x</Field>
+  <Field id="4" type="4"><ListValues><ListValue id="7"/><ListValue id="8">Low</ListValue></ListValues></Field>
+</Record>
+<Record contentId="103" levelId="3" moduleId="70">
+  <Field id="1" type="1">parent</Field>
+  <Field id="7" type="1">notes</Field>
+  <Record contentId="104" levelId="4" moduleId="70"><Field id="1" type="1">child</Field><Field id="2" type="1">y</Field></Record>
+</Record>
+</Records>"""
+
+
+def record_elements(xml=SEARCH_RECORDS):
+    return list(etree.fromstring(xml))
+
+
+def unordered_values(records):
+    """The old code joined values list texts from a set, in no set order;
+    sorts them so the two outputs can be compared.
+    """
+    for record in records:
+        for field in record["Field"]:
+            if "multi_value" in field:
+                field["multi_value"] = sorted(field["multi_value"])
+                field["#text"] = ", ".join(field["multi_value"])
+    return records
+
+
+def test_convert_search_record_matches_xmltodict():
+    old = legacy.convert_search_records(record_elements(), FIELD_NAMES)
+    new = [convert_search_record(elem, FIELD_NAMES) for elem in record_elements()]
+
+    assert len(new) == 3
+    assert unordered_values(new) == unordered_values(old)
+
+
+def test_compact_record_matches_xmltodict():
+    table = FieldTable(FIELD_NAMES)
+    old = legacy.convert_search_records(record_elements(), FIELD_NAMES)
+    new = [as_record_dict(convert_compact_record(elem, table)) for elem in record_elements()]
+
+    assert unordered_values(new) == unordered_values(old)
+
+
+def test_values_list_keeps_first_seen_order():
+    record = convert_search_record(record_elements()[0], FIELD_NAMES)
+    severity = next(f for f in record["Field"] if f["@name"] == "Severity")
+
+    assert severity["multi_value"] == ["High", "Low"]
+    assert severity["#text"] == "High, Low"
+
+
+def test_single_field_record_keeps_its_field():
+    # xmltodict returned a lone Field as a dict, which the old loop skipped
+    xml = '<Records><Record contentId="1"><Field id="1" type="1">solo</Field></Record></Records>'
+
+    assert legacy.convert_search_records(record_elements(xml), FIELD_NAMES)[0]["Field"] == []
+    assert convert_search_record(record_elements(xml)[0], FIELD_NAMES)["Field"] == [
+        {"@id": "1", "@type": "1", "#text": "solo", "@name": "Title"}
+    ]
+
+
+def test_empty_values_list_is_kept():
+    # An empty ListValues made the old code fail on that field and drop it;
+    # it is now kept without text, like a values list with no ListValues
+    xml = '<Records><Record contentId="1"><Field id="1" type="1">x</Field><Field id="6" type="4" value="Blue"><ListValues/></Field></Record></Records>'
+    tags = {"@id": "6", "@type": "4", "@value": "Blue", "ListValues": None, "@name": "Tags", "#text": None}
+
+    assert [f["@id"] for f in legacy.convert_search_records(record_elements(xml), FIELD_NAMES)[0]["Field"]] == ["1"]
+    assert convert_search_record(record_elements(xml)[0], FIELD_NAMES)["Field"][1] == tags
+
+
+@pytest.mark.parametrize(
+    "xml",
+    [
+        '<Record a="1">t1<x y="2">v &amp; w</x>t2<x>z</x><!-- c --><e/><n><m>q</m></n>  tail </Record>',
+        "<Record><Field id='1' value='&lt;p&gt;x&lt;/p&gt;'/><Field id='2'>caf&#233;</Field></Record>",
+        "<Record>  only text  </Record>",
+        "<Record/>",
+    ],
+)
+def test_element_to_dict_matches_xmltodict(xml):
+    assert element_to_dict(etree.fromstring(xml), force_list=()) == xmltodict.parse(xml)["Record"]
@@ -0,0 +1,96 @@
+# File: test_references.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Cross-reference values (ArcherAPISession.get_reference_values)."""
+
+import json
+
+import pytest
+
+import archer_utils
+
+
+class Response:
+    status_code = 200
+    reason = "OK"
+
+    def __init__(self, body):
+        self.content = json.dumps(body).encode()
+
+    def raise_for_status(self):
+        pass
+
+
+class Transport:
+    """REST lookups of content IDs and of the records reference fields can
+    link to, recording every URL requested.
+    """
+
+    def __init__(self, content_ids, referenced):
+        self.content_ids = content_ids
+        self.referenced = referenced
+        self.urls = []
+
+    def request(self, method, url, headers=None, json=None):
+        self.urls.append(url)
+        path = url.split("/api/core/content/", 1)[1]
+        if path.startswith("referencefield/"):
+            return Response([{"IsSuccessful": True, "RequestedObject": record} for record in self.referenced])
+        return Response({"IsSuccessful": int(path) in self.content_ids})
+
+
+class Connector:
+    sessionToken = "token"
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def make(content_ids, referenced):
+        transport = Transport(content_ids, referenced)
+        monkeypatch.setattr(archer_utils, "ArcherTransport", lambda **kwargs: transport)
+        return archer_utils.ArcherAPISession("https://archer", "user", "pass", "Default", None, True, Connector())
+
+    return make
+
+
+# Sequential ID 210036 is also the content ID of another record
+REFERENCED = [{"Id": 210036, "SequentialId": 7}, {"Id": 210040, "SequentialId": 8}, {"Id": 5000, "SequentialId": 210036}]
+CONTENT_IDS = {210036, 210040, 5000}
+
+
+def test_content_id_wins_over_a_colliding_sequential_id(session):
+    asession = session(CONTENT_IDS, REFERENCED)
+
+    assert asession.get_reference_values(300, "210036") == 210036
+
+
+def test_content_ids_do_not_list_the_referenced_records(session):
+    asession = session(CONTENT_IDS, REFERENCED)
+
+    assert asession.get_reference_values(300, "210036, 210040") == [210036, 210040]
+    assert not [url for url in asession.transport.urls if "referencefield" in url]
+
+
+def test_sequential_ids_are_resolved(session):
+    asession = session(CONTENT_IDS, REFERENCED)
+
+    assert asession.get_reference_values(300, [7, 210040, 8]) == [210036, 210040, 210040]
+    assert sum("referencefield" in url for url in asession.transport.urls) == 1
+
+
+def test_unknown_reference_fails(session):
+    asession = session(CONTENT_IDS, REFERENCED)
+
+    with pytest.raises(Exception, match="Failed to set Cross-Reference field 300/val:99"):
+        asession.get_reference_values(300, 99)
@@ -0,0 +1,192 @@
+# File: test_report.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Report pages streamed from SearchRecordsByReport (archer_report, ArcherAPISession.get_report_by_id)."""
+
+from xml.sax.saxutils import escape
+
+import pytest
+from lxml import etree
+
+import archer_utils
+from archer_soap import MAX_XML_RESPONSE_BYTES
+
+
+SOAPNS = "http://schemas.xmlsoap.org/soap/envelope/"
+ARCHERNS = "http://archer-tech.com/webservices/"
+METADATA = (
+    "<Metadata><FieldDefinitions>"
+    '<FieldDefinition id="100" guid="g100" name="Incident ID" alias="Incident_ID" />'
+    '<FieldDefinition id="101" guid="g101" name="Description" alias="Description" />'
+    "</FieldDefinitions></Metadata>"
+)
+
+
+def report_record(i, text="details"):
+    return (
+        f'<Record contentId="{1000 + i}" levelId="60" moduleId="70">'
+        f'<Field id="100" type="6">{i}</Field><Field id="101" type="1">{text}</Field></Record>'
+    )
+
+
+def named_fields(record):
+    return {field["@name"]: field.get("#text") for field in record["Field"]}
+
+
+class Response:
+    """A streamed response, remembering how many chunks were read."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, size):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class Transport:
+    """Answers SearchRecordsByReport with `pages(page number)`, an iterable
+    of chunks of the escaped inner document, or a SOAP fault if it is a string.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.responses = []
+
+    def post(self, url, data=None, headers=None, stream=False):
+        body = etree.fromstring(data)
+        page = int(body.find(f".//{{{ARCHERNS}}}pageNumber").text)
+        inner = self.pages(page)
+        if isinstance(inner, str):
+            chunks = [
+                f"<soap:Envelope xmlns:soap='{SOAPNS}'><soap:Body><soap:Fault><faultstring>{inner}</faultstring></soap:Fault></soap:Body></soap:Envelope>".encode()
+            ]
+        else:
+            chunks = self._envelope(inner)
+        response = Response(chunks)
+        self.responses.append(response)
+        return response
+
+    def _envelope(self, inner):
+        yield (
+            f"<soap:Envelope xmlns:soap='{SOAPNS}'><soap:Body><SearchRecordsByReportResponse xmlns='{ARCHERNS}'><SearchRecordsByReportResult>"
+        ).encode()
+        for piece in inner:
+            yield escape(piece).encode()
+        yield b"</SearchRecordsByReportResult></SearchRecordsByReportResponse></soap:Body></soap:Envelope>"
+
+
+class Connector:
+    sessionToken = "token"
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def make(pages):
+        transport = Transport(pages)
+        monkeypatch.setattr(archer_utils, "ArcherTransport", lambda **kwargs: transport)
+        return archer_utils.ArcherAPISession("https://archer", "user", "pass", "Default", None, True, Connector())
+
+    return make
+
+
+def report_pages(total, page_size, text="details", metadata_pages=None):
+    """Every page carries the field definitions, or only the first `metadata_pages`."""
+
+    def pages(page):
+        first = (page - 1) * page_size
+        yield f'<Records count="{total}">'
+        if metadata_pages is None or page <= metadata_pages:
+            yield METADATA
+        for i in range(first + 1, min(first + page_size, total) + 1):
+            yield report_record(i, text)
+        yield "</Records>"
+
+    return pages
+
+
+def test_report_pages_are_merged_in_order(session):
+    asession = session(report_pages(25, 10))
+
+    result = asession.get_report_by_id("guid", max_count=100, max_pages=10)
+
+    assert result["status"] == "success"
+    assert result["page_count"] == 3
+    assert [r["@contentId"] for r in result["records"]] == [str(1000 + i) for i in range(1, 26)]
+    assert named_fields(result["records"][0]) == {"Incident ID": "1", "Description": "details"}
+    # The count on page 1 tells the pager there is no page 4 to fetch
+    assert len(asession.transport.responses) == 3
+
+
+def test_large_report_page_streams_past_the_buffered_limit(session):
+    text = "x" * 4096
+    page_size = MAX_XML_RESPONSE_BYTES // len(text) + 100
+    asession = session(report_pages(page_size, page_size, text))
+
+    result = asession.get_report_by_id("guid", max_count=page_size, max_pages=1)
+
+    assert result["status"] == "success", result["message"]
+    assert result["records_found"] == page_size
+    assert named_fields(result["records"][-1]) == {"Incident ID": str(page_size), "Description": text}
+
+
+def test_report_records_arrive_while_the_page_streams_in(session):
+    asession = session(report_pages(500, 500))
+    response_read = []
+
+    for elem in asession.asoap.iter_report("guid", 1):
+        if elem.tag == "Record":
+            response_read.append(asession.transport.responses[0].read)
+            break
+
+    assert response_read[0] < 10
+    assert asession.transport.responses[0].closed
+
+
+def test_report_fault_is_the_message(session):
+    asession = session(lambda page: "Report not found")
+
+    result = asession.get_report_by_id("guid", max_count=100, max_pages=10)
+
+    assert result["status"] == "failed"
+    assert result["message"] == "Report not found"
+
+
+@pytest.mark.parametrize(("max_count", "metadata_pages"), [(100, None), (15, None), (100, 1)])
+def test_worker_processes_give_the_same_report(session, max_count, metadata_pages):
+    expected = session(report_pages(45, 10)).get_report_by_id("guid", max_count=max_count, max_pages=10)
+    asession = session(report_pages(45, 10, metadata_pages=metadata_pages))
+
+    result = asession.get_report_by_id("guid", max_count=max_count, max_pages=10, processes=2)
+
+    assert result["status"] == expected["status"] == "success"
+    assert result["page_count"] == expected["page_count"]
+    assert result["records"] == expected["records"]
+    assert len(result["records"]) == min(max_count, 45)
+
+
+def test_worker_processes_report_a_page_fault(session):
+    def pages(page):
+        return "Report page unavailable" if page == 2 else report_pages(45, 10)(page)
+
+    result = session(pages).get_report_by_id("guid", max_count=100, max_pages=10, processes=2)
+
+    assert result["status"] == "failed"
+    assert result["message"] == "Report page unavailable"
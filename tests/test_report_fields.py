@@ -0,0 +1,152 @@
+# File: test_report_fields.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Report field definitions merged into records (archer_records.ReportFields, ArcherAPISession.merge_field_defs)."""
+
+import pytest
+
+import archer_utils
+from archer_records import ReportFields
+
+
+FIELD_DEFS = [
+    {"@id": "100", "@name": "Incident ID", "@type": "6"},
+    {"@id": "101", "@name": "Severity", "@type": "4"},
+    {"@id": "102", "@name": "Owner", "@type": "8"},
+    {"@id": "103", "@name": "Related", "@type": "9"},
+    {"@id": "100", "@name": "Duplicate", "@type": "6"},
+    {"@id": "none", "@name": "Broken"},
+]
+
+
+def report_record(i):
+    return {
+        "@contentId": str(1000 + i),
+        "Field": [
+            {"@id": "100", "@type": "6", "#text": str(i)},
+            {
+                "@id": "101",
+                "@type": "4",
+                "@value": "Other",
+                "ListValues": {"ListValue": [{"#text": "High"}, {"#text": "High"}, {"#text": "Low"}]},
+            },
+            {"@id": "102", "@type": "8", "Users": {"User": {"@firstName": "Jane", "@middleName": "", "@lastName": "Doe"}}},
+            {"@id": "103", "@type": "9", "Reference": [{"#text": "INC-1"}, "INC-2"]},
+            {"@id": "999", "@type": "1", "#text": "unknown"},
+        ],
+    }
+
+
+def names_and_texts(record):
+    return [(field["@name"], field.get("#text")) for field in record["Field"]]
+
+
+def test_fields_are_named_and_their_values_joined():
+    record = report_record(1)
+
+    assert ReportFields(FIELD_DEFS).merge(record) == 4
+    assert names_and_texts(record) == [
+        ("Incident ID", "1"),
+        ("Severity", "High, Low, Other"),
+        ("Owner", "Jane Doe"),
+        ("Related", "INC-1, INC-2"),
+        (None, "unknown"),
+    ]
+    assert record["Field"][1]["multi_value"] == ["High", "Low", "Other"]
+
+
+def test_first_definition_of_an_id_wins_and_bad_ones_are_skipped():
+    report_fields = ReportFields(FIELD_DEFS)
+
+    assert len(report_fields) == 4
+    assert report_fields.by_id[100] == ("Incident ID", "6")
+
+
+def test_single_definition_dict():
+    assert ReportFields({"@id": "100", "@name": "Incident ID"}).by_id == {100: ("Incident ID", None)}
+
+
+def test_unreadable_field_is_unnamed_and_reported():
+    record = {"Field": [{"@id": "100", "@type": "6", "#text": "1"}, {"@id": "101", "@type": "x"}]}
+    errors = []
+
+    ReportFields(FIELD_DEFS).merge(record, lambda field, e: errors.append(field["@id"]))
+
+    assert [field["@name"] for field in record["Field"]] == ["Incident ID", None]
+    assert errors == ["101"]
+
+
+class Connector:
+    sessionToken = "token"
+
+    def error_print(self, *args):
+        pass
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(archer_utils, "ArcherTransport", lambda **kwargs: None)
+    return archer_utils.ArcherAPISession("https://archer", "user", "pass", "Default", None, True, Connector())
+
+
+def test_page_is_merged(session):
+    records = [report_record(i) for i in range(1, 4)]
+
+    merged = session.merge_field_defs(FIELD_DEFS, records, 100, 0, 1)
+
+    assert (merged["status"], merged["message"]) == ("success", "Report retrieved")
+    assert merged["records"] == records
+    assert names_and_texts(records[2])[0] == ("Incident ID", "3")
+
+
+def test_merge_stops_at_max_count(session):
+    records = [report_record(i) for i in range(1, 6)]
+
+    # Three records were taken from earlier pages
+    merged = session.merge_field_defs(ReportFields(FIELD_DEFS), records, 5, 3, 2)
+
+    assert (merged["status"], merged["message"]) == ("max records reached", "Report retrieved - max results reached")
+    assert [record["@contentId"] for record in merged["records"]] == ["1001", "1002"]
+
+
+def test_single_record_page(session):
+    merged = session.merge_field_defs(FIELD_DEFS, report_record(1), 100, 0, 1)
+
+    assert merged["status"] == "success"
+    assert len(merged["records"]) == 1
+
+
+def test_record_without_named_fields_fails_the_page(session):
+    records = [report_record(1), {"Field": [{"@id": "999", "@type": "1", "#text": "x"}]}]
+
+    merged = session.merge_field_defs(FIELD_DEFS, records, 100, 0, 1)
+
+    assert (merged["status"], merged["message"]) == ("failed", "Failed to merge any field name(s). Check Archer report configuration")
+
+
+def test_already_merged_records_are_counted_not_merged_again(session):
+    records = [report_record(1), report_record(2)]
+
+    merged = session.merge_field_defs(None, records, 100, 0, 1, named=[4, 0])
+
+    assert merged["status"] == "failed"
+    assert [record["@contentId"] for record in merged["records"]] == ["1001"]
+    assert "@name" not in records[0]["Field"][0]
+
+
+def test_page_that_cant_be_read_fails(session):
+    merged = session.merge_field_defs(FIELD_DEFS, [{"@contentId": "1"}], 100, 0, 7)
+
+    assert merged["status"] == "failed"
+    assert merged["message"].startswith("Failed to merge field definitions with report page 7 ticket data")
@@ -0,0 +1,134 @@
+# File: test_report_pager.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Report pages prefetched on a background thread (archer_report.ReportPager)."""
+
+import time
+
+from archer_report import ReportPager
+
+
+class Pages:
+    """Fetches page n as "page n", remembering the pages fetched; raises
+    for the page given as `fail`.
+    """
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.fetched = []
+
+    def __call__(self, page):
+        self.fetched.append(page)
+        if page == self.fail:
+            raise ValueError(f"page {page} failed")
+        return f"page {page}"
+
+
+def settle(condition, timeout=2):
+    """Waits until condition() holds or the timeout passes, and returns it."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_pages_come_in_order_up_to_the_planned_last_page():
+    fetch = Pages()
+    pager = ReportPager(fetch, 10, depth=2)
+    items = []
+
+    for page, result, error in pager:
+        items.append((page, result, error))
+        if page == 1:
+            pager.stop_after(4)
+
+    assert items == [(1, "page 1", None), (2, "page 2", None), (3, "page 3", None), (4, "page 4", None)]
+    assert fetch.fetched == [1, 2, 3, 4]
+    assert pager.fetch_seconds > 0
+
+
+def test_only_the_first_page_is_fetched_until_the_caller_plans():
+    fetch = Pages()
+    pager = ReportPager(fetch, 10)
+    pages = iter(pager)
+
+    assert next(pages)[0] == 1
+    time.sleep(0.2)
+    assert fetch.fetched == [1]
+
+    pager.stop_after(2)
+    assert [page for page, _, _ in pages] == [2]
+
+
+def test_max_pages_is_never_exceeded():
+    fetch = Pages()
+    pager = ReportPager(fetch, 3)
+
+    for page, _, _ in pager:
+        if page == 1:
+            pager.stop_after(100)
+
+    assert fetch.fetched == [1, 2, 3]
+
+
+def test_failed_page_ends_the_pages():
+    fetch = Pages(fail=2)
+    pager = ReportPager(fetch, 10)
+    items = []
+
+    for item in pager:
+        items.append(item)
+        pager.stop_after(10)
+
+    assert [(page, result) for page, result, _ in items] == [(1, "page 1"), (2, None)]
+    assert str(items[-1][2]) == "page 2 failed"
+    assert fetch.fetched == [1, 2]
+
+
+def test_prefetching_is_bounded_by_the_queue_depth():
+    fetch = Pages()
+    pager = ReportPager(fetch, 100, depth=2)
+    pages = iter(pager)
+    next(pages)
+    pager.stop_after(100)
+
+    # Two pages wait in the queue and a third waits to be put there
+    assert settle(lambda: len(fetch.fetched) == 4)
+    time.sleep(0.2)
+    assert fetch.fetched == [1, 2, 3, 4]
+    pages.close()
+
+
+def test_stopping_early_ends_the_fetching_thread():
+    fetch = Pages()
+    pager = ReportPager(fetch, 100, depth=1)
+    for page, _, _ in pager:
+        pager.stop_after(100)
+        if page == 2:
+            break
+
+    pager._thread.join(2)
+    assert not pager._thread.is_alive()
+    assert max(fetch.fetched) <= 4
+
+
+def test_stopping_after_the_first_page_ends_the_waiting_thread():
+    fetch = Pages()
+    pager = ReportPager(fetch, 100)
+    for _ in pager:
+        break
+
+    pager._thread.join(2)
+    assert not pager._thread.is_alive()
+    assert fetch.fetched == [1]
@@ -0,0 +1,190 @@
+# File: test_schema_cache.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Bounded, persisted schema metadata cache (archer_cache.SchemaCache)."""
+
+import json
+
+import pytest
+
+import archer_cache
+from archer_cache import SchemaCache, cached_schema
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable time.time() for the cache."""
+
+    class Clock:
+        now = 1_000_000.0
+
+        def time(self):
+            return self.now
+
+    clock = Clock()
+    monkeypatch.setattr(archer_cache.time, "time", clock.time)
+    return clock
+
+
+def test_entry_expires_after_its_ttl(clock):
+    cache = SchemaCache(ttl=60)
+    cache.set("levels", (70,), [1, 2])
+
+    clock.now += 59
+    assert cache.get("levels", (70,)) == (True, [1, 2])
+    clock.now += 2
+    assert cache.get("levels", (70,)) == (False, None)
+    assert cache.get_stats() == {"schema_cache_hits": 1, "schema_cache_misses": 1}
+    assert len(cache) == 0
+
+
+def test_kind_ttl_caps_the_asset_ttl(clock):
+    cache = SchemaCache(ttl=3600, kind_ttls={"users": 10})
+    cache.set("users", (), ["jdoe"])
+    cache.set("apps", (), ["Incidents"], ttl=7200)
+
+    assert cache.ttl_for("users") == 10
+    clock.now += 11
+    assert cache.get("users", ()) == (False, None)
+    # An explicit ttl is capped at the asset's too
+    clock.now += 3600
+    assert cache.get("apps", ()) == (False, None)
+
+
+def test_least_recently_used_entry_is_dropped(clock):
+    cache = SchemaCache(max_entries=2)
+    cache.set("levels", (1,), "one")
+    cache.set("levels", (2,), "two")
+    cache.get("levels", (1,))
+
+    cache.set("levels", (3,), "three")
+
+    assert cache.get("levels", (2,)) == (False, None)
+    assert cache.get("levels", (1,)) == (True, "one")
+    assert cache.get("levels", (3,)) == (True, "three")
+
+
+def test_save_and_load_round_trip(clock, tmp_path):
+    path = str(tmp_path / "schema.json")
+    cache = SchemaCache(path, ttl=3600)
+    cache.set("apps", (), [{"Id": 70, "Name": "Incidents"}])
+    cache.set("valueslist", (900,), [{"Id": 1, "Name": "Open"}])
+    cache.get("apps", ())
+    cache.save()
+
+    loaded = SchemaCache(path, ttl=3600)
+
+    assert loaded.get("valueslist", (900,)) == (True, [{"Id": 1, "Name": "Open"}])
+    assert loaded.get("apps", ()) == (True, [{"Id": 70, "Name": "Incidents"}])
+    # Saved least recently used first, so the order survives the round trip
+    with open(path) as f:
+        assert [key for key, _ in json.load(f)["entries"]] == ["valueslist|900", "apps"]
+
+
+def test_load_skips_expired_entries_and_keeps_the_most_recent(clock, tmp_path):
+    path = str(tmp_path / "schema.json")
+    cache = SchemaCache(path, ttl=3600, kind_ttls={"users": 10})
+    cache.set("users", (), ["jdoe"])
+    for level in range(3):
+        cache.set("levels", (level,), level)
+    cache.save()
+    clock.now += 11
+
+    loaded = SchemaCache(path, ttl=3600, max_entries=2)
+
+    assert loaded.get("users", ()) == (False, None)
+    assert loaded.get("levels", (0,)) == (False, None)
+    assert loaded.get("levels", (2,)) == (True, 2)
+
+
+def test_load_ignores_another_file_version(clock, tmp_path):
+    path = tmp_path / "schema.json"
+    path.write_text(json.dumps({"version": SchemaCache.FILE_VERSION - 1, "entries": [["apps", [clock.now + 60, []]]]}))
+
+    assert len(SchemaCache(str(path), ttl=3600)) == 0
+
+
+def test_zero_ttl_keeps_the_cache_in_memory(tmp_path):
+    path = tmp_path / "schema.json"
+    cache = SchemaCache(str(path), ttl=0)
+    cache.set("apps", (), [])
+    cache.save()
+
+    assert not path.exists()
+    assert cache.get("apps", ()) == (True, [])
+
+
+def test_unchanged_cache_is_not_written(clock, tmp_path):
+    path = tmp_path / "schema.json"
+    cache = SchemaCache(str(path), ttl=3600)
+    cache.set("apps", (), [])
+    cache.save()
+    path.write_text("untouched")
+
+    cache.get("apps", ())
+    cache.save()
+
+    assert path.read_text() == "untouched"
+
+
+def test_invalidate_one_entry_or_one_kind(clock):
+    cache = SchemaCache()
+    for args in ((1,), (2,)):
+        cache.set("references", args, [])
+        cache.set("levels", args, [])
+
+    cache.invalidate("references", 1)
+    assert cache.get("references", (1,)) == (False, None)
+    assert cache.get("references", (2,)) == (True, [])
+
+    cache.invalidate("levels")
+    assert len(cache) == 1
+
+
+def test_invalidate_kind_drops_entries_without_arguments(clock):
+    cache = SchemaCache()
+    cache.set("users", (), ["jdoe"])
+    cache.set("users_domain", (), ["jdoe"])
+
+    cache.invalidate("users")
+
+    assert cache.get("users", ()) == (False, None)
+    assert cache.get("users_domain", ()) == (True, ["jdoe"])
+
+
+def test_invalidate_once_only_after_a_hit(clock):
+    cache = SchemaCache()
+    cache.set("apps", (), [])
+    assert not cache.invalidate_once()
+
+    cache.get("apps", ())
+    assert cache.invalidate_once()
+    assert len(cache) == 0
+    assert not cache.invalidate_once()
+
+
+def test_cached_schema_never_keeps_a_failed_lookup(clock):
+    class Session:
+        schema_cache = SchemaCache()
+        calls = 0
+
+        @cached_schema("valueslist")
+        def get_valueslist(self, vlid):
+            self.calls += 1
+            return None if vlid == 0 else [vlid]
+
+    session = Session()
+    assert session.get_valueslist(900) == session.get_valueslist(900) == [900]
+    assert session.get_valueslist(0) is session.get_valueslist(0) is None
+    assert session.calls == 3
@@ -0,0 +1,211 @@
+# File: test_search.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""ExecuteSearch pages streamed into records (ArcherSOAP.iter_records, ArcherAPISession.iter_records)."""
+
+from xml.sax.saxutils import escape
+
+import pytest
+from lxml import etree
+
+import archer_utils
+from archer_records import as_record_dict
+
+
+SOAPNS = "http://schemas.xmlsoap.org/soap/envelope/"
+ARCHERNS = "http://archer-tech.com/webservices/"
+FIELDS = {100: "Incident ID", 101: "Title"}
+
+
+def search_record(i):
+    return f'<Record contentId="{1000 + i}" levelId="60" moduleId="70"><Field id="100" type="6">{i}</Field><Field id="101" type="1">Title {i}</Field></Record>'
+
+
+def incident_ids(records):
+    return [int(record["Field"][0]["#text"]) for record in records]
+
+
+class Response:
+    """A streamed response, remembering how many chunks were read."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+
+    def iter_content(self, size):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        pass
+
+
+class Transport:
+    """Answers ExecuteSearch pages over `total` records, one chunk per
+    record, and remembers each search's (page number, search options).
+    """
+
+    def __init__(self, total, counted=True):
+        self.total = total
+        self.counted = counted
+        self.searches = []
+        self.responses = []
+
+    def post(self, url, data=None, headers=None, stream=False):
+        body = etree.fromstring(data)
+        page = int(body.findtext(f".//{{{ARCHERNS}}}pageNumber"))
+        options = etree.fromstring(body.findtext(f".//{{{ARCHERNS}}}searchOptions"))
+        self.searches.append((page, options))
+        size = int(options.findtext("PageSize"))
+        chunks = [f"<soap:Envelope xmlns:soap='{SOAPNS}'><soap:Body><ExecuteSearchResponse xmlns='{ARCHERNS}'><ExecuteSearchResult>".encode()]
+        chunks.append(escape(f'<Records count="{self.total}">' if self.counted else "<Records>").encode())
+        chunks.extend(escape(search_record(i)).encode() for i in range((page - 1) * size + 1, min(page * size, self.total) + 1))
+        chunks.append(escape("</Records>").encode())
+        chunks.append(b"</ExecuteSearchResult></ExecuteSearchResponse></soap:Body></soap:Envelope>")
+        response = Response(chunks)
+        self.responses.append(response)
+        return response
+
+    def pages(self):
+        return [page for page, _ in self.searches]
+
+
+class Connector:
+    sessionToken = "token"
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def make(total, counted=True):
+        transport = Transport(total, counted)
+        monkeypatch.setattr(archer_utils, "ArcherTransport", lambda **kwargs: transport)
+        asession = archer_utils.ArcherAPISession("https://archer", "user", "pass", "Default", None, True, Connector())
+        asession.get_fieldId_for_app_and_name = lambda app, name: 100
+        asession.get_moduleid = lambda app: 70
+        asession._get_field_id_map = lambda app: dict(FIELDS)
+        asession.get_field_details = lambda fid: {"Id": fid, "Type": 6}
+        return asession, transport
+
+    return make
+
+
+def test_records_are_fetched_page_by_page(session):
+    asession, transport = session(7)
+
+    results = asession.iter_records("Incidents", "Incident ID", None, 100, page_size=3)
+
+    assert incident_ids(results) == [1, 2, 3, 4, 5, 6, 7]
+    assert results.count == 7
+    assert transport.pages() == [1, 2, 3]
+    assert {options.findtext("PageSize") for _, options in transport.searches} == {"3"}
+
+
+def test_records_are_named_from_the_display_fields(session):
+    asession, _ = session(1)
+
+    (record,) = asession.iter_records("Incidents", "Incident ID", None, 100)
+
+    assert record["@contentId"] == "1001"
+    assert [(f["@name"], f["#text"]) for f in record["Field"]] == [("Incident ID", "1"), ("Title", "Title 1")]
+
+
+def test_no_page_is_fetched_past_archers_count(session):
+    asession, transport = session(6)
+
+    assert incident_ids(asession.iter_records("Incidents", "Incident ID", None, 100, page_size=3)) == [1, 2, 3, 4, 5, 6]
+    assert transport.pages() == [1, 2]
+
+
+def test_search_stops_at_max_count(session):
+    asession, transport = session(10)
+
+    assert incident_ids(asession.iter_records("Incidents", "Incident ID", None, 4, page_size=3)) == [1, 2, 3, 4]
+    assert transport.pages() == [1, 2]
+
+
+def test_search_resumes_from_a_page(session):
+    asession, transport = session(10)
+
+    assert incident_ids(asession.iter_records("Incidents", "Incident ID", None, 3, page=2, page_size=3)) == [4, 5, 6]
+    assert transport.pages() == [2]
+
+
+def test_records_arrive_while_the_page_streams_in(session):
+    asession, transport = session(50)
+    records = iter(asession.iter_records("Incidents", "Incident ID", None, 50))
+
+    assert incident_ids([next(records)]) == [1]
+    response = transport.responses[0]
+    assert response.read < len(response.chunks) // 2
+
+    assert incident_ids(records) == list(range(2, 51))
+
+
+def test_worker_pages_come_in_archers_order(session):
+    asession, transport = session(11)
+
+    results = asession.iter_records("Incidents", "Incident ID", None, 100, page_size=2, workers=3)
+
+    assert incident_ids(results) == list(range(1, 12))
+    assert sorted(transport.pages()) == [1, 2, 3, 4, 5, 6]
+
+
+def test_compact_records_give_the_same_dicts(session):
+    asession, _ = session(5)
+
+    records = list(asession.iter_records("Incidents", "Incident ID", None, 100, page_size=2))
+    compact = list(asession.iter_records("Incidents", "Incident ID", None, 100, page_size=2, compact=True))
+
+    assert {type(record).__name__ for record in compact} == {"CompactRecord"}
+    assert [as_record_dict(record) for record in compact] == records
+
+
+def test_count_is_known_once_the_first_page_is_parsed(session):
+    asession, _ = session(7)
+    results = asession.iter_records("Incidents", "Incident ID", None, 100, page_size=3)
+    assert results.count is None
+
+    next(iter(results))
+    assert results.count == 7
+
+    results.close()
+    assert list(results) == []
+
+
+def test_count_records_fetches_one_record_of_one_field(session):
+    asession, transport = session(1234)
+
+    assert asession.count_records("Incidents", "Incident ID", "42") == 1234
+
+    ((page, options),) = transport.searches
+    assert (page, options.findtext("PageSize")) == (1, "1")
+    assert [df.text for df in options.find("DisplayFields")] == ["100"]
+
+
+@pytest.mark.parametrize(("total", "counted", "count"), [(0, True, 0), (3, False, None)])
+def test_count_records_without_records_or_count(session, total, counted, count):
+    asession, _ = session(total, counted)
+
+    assert asession.count_records("Incidents", "Incident ID", None) == count
+
+
+def test_missing_count_pages_until_a_short_page(session):
+    asession, transport = session(6, counted=False)
+
+    results = asession.iter_records("Incidents", "Incident ID", None, 100, page_size=3)
+
+    assert incident_ids(results) == [1, 2, 3, 4, 5, 6]
+    assert results.count is None
+    assert transport.pages() == [1, 2, 3]
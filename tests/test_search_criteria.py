@@ -0,0 +1,192 @@
+# File: test_search_criteria.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Results filters sent to Archer as search criteria (archer_search.SearchCriteria, compile_results_filter)."""
+
+from xml.sax.saxutils import escape
+
+import pytest
+from lxml import etree
+
+import archer_utils
+from archer_search import SearchCriteria, SearchPlan, compile_results_filter
+
+
+SOAPNS = "http://schemas.xmlsoap.org/soap/envelope/"
+ARCHERNS = "http://archer-tech.com/webservices/"
+NO_RECORDS = escape('<Records count="0"></Records>')
+FIELDS = {"Title": (101, 1), "Incident ID": (100, 6), "Severity": (102, 4), "Opened": (103, 3)}
+
+
+def text(field_id, value):
+    return SearchPlan(field_id, "text", value)
+
+
+@pytest.mark.parametrize(
+    ("criteria", "logic"),
+    [
+        (SearchCriteria("and", [text(1, "a"), text(2, "b")]), "1 AND 2"),
+        (SearchCriteria("AND", [text(1, "a"), SearchCriteria("OR", [text(2, "b"), text(3, "c")])]), "1 AND (2 OR 3)"),
+        (SearchCriteria("OR", [SearchCriteria("AND", [text(1, "a"), text(2, "b")]), text(3, "c")]), "(1 AND 2) OR 3"),
+        # A lone condition needs no parentheses, and None children are dropped
+        (SearchCriteria("AND", [text(1, "a"), SearchCriteria("OR", [text(2, "b"), None])]), "1 AND 2"),
+    ],
+)
+def test_operator_logic_numbers_conditions_in_order(criteria, logic):
+    assert criteria.operator_logic() == logic
+    assert [plan.field_id for plan in criteria.conditions()] == list(range(1, len(criteria.conditions()) + 1))
+
+
+def test_operator_logic_can_start_past_other_conditions():
+    criteria = SearchCriteria("OR", [text(1, "a"), text(2, "b")])
+
+    assert criteria.operator_logic(start=2) == "2 OR 3"
+
+
+def test_empty_criteria_is_false():
+    assert not SearchCriteria("AND", [None])
+
+
+def test_text_and_integer_conditions_go_to_archer():
+    criteria, leftover = compile_results_filter({"Title": "phish", "Incident ID": "42", "Severity": "High"}, "and", "equals", FIELDS)
+
+    assert [(p.field_id, p.filter_type, p.operator, p.value) for p in criteria.conditions()] == [
+        (101, "text", "Equals", "phish"),
+        (100, "numeric", "Equals", 42),
+    ]
+    assert criteria.operator_logic() == "1 AND 2"
+    assert leftover == {"Severity": "High"}
+
+
+@pytest.mark.parametrize(
+    ("conditions", "equality"),
+    [
+        # A substring of a number, a non-integer, an unknown field and a values list
+        ({"Incident ID": "4"}, "contains"),
+        ({"Incident ID": "4.5"}, "equals"),
+        ({"Assignee": "jdoe"}, "equals"),
+        ({"Severity": "High", "Opened": "2024-01-01"}, "equals"),
+    ],
+)
+def test_other_conditions_stay_client_side(conditions, equality):
+    assert compile_results_filter(conditions, "and", equality, FIELDS) == (None, conditions)
+
+
+def test_or_goes_to_archer_whole_or_not_at_all():
+    conditions = {"Title": "phish", "Severity": "High"}
+
+    assert compile_results_filter(conditions, "or", "contains", FIELDS) == (None, conditions)
+
+    criteria, leftover = compile_results_filter({"Title": "phish", "Incident ID": "42"}, "or", "equals", FIELDS)
+    assert (criteria.operator_logic(), leftover) == ("1 OR 2", {})
+
+
+class Transport:
+    """Answers every ExecuteSearch with no records, remembering its search options."""
+
+    def __init__(self):
+        self.options = []
+
+    def post(self, url, data=None, headers=None, stream=False):
+        body = etree.fromstring(data)
+        self.options.append(etree.fromstring(body.findtext(f".//{{{ARCHERNS}}}searchOptions")))
+        envelope = (
+            f"<soap:Envelope xmlns:soap='{SOAPNS}'><soap:Body><ExecuteSearchResponse xmlns='{ARCHERNS}'>"
+            f"<ExecuteSearchResult>{NO_RECORDS}</ExecuteSearchResult>"
+            "</ExecuteSearchResponse></soap:Body></soap:Envelope>"
+        )
+        return Response([envelope.encode()])
+
+
+class Response:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def iter_content(self, size):
+        return iter(self.chunks)
+
+    def close(self):
+        pass
+
+
+class Connector:
+    sessionToken = "token"
+
+
+@pytest.fixture
+def session(monkeypatch):
+    transport = Transport()
+    monkeypatch.setattr(archer_utils, "ArcherTransport", lambda **kwargs: transport)
+    asession = archer_utils.ArcherAPISession("https://archer", "user", "pass", "Default", None, True, Connector())
+    asession.get_fieldId_for_app_and_name = lambda app, name: 100
+    asession.get_moduleid = lambda app: 70
+    asession._get_field_id_map = lambda app: {fid: name for name, (fid, _) in FIELDS.items()}
+    asession.get_field_details = lambda fid: {"Id": fid, "Type": 6}
+    return asession, transport
+
+
+def conditions(options):
+    return [
+        (condition.tag, condition.findtext("Operator"), condition.findtext("Field"), condition.findtext("Value"))
+        for condition in options.find("Criteria/Filter/Conditions")
+    ]
+
+
+def test_criteria_are_anded_with_the_searched_field(session):
+    asession, transport = session
+    criteria = SearchCriteria("OR", [text(101, "phish"), SearchPlan(100, "numeric", 7)])
+
+    list(asession.iter_records("Incidents", "Incident ID", "42", 10, criteria=criteria))
+
+    (options,) = transport.options
+    assert conditions(options) == [
+        ("NumericFilterCondition", "Equals", "100", "42"),
+        ("TextFilterCondition", "Contains", "101", "phish"),
+        ("NumericFilterCondition", "Equals", "100", "7"),
+    ]
+    assert options.findtext("Criteria/Filter/OperatorLogic") == "1 AND (2 OR 3)"
+    assert options.findtext("Criteria/ModuleCriteria/Module") == "70"
+
+
+def test_criteria_alone_when_no_value_is_searched(session):
+    asession, transport = session
+    criteria = SearchCriteria("AND", [text(101, "phish")])
+
+    list(asession.iter_records("Incidents", "Incident ID", None, 10, criteria=criteria))
+
+    (options,) = transport.options
+    assert conditions(options) == [("TextFilterCondition", "Contains", "101", "phish")]
+    assert options.findtext("Criteria/Filter/OperatorLogic") == "1"
+
+
+def test_values_list_and_date_conditions(session):
+    asession, transport = session
+    criteria = SearchCriteria("AND", [SearchPlan(102, "valueslist", [7, 8]), SearchPlan(103, "date", "2024-01-01 10:00")])
+
+    list(asession.iter_records("Incidents", "Incident ID", None, 10, criteria=criteria))
+
+    filters = transport.options[0].find("Criteria/Filter/Conditions")
+    values_list, date = filters
+    assert values_list.tag == "ValueListFilterCondition"
+    assert [v.text for v in values_list.find("Values")] == ["7", "8"]
+    assert values_list.findtext("IsNoSelectionIncluded") == "False"
+    assert (date.tag, date.findtext("Operator"), date.findtext("IsTimeIncluded")) == ("DateComparisonFilterCondition", "Equals", "True")
+
+
+def test_no_filter_without_value_or_criteria(session):
+    asession, transport = session
+
+    list(asession.iter_records("Incidents", "Incident ID", None, 10))
+
+    assert transport.options[0].find("Criteria/Filter") is None
@@ -0,0 +1,162 @@
+# File: test_search_filter.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Client-side results filters (archer_search.compile_record_filter)."""
+
+import itertools
+
+import legacy
+import pytest
+from lxml import etree
+
+from archer_records import CompactRecord, FieldTable, convert_compact_record
+from archer_search import compile_record_filter
+
+
+class CountingFields(list):
+    """A record's "Field" list that counts how often it is iterated and
+    how many fields are read.
+    """
+
+    iterations = 0
+    visited = 0
+
+    def __iter__(self):
+        self.iterations += 1
+        for field in super().__iter__():
+            self.visited += 1
+            yield field
+
+
+def record(content_id, **fields):
+    return {
+        "@contentId": str(content_id),
+        "Field": CountingFields({"@id": str(i), "@name": name, "#text": text} for i, (name, text) in enumerate(fields.items())),
+    }
+
+
+def sample_records():
+    return [
+        record(1, Title="Phishing email", Status="New", Severity="High"),
+        record(2, Title="Malware on host", Status="Closed", Severity="Low"),
+        record(3, Title="PHISHING site", Status="new", Severity=None),
+        record(4, Title="", Status="Open", Severity="High, Low"),
+        record(5, Title="Lost laptop", Status=None, Severity=""),
+        record(6, Title="phishing", Status="New", Severity="Medium"),
+    ]
+
+
+CONDITIONS = [
+    {"Title": "phishing"},
+    {"Title": "Phishing", "Status": "NEW"},
+    {"Title": "phish", "Severity": "high"},
+    {"Severity": "High, Low"},
+    {"Status": "new", "Missing": "x"},
+    {"Missing": "x"},
+    {"Title": ""},
+    {},
+]
+
+
+def matched_ids(records):
+    return [r["@contentId"] for r in records]
+
+
+@pytest.mark.parametrize(
+    ("conditions", "operator", "equality"),
+    list(itertools.product(CONDITIONS, ("and", "or"), ("equals", "contains"))),
+)
+def test_matches_legacy_filter(conditions, operator, equality):
+    records = sample_records()
+    passes = compile_record_filter(conditions, operator, equality)
+
+    assert matched_ids(filter(passes, records)) == matched_ids(legacy.filter_records(conditions, operator, equality, records))
+
+
+@pytest.mark.parametrize("equality", ("equals", "contains"))
+@pytest.mark.parametrize("value", (1, 2.5, None, ["New"], {"a": 1}))
+def test_and_with_non_string_value_matches_nothing(value, equality):
+    records = sample_records()
+    passes = compile_record_filter({"Status": "new", "Severity": value}, "and", equality)
+
+    assert not any(passes(r) for r in records)
+    # Rejected without reading a single field
+    assert all(r["Field"].iterations == 0 for r in records)
+
+
+@pytest.mark.parametrize("equality", ("equals", "contains"))
+@pytest.mark.parametrize("value", (1, None))
+def test_or_ignores_non_string_values(value, equality):
+    passes = compile_record_filter({"Status": "closed", "Severity": value}, "or", equality)
+
+    assert matched_ids(filter(passes, sample_records())) == ["2"]
+
+
+@pytest.mark.parametrize("equality", ("equals", "contains"))
+def test_empty_text_never_matches_or(equality):
+    records = [record(1, Title=""), record(2, Title=None), record(3, Title="   ")]
+    passes = compile_record_filter({"Title": ""}, "or", equality)
+
+    assert [passes(r) for r in records] == [False, False, equality == "contains"]
+
+
+@pytest.mark.parametrize(
+    ("conditions", "operator"),
+    [
+        ({"Title": "phishing", "Status": "new"}, "and"),
+        ({"Title": "phishing", "Severity": "x", "Missing": "y"}, "and"),
+        ({"Title": "laptop", "Status": "closed"}, "or"),
+        ({"Missing": "x"}, "or"),
+    ],
+)
+@pytest.mark.parametrize("equality", ("equals", "contains"))
+def test_each_record_is_scanned_once(conditions, operator, equality):
+    records = sample_records()
+    passes = compile_record_filter(conditions, operator, equality)
+    for r in records:
+        passes(r)
+
+    assert all(r["Field"].iterations == 1 for r in records)
+    assert all(r["Field"].visited <= len(r["Field"]) for r in records)
+
+
+def test_scan_stops_once_outcome_is_known():
+    r = record(1, Title="Phishing", Status="New", Severity="High", Owner="x")
+
+    assert compile_record_filter({"Title": "phishing", "Status": "new"}, "and", "equals")(r)
+    assert r["Field"].visited == 2
+    assert compile_record_filter({"Title": "phishing", "Owner": "x"}, "or", "equals")(r)
+    assert r["Field"].visited == 3
+
+
+def test_and_counts_each_condition_once():
+    # The old filter counted matching fields, so a name repeated in the
+    # record could stand in for another condition
+    r = record(1, Title="a")
+    r["Field"].append({"@id": "9", "@name": "Title", "#text": "a"})
+
+    assert legacy.filter_records({"Title": "a", "Status": "b"}, "and", "equals", [r]) == [r]
+    assert not compile_record_filter({"Title": "a", "Status": "b"}, "and", "equals")(r)
+
+
+def test_compact_record_is_scanned_once(monkeypatch):
+    calls = []
+    texts = CompactRecord.texts
+    monkeypatch.setattr(CompactRecord, "texts", lambda self: calls.append(self) or texts(self))
+    xml = '<Record contentId="1"><Field id="1" type="1">Phishing</Field><Field id="2" type="4"><ListValues><ListValue id="3">New</ListValue></ListValues></Field></Record>'
+    compact = convert_compact_record(etree.fromstring(xml), FieldTable({1: "Title", 2: "Status"}))
+
+    assert compile_record_filter({"Title": "phishing", "Status": "new"}, "and", "equals")(compact)
+    assert not compile_record_filter({"Title": "x", "Status": "x"}, "or", "contains")(compact)
+    assert calls == [compact, compact]
@@ -0,0 +1,72 @@
+# File: test_search_pages.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Search pages fetched concurrently (ArcherAPISession._fetch_pages)."""
+
+import threading
+import time
+
+from archer_utils import ArcherAPISession
+
+
+PAGE_SIZE = 3
+
+
+class Pages:
+    """Fetches pages of PAGE_SIZE records, the last one short; pages after
+    the first wait for `release` if given.
+    """
+
+    def __init__(self, last_full, release=None):
+        self.last_full = last_full
+        self.release = release
+        self.started = []
+
+    def __call__(self, page):
+        self.started.append(page)
+        if self.release is not None and page > 1:
+            self.release.wait(5)
+        size = PAGE_SIZE if page <= self.last_full else 1
+        return [(page, i) for i in range(size)]
+
+
+def test_pages_come_in_order_until_a_short_one():
+    fetch = Pages(last_full=4)
+
+    pages = list(ArcherAPISession._fetch_pages(fetch, 2, 10, PAGE_SIZE, workers=3))
+
+    assert [records[0][0] for records in pages] == [2, 3, 4, 5]
+    assert len(pages[-1]) == 1
+    # No more than `workers` pages past the short one were started
+    assert max(fetch.started) <= 5 + 2
+
+
+def test_stop_after_first_page_does_not_wait_for_pages_in_flight():
+    release = threading.Event()
+    fetch = Pages(last_full=100, release=release)
+    try:
+        pages = ArcherAPISession._fetch_pages(fetch, 1, 100, PAGE_SIZE, workers=2)
+        assert next(pages)[0] == (1, 0)
+
+        start = time.perf_counter()
+        pages.close()
+
+        assert time.perf_counter() - start < 1
+        # Pages 2 and 3 were in flight (page 3 may have been cancelled
+        # before it started); nothing was submitted after the stop
+        time.sleep(0.1)
+        assert sorted(fetch.started)[:2] == [1, 2]
+        assert max(fetch.started) <= 3
+    finally:
+        release.set()
@@ -0,0 +1,67 @@
+# File: test_search_plan.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Search conditions picked from the field type (archer_search.plan_search, ArcherAPISession.plan_search)."""
+
+import pytest
+
+import archer_utils
+
+
+VALUES = [
+    {"Id": 1, "Name": "Open", "Alias": "open", "NumericValue": 1, "Description": None, "EnableOtherText": False},
+    {"Id": 2, "Name": "Closed", "Alias": "closed", "NumericValue": 2, "Description": "done", "EnableOtherText": False},
+    {"Id": 3, "Name": "Other", "Alias": "other", "NumericValue": 3, "Description": None, "EnableOtherText": True},
+]
+
+
+class Connector:
+    sessionToken = "token"
+
+    def error_print(self, *args):
+        pass
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(archer_utils, "ArcherTransport", lambda **kwargs: None)
+    asession = archer_utils.ArcherAPISession("https://archer", "user", "pass", "Default", None, True, Connector())
+    asession.get_field_details = lambda fid: {"Id": fid, "Type": 4, "RelatedValuesListId": 900}
+    asession.get_valueslist = lambda vlid: VALUES
+    return asession
+
+
+@pytest.mark.parametrize(("value", "value_ids"), [("Closed", [2]), ("closed", [2]), ("done", [2]), ("1", [1])])
+def test_values_list_entry_is_matched_by_value_id(session, value, value_ids):
+    plan = session.plan_search(102, value)
+
+    assert (plan.filter_type, plan.operator, plan.value) == ("valueslist", "Contains", value_ids)
+
+
+@pytest.mark.parametrize("value", ["Clos", "Reopened", "Other: details"])
+def test_value_naming_no_entry_is_searched_as_text(session, value):
+    plan = session.plan_search(102, value)
+
+    assert (plan.filter_type, plan.operator, plan.value) == ("text", "Contains", value)
+
+
+def test_failed_values_list_lookup_is_searched_as_text(session):
+    def unavailable(vlid):
+        raise Exception("Service Unavailable")
+
+    session.get_valueslist = unavailable
+
+    plan = session.plan_search(102, "Closed")
+
+    assert (plan.filter_type, plan.value) == ("text", "Closed")
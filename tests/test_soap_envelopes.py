@@ -0,0 +1,98 @@
+# File: test_soap_envelopes.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""SoapOperation templates must post exactly the envelopes the app used to
+build as lxml trees.
+"""
+
+import legacy
+import pytest
+from lxml import etree
+
+from archer_soap import SOAP_OPERATIONS, SoapOperation
+
+
+SEARCH_OPTIONS = etree.tostring(
+    etree.fromstring("<SearchReport><PageSize>50</PageSize><Criteria><Keywords>a &amp; b</Keywords></Criteria></SearchReport>"),
+    pretty_print=True,
+).decode()
+FIELD_VALUES = etree.tostring(etree.fromstring('<Records><Record><Field id="12" value="R&amp;D &lt;x&gt; &quot;q&quot;"/></Record></Records>'))
+
+# Values that need escaping: markup characters, quotes, a CR, tabs,
+# non-ASCII text, an empty string and a None
+SAMPLE_VALUES = {
+    "userName": "jdoe<admin>",
+    "instanceName": "Archer & Co",
+    "password": "p'a\"ss\rword",
+    "usersDomain": "CORP\tDOMAIN",
+    "sessionToken": "0A1B2C3D",
+    "keyword": "Équipe sécurité",
+    "username": "",
+    "pageNumber": 3,
+    "searchOptions": SEARCH_OPTIONS,
+    "reportIdOrGuid": "c6a2e3b5-0f3e-4c62-9a5a-fd1e5b0c2a11",
+    "moduleId": 421,
+    "contentId": None,
+    "fieldValues": FIELD_VALUES,
+}
+
+
+def legacy_values(op, values):
+    """The (name, text) pairs the old builders set, with the text types
+    they used: str() of numbers, bytes as given, None left empty.
+    """
+    pairs = []
+    for name in op.params:
+        value = values.get(name)
+        if value is not None and not isinstance(value, (str, bytes)):
+            value = str(value)
+        pairs.append((name, value if value is not None else ""))
+    return pairs
+
+
+@pytest.mark.parametrize("name", sorted(SOAP_OPERATIONS))
+def test_render_matches_serialized_tree(name):
+    op = SOAP_OPERATIONS[name]
+    document = legacy.build_envelope(name, legacy_values(op, SAMPLE_VALUES))
+
+    assert op.render(SAMPLE_VALUES) == etree.tostring(document)
+
+
+@pytest.mark.parametrize("name", sorted(SOAP_OPERATIONS))
+def test_render_matches_pretty_printed_request(name):
+    # The old requests were pretty-printed; only the whitespace between
+    # elements differs
+    op = SOAP_OPERATIONS[name]
+    old = etree.fromstring(legacy.render_envelope(name, legacy_values(op, SAMPLE_VALUES)), etree.XMLParser(remove_blank_text=True))
+    new = etree.fromstring(op.render(SAMPLE_VALUES))
+
+    assert etree.tostring(new, method="c14n") == etree.tostring(old, method="c14n")
+
+
+@pytest.mark.parametrize("name", sorted(SOAP_OPERATIONS))
+def test_render_headers(name):
+    op = SOAP_OPERATIONS[name]
+
+    assert op.headers == {
+        "Content-Type": "text/xml; charset=utf-8",
+        "SOAPAction": f'"http://archer-tech.com/webservices/{name}"',
+    }
+
+
+def test_render_round_trips_values():
+    op = SoapOperation("LookupUserId", "/accesscontrol.asmx", ("sessionToken", "username"))
+    values = {"sessionToken": "T", "username": "a&b<c>\r\n\"'é☃"}
+    root = etree.fromstring(op.render(values))
+
+    assert [e.text for e in root.iter("{*}sessionToken", "{*}username")] == ["T", values["username"]]
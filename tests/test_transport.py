@@ -0,0 +1,55 @@
+# File: test_transport.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Pooled HTTP transport (archer_transport.ArcherTransport)."""
+
+import pytest
+
+from archer_transport import ArcherTransport
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    calls = []
+
+    def request(self, method, url, **kwargs):
+        calls.append((method, url, kwargs))
+
+    monkeypatch.setattr("requests.Session.request", request)
+    return calls
+
+
+def test_default_waits_for_the_answer(sent):
+    transport = ArcherTransport()
+    transport.post("https://archer/ws/search.asmx", data=b"<x/>")
+
+    # Connecting is bounded, reading is not: large report pages take long to build
+    assert sent == [("post", "https://archer/ws/search.asmx", {"data": b"<x/>", "timeout": (30, None), "verify": True})]
+
+
+@pytest.mark.parametrize(("timeout", "expected"), [(0, (30, None)), (None, (30, None)), (600, (30, 600))])
+def test_timeout_setting(sent, timeout, expected):
+    ArcherTransport(timeout=timeout, verify=False).request("get", "https://archer/api/core/system/application")
+
+    assert sent[0][2] == {"timeout": expected, "verify": False}
+
+
+def test_per_call_timeout_wins(sent):
+    ArcherTransport(timeout=600).request("get", "https://archer/api", timeout=5)
+
+    assert sent[0][2]["timeout"] == 5
+
+
+def test_stats_start_at_zero():
+    assert ArcherTransport().get_stats() == {"connections_opened": 0, "connections_reused": 0, "requests_sent": 0}
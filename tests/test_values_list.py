@@ -0,0 +1,104 @@
+# File: test_values_list.py
+#
+# Copyright (c) 2016-2026 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Values list lookups (archer_schema.ArcherValuesList, ArcherAPISession.get_valueslistvalue_id)."""
+
+import pytest
+
+import archer_utils
+from archer_schema import ArcherValuesList
+
+
+VALUES = [
+    {"Id": 1, "Name": "2", "Alias": "two", "NumericValue": 10, "Description": None, "EnableOtherText": False},
+    {"Id": 2, "Name": "Open", "Alias": "open", "NumericValue": 1, "Description": "Not yet triaged", "EnableOtherText": False},
+    {"Id": 3, "Name": "Closed", "Alias": "closed", "NumericValue": 2, "Description": "Open", "EnableOtherText": False},
+    {"Id": 4, "Name": "Other", "Alias": "misc", "NumericValue": 3, "Description": "", "EnableOtherText": True},
+]
+
+
+@pytest.fixture
+def index():
+    return ArcherValuesList(900, VALUES)
+
+
+@pytest.mark.parametrize(
+    ("requested", "ids"),
+    [
+        # Name and Alias, case-insensitively
+        (["CLOSED"], [3]),
+        (["two"], [1]),
+        # A name wins over the same text as another value's description
+        (["open"], [2]),
+        # Description, when no name or alias matches
+        (["not yet triaged"], [2]),
+        # A name wins over the same text as a numeric value or ID
+        (["2"], [1]),
+        # NumericValue or Id, when nothing else matches
+        (["10"], [1]),
+        ([3], [3, 4]),
+        (["4"], [4]),
+    ],
+)
+def test_first_matching_tier_wins(index, requested, ids):
+    assert index.find(requested) == ids
+
+
+def test_several_values_come_in_values_list_order(index):
+    assert index.find(["misc", "Closed", "closed", "open"]) == [2, 3, 4]
+
+
+def test_unknown_value_matches_nothing(index):
+    assert index.find(["Reopened", ""]) == []
+
+
+def test_other_text_value_is_found_by_any_of_its_keys(index):
+    assert index.find_other("OTHER") == 4
+    assert index.find_other("misc") == 4
+    assert index.find_other("Open") is None
+
+
+class Connector:
+    sessionToken = "token"
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(archer_utils, "ArcherTransport", lambda **kwargs: None)
+    asession = archer_utils.ArcherAPISession("https://archer", "user", "pass", "Default", None, True, Connector())
+    asession.get_valueslist = lambda vlid: VALUES
+    return asession
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("Closed", ([3], None)),
+        (["open", "Closed"], ([2, 3], None)),
+        ("Other: false positive", (4, " false positive")),
+        ("Closed: duplicate", (None, None)),
+        ("Reopened", (None, None)),
+    ],
+)
+def test_get_valueslistvalue_id(session, value, expected):
+    assert session.get_valueslistvalue_id(900, value) == expected
+
+
+def test_index_is_built_once_per_cached_response(session):
+    session.get_valueslistvalue_id(900, "Closed")
+    index = session.schema.values_list(900, VALUES)
+
+    session.get_valueslistvalue_id(900, "Open")
+
+    assert session.schema.values_list(900, VALUES) is index